@@ -1,7 +1,9 @@
 from .models import PaperAuthor, PaperIdentifier, PaperMetadata, PaperRecord
 from .pipeline import IngestionPipeline, ConceptExtractionPipeline
 from .sources import ArxivClient
-from .storage import JsonPaperStore, MySQLPaperStore
+from .segment_store import SegmentedPaperStore
+from .sqlite_store import SQLitePaperStore
+from .storage import JsonPaperStore, MySQLPaperStore, create_paper_store
 
 __all__ = [
     "ArxivClient",
@@ -13,4 +15,7 @@ __all__ = [
     "PaperMetadata",
     "PaperRecord",
     "MySQLPaperStore",
+    "SegmentedPaperStore",
+    "SQLitePaperStore",
+    "create_paper_store",
 ]
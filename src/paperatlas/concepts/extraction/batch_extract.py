@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .llm_extractor import SYSTEM_PROMPT, LLMClient
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+# Provider limits are 50,000 requests and 200 MB per input file.
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 190 * 1024 * 1024
+
+
+@dataclass
+class BatchJob:
+    batch_id: str
+    input_file_id: str
+    # paper_id -> LLMCache key of the prompt that was submitted
+    requests: Dict[str, str] = field(default_factory=dict)
+    status: str = "validating"
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+    ingested: bool = False
+    created_at: Optional[str] = None
+
+
+class BatchStateStore:
+    """Submitted batch jobs persisted as one JSON document."""
+
+    def __init__(self, path: str | Path = "data/llm_batches/state.json") -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def load(self) -> List[BatchJob]:
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except FileNotFoundError:
+            return []
+        return [BatchJob(**job) for job in payload.get("jobs", [])]
+
+    def save(self, jobs: List[BatchJob]) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(
+                {"jobs": [asdict(job) for job in jobs]},
+                handle,
+                ensure_ascii=True,
+                indent=2,
+            )
+        os.replace(tmp_path, self.path)
+
+
+class LLMBatchClient(LLMClient):
+    """Batch API calls (files and batches) on the same pooled client."""
+
+    def upload_batch_file(self, path: Path) -> str:
+        with path.open("rb") as handle:
+            response = self._http.post(
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": (path.name, handle, "application/jsonl")},
+            )
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def create_batch(self, input_file_id: str, completion_window: str = "24h") -> dict:
+        response = self._http.post(
+            "/batches",
+            json={
+                "input_file_id": input_file_id,
+                "endpoint": "/v1/responses",
+                "completion_window": completion_window,
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def retrieve_batch(self, batch_id: str) -> dict:
+        response = self._http.get(f"/batches/{batch_id}")
+        response.raise_for_status()
+        return response.json()
+
+    def iter_file_lines(self, file_id: str) -> Iterator[dict]:
+        with self._http.stream("GET", f"/files/{file_id}/content") as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class BatchExtractionRunner:
+    """Run concept extraction through the provider's asynchronous Batch API.
+
+    ``submit`` writes one Responses request per uncached paper into JSONL
+    input files, uploads them and records each batch in the state file.
+    ``collect`` checks the open batches once; finished ones (including the
+    partial output of expired or cancelled batches) are written to the
+    ``LLMCache`` and then run through ``process_paper``, which finds the
+    cached response and stores concepts as usual. Papers whose requests
+    failed stay pending and uncached, so the next ``submit`` sends them
+    again. Nothing stays running between calls. Summaries are parsed from
+    the extraction posts (summary mode ``post``), so collecting makes no
+    synchronous LLM calls.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        client: LLMBatchClient,
+        state_path: str | Path = "data/llm_batches/state.json",
+        max_requests_per_batch: int = MAX_BATCH_REQUESTS,
+        completion_window: str = "24h",
+    ) -> None:
+        if pipeline.summary_mode != "post":
+            logger.info(
+                "Batch extraction summarizes from the extraction posts; "
+                "ignoring summary mode %r",
+                pipeline.summary_mode,
+            )
+            pipeline.summary_mode = "post"
+        self.pipeline = pipeline
+        self.extractor = pipeline.llm_extractor
+        self.client = client
+        self.state = BatchStateStore(state_path)
+        self.work_dir = self.state.path.parent
+        self.max_requests_per_batch = max(max_requests_per_batch, 1)
+        self.completion_window = completion_window
+
+    def submit(self, rows: Iterable[dict]) -> int:
+        """Submit extraction requests for ``rows``; returns the number sent."""
+        jobs = self.state.load()
+        in_flight = {
+            paper_id
+            for job in jobs
+            if not job.ingested
+            for paper_id in job.requests
+        }
+        submitted = 0
+        skipped = 0
+        lines: list[bytes] = []
+        requests: Dict[str, str] = {}
+        size = 0
+        for row in rows:
+            paper_id = row["paper_id"]
+            if paper_id in in_flight or paper_id in requests:
+                continue
+            pending = self.extractor.pending_prompt(row)
+            if pending is None:
+                skipped += 1
+                continue
+            cache_key, prompt = pending
+            line = (
+                json.dumps(
+                    {
+                        "custom_id": paper_id,
+                        "method": "POST",
+                        "url": "/v1/responses",
+                        "body": self.client.request_body(SYSTEM_PROMPT, prompt),
+                    },
+                    ensure_ascii=True,
+                )
+                + "\n"
+            ).encode("ascii")
+            if lines and (
+                len(lines) >= self.max_requests_per_batch
+                or size + len(line) > MAX_BATCH_BYTES
+            ):
+                jobs.append(self._submit_file(lines, requests, jobs))
+                submitted += len(lines)
+                lines, requests, size = [], {}, 0
+            lines.append(line)
+            requests[paper_id] = cache_key
+            size += len(line)
+        if lines:
+            jobs.append(self._submit_file(lines, requests, jobs))
+            submitted += len(lines)
+        if skipped:
+            logger.info("Skipped %d papers with cached responses", skipped)
+        return submitted
+
+    def collect(self) -> dict[str, int]:
+        """Refresh open batches once and ingest any that have finished."""
+        jobs = self.state.load()
+        counts = {"ingested": 0, "failed": 0, "open": 0}
+        for job in jobs:
+            if job.ingested:
+                continue
+            if job.status not in TERMINAL_STATUSES:
+                info = self.client.retrieve_batch(job.batch_id)
+                job.status = info.get("status", job.status)
+                job.output_file_id = info.get("output_file_id")
+                job.error_file_id = info.get("error_file_id")
+                self.state.save(jobs)
+            if job.status not in TERMINAL_STATUSES:
+                counts["open"] += 1
+                continue
+            ingested, failed = self._ingest(job)
+            counts["ingested"] += ingested
+            counts["failed"] += failed
+            job.ingested = True
+            self.state.save(jobs)
+            logger.info(
+                "Batch %s %s: %d papers ingested, %d failed",
+                job.batch_id,
+                job.status,
+                ingested,
+                failed,
+            )
+        return counts
+
+    def wait(self, poll_interval: float = 60.0) -> dict[str, int]:
+        """Collect repeatedly until no batch is left open."""
+        totals = {"ingested": 0, "failed": 0, "open": 0}
+        while True:
+            counts = self.collect()
+            totals["ingested"] += counts["ingested"]
+            totals["failed"] += counts["failed"]
+            totals["open"] = counts["open"]
+            if not counts["open"]:
+                return totals
+            logger.info(
+                "%d batches still running; polling again in %.0fs",
+                counts["open"],
+                poll_interval,
+            )
+            time.sleep(poll_interval)
+
+    def _submit_file(
+        self,
+        lines: list[bytes],
+        requests: Dict[str, str],
+        jobs: List[BatchJob],
+    ) -> BatchJob:
+        stamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+        path = self.work_dir / f"batch_{stamp}_{len(jobs):04d}.jsonl"
+        with path.open("wb") as handle:
+            handle.writelines(lines)
+        file_id = self.client.upload_batch_file(path)
+        info = self.client.create_batch(file_id, self.completion_window)
+        job = BatchJob(
+            batch_id=info["id"],
+            input_file_id=file_id,
+            requests=dict(requests),
+            status=info.get("status", "validating"),
+            created_at=datetime.now(UTC).isoformat(),
+        )
+        # Recorded straight away so a crash after this point still collects it.
+        self.state.save(jobs + [job])
+        logger.info("Submitted batch %s with %d requests", job.batch_id, len(lines))
+        return job
+
+    def _ingest(self, job: BatchJob) -> tuple[int, int]:
+        answered: list[str] = []
+        failed = 0
+        if job.output_file_id:
+            for line in self.client.iter_file_lines(job.output_file_id):
+                paper_id = line.get("custom_id")
+                response = line.get("response") or {}
+                if paper_id not in job.requests:
+                    continue
+                if response.get("status_code") != 200:
+                    failed += 1
+                    logger.warning(
+                        "Batch request for %s failed: %s",
+                        paper_id,
+                        line.get("error") or response.get("status_code"),
+                    )
+                    continue
+                try:
+                    text = self.client.output_text(response.get("body") or {})
+                except RuntimeError as exc:
+                    failed += 1
+                    logger.warning("Batch response for %s unusable: %s", paper_id, exc)
+                    continue
+                self.extractor.remember(paper_id, job.requests[paper_id], text)
+                answered.append(paper_id)
+        if job.error_file_id:
+            for line in self.client.iter_file_lines(job.error_file_id):
+                failed += 1
+                logger.warning(
+                    "Batch request for %s failed: %s",
+                    line.get("custom_id"),
+                    line.get("error") or (line.get("response") or {}).get("status_code"),
+                )
+
+        ingested = 0
+        store = self.pipeline.mysql_store
+        for start in range(0, len(answered), 500):
+            for row in store.fetch_papers_by_ids(answered[start : start + 500]):
+                try:
+                    self.pipeline.process_paper(row)
+                except Exception:
+                    logger.exception("Paper %s failed after batch extraction", row["paper_id"])
+                    failed += 1
+                    continue
+                ingested += 1
+        self.pipeline.flush()
+        return ingested, failed
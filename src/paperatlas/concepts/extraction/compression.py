@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import base64
+import threading
+import zlib
+from typing import Optional
+
+from .config import get_text_compression
+
+# Compressed values are stored as text (base64) behind a marker that cannot
+# appear at the start of extracted paper text, so rows and files written
+# before compression was enabled keep reading back unchanged.
+_MARKER = "\x1f"
+ZSTD_PREFIX = f"{_MARKER}zstd:"
+ZLIB_PREFIX = f"{_MARKER}zlib:"
+# Short texts do not shrink enough to pay for the base64 overhead.
+MIN_COMPRESS_CHARS = 512
+
+_local = threading.local()
+
+
+def resolve_codec(codec: Optional[str] = None) -> str:
+    """Pick the codec to write with: zstd, zlib or none.
+
+    Defaults to ``PAPERATLAS_TEXT_COMPRESSION`` (``none`` unless set); zstd
+    falls back to zlib when the ``zstandard`` package is not installed.
+    """
+    codec = (codec or get_text_compression()).strip().lower()
+    if codec == "zstd" and _import_zstandard(required=False) is None:
+        return "zlib"
+    return codec
+
+
+def compress_text(text: Optional[str], codec: Optional[str] = None) -> Optional[str]:
+    if not text or len(text) < MIN_COMPRESS_CHARS or is_compressed(text):
+        return text
+    codec = resolve_codec(codec)
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        packed = _zstd_compressor().compress(data)
+        prefix = ZSTD_PREFIX
+    elif codec == "zlib":
+        packed = zlib.compress(data, 6)
+        prefix = ZLIB_PREFIX
+    elif codec == "none":
+        return text
+    else:
+        raise ValueError(f"Unknown text compression codec: {codec}")
+    return prefix + base64.b64encode(packed).decode("ascii")
+
+
+def decompress_text(value: Optional[str]) -> Optional[str]:
+    if not value or not value.startswith(_MARKER):
+        return value
+    if value.startswith(ZSTD_PREFIX):
+        packed = base64.b64decode(value[len(ZSTD_PREFIX) :])
+        return _zstd_decompressor().decompress(packed).decode("utf-8")
+    if value.startswith(ZLIB_PREFIX):
+        packed = base64.b64decode(value[len(ZLIB_PREFIX) :])
+        return zlib.decompress(packed).decode("utf-8")
+    return value
+
+
+def is_compressed(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith((ZSTD_PREFIX, ZLIB_PREFIX))
+
+
+def _zstd_compressor():
+    # zstandard contexts are not thread-safe, so each thread keeps its own.
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        compressor = _import_zstandard().ZstdCompressor(level=3)
+        _local.compressor = compressor
+    return compressor
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _import_zstandard().ZstdDecompressor()
+        _local.decompressor = decompressor
+    return decompressor
+
+
+def _import_zstandard(required: bool = True):
+    try:
+        import zstandard  # type: ignore
+    except Exception as exc:  # pragma: no cover - optional dependency
+        if not required:
+            return None
+        raise RuntimeError(
+            "zstandard is required to read zstd-compressed text. "
+            "Install it with `pip install zstandard`."
+        ) from exc
+    return zstandard
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Optional
+from urllib.parse import urlparse
+
+from .models import PaperMetadata, PaperRecord
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .pipeline import IngestionPipeline
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class ConcurrencyConfig:
+    fetch_workers: int = 4
+    download_workers: int = 8
+    parse_workers: int = 4
+    persist_workers: int = 2
+    queue_size: int = 32
+    per_host_limit: int = 4
+
+
+class ConcurrentIngestor:
+    """Runs ingestion as fetch -> download -> parse -> persist stages.
+
+    Stages are connected by bounded asyncio queues so a slow stage applies
+    backpressure upstream. Blocking work (HTTP, PyMuPDF, store writes) runs on
+    per-stage thread pools, which keeps the synchronous pipeline helpers as
+    the single implementation of each step.
+    """
+
+    def __init__(
+        self,
+        pipeline: "IngestionPipeline",
+        config: Optional[ConcurrencyConfig] = None,
+    ) -> None:
+        self.pipeline = pipeline
+        self.config = config or ConcurrencyConfig()
+
+    def run(
+        self,
+        items: Iterable[Any],
+        resolve: Callable[[Any], Optional[PaperMetadata]],
+    ) -> list[PaperRecord]:
+        return asyncio.run(self.run_async(items, resolve))
+
+    async def run_async(
+        self,
+        items: Iterable[Any],
+        resolve: Callable[[Any], Optional[PaperMetadata]],
+    ) -> list[PaperRecord]:
+        config = self.config
+        fetch_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        download_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        persist_queue: asyncio.Queue = asyncio.Queue(config.queue_size)
+        results: list[PaperRecord] = []
+        host_limits: dict[str, asyncio.Semaphore] = {}
+
+        executors = {
+            "fetch": ThreadPoolExecutor(config.fetch_workers, "ingest-fetch"),
+            "download": ThreadPoolExecutor(
+                config.download_workers, "ingest-download"
+            ),
+            "parse": ThreadPoolExecutor(config.parse_workers, "ingest-parse"),
+            "persist": ThreadPoolExecutor(
+                config.persist_workers, "ingest-persist"
+            ),
+        }
+        loop = asyncio.get_running_loop()
+
+        def blocking(stage: str, func: Callable, *args: Any) -> Awaitable:
+            return loop.run_in_executor(executors[stage], func, *args)
+
+        async def fetch(item: Any) -> Optional[PaperMetadata]:
+            if isinstance(item, PaperMetadata):
+                return item
+            metadata = await blocking("fetch", resolve, item)
+            if not metadata:
+                logger.warning("No metadata resolved for %s", item)
+            return metadata
+
+        async def download(metadata: PaperMetadata) -> tuple:
+            if not metadata.pdf_url:
+                return metadata, None
+            pdf_url = str(metadata.pdf_url)
+            host = urlparse(pdf_url).netloc.lower()
+            limit = host_limits.setdefault(
+                host,
+                asyncio.Semaphore(config.per_host_limit),
+            )
+            async with limit:
+                downloaded = await blocking(
+                    "download",
+                    self.pipeline._download_pdf,
+                    pdf_url,
+                )
+            return metadata, downloaded
+
+        async def parse(item: tuple) -> PaperRecord:
+            metadata, downloaded = item
+            raw_text = None
+            if downloaded is not None:
+                try:
+                    raw_text = await blocking(
+                        "parse",
+                        self.pipeline._parse_pdf,
+                        str(metadata.pdf_url),
+                        downloaded,
+                    )
+                finally:
+                    downloaded.cleanup()
+            return PaperRecord(metadata=metadata, raw_text=raw_text)
+
+        async def persist(record: PaperRecord) -> None:
+            await blocking("persist", self.pipeline._persist, record)
+            results.append(record)
+
+        stages = [
+            asyncio.create_task(
+                _run_stage(
+                    "fetch",
+                    fetch,
+                    fetch_queue,
+                    download_queue,
+                    config.fetch_workers,
+                    config.download_workers,
+                )
+            ),
+            asyncio.create_task(
+                _run_stage(
+                    "download",
+                    download,
+                    download_queue,
+                    parse_queue,
+                    config.download_workers,
+                    config.parse_workers,
+                )
+            ),
+            asyncio.create_task(
+                _run_stage(
+                    "parse",
+                    parse,
+                    parse_queue,
+                    persist_queue,
+                    config.parse_workers,
+                    config.persist_workers,
+                )
+            ),
+            asyncio.create_task(
+                _run_stage(
+                    "persist",
+                    persist,
+                    persist_queue,
+                    None,
+                    config.persist_workers,
+                    0,
+                )
+            ),
+        ]
+        try:
+            await _produce(
+                items,
+                fetch_queue,
+                config.fetch_workers,
+                executors["fetch"],
+            )
+            await asyncio.gather(*stages)
+        finally:
+            for task in stages:
+                task.cancel()
+            try:
+                await blocking("persist", self.pipeline.flush)
+            finally:
+                for executor in executors.values():
+                    executor.shutdown(wait=False)
+        return results
+
+
+async def _produce(
+    items: Iterable[Any],
+    queue: asyncio.Queue,
+    consumers: int,
+    executor: ThreadPoolExecutor,
+) -> None:
+    # The source may itself block (e.g. a paginated search generator), so it
+    # is advanced on the fetch pool rather than on the event loop.
+    loop = asyncio.get_running_loop()
+    iterator = iter(items)
+    while True:
+        item = await loop.run_in_executor(executor, next, iterator, _DONE)
+        if item is _DONE:
+            break
+        await queue.put(item)
+    for _ in range(consumers):
+        await queue.put(_DONE)
+
+
+async def _run_stage(
+    name: str,
+    handler: Callable[[Any], Awaitable[Any]],
+    inbox: asyncio.Queue,
+    outbox: Optional[asyncio.Queue],
+    workers: int,
+    downstream_workers: int,
+) -> None:
+    async def worker() -> None:
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            try:
+                result = await handler(item)
+            except Exception as exc:
+                logger.warning("Ingest stage %s failed: %s", name, exc)
+                continue
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
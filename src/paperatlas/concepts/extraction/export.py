@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .storage import PAPER_METADATA_FIELDS, create_paper_store
+
+logger = logging.getLogger(__name__)
+
+TEXT_MODES = ("none", "separate", "inline")
+PARTITION_FIELDS = ("publication_year", "source")
+
+
+def export_parquet(
+    store,
+    out_dir: str | Path,
+    text: str = "separate",
+    include_concepts: bool = True,
+    batch_size: int = 5000,
+) -> dict[str, int]:
+    """Stream stored papers and concepts into hive-partitioned Parquet datasets.
+
+    Writes ``papers/``, ``paper_texts/`` (when ``text="separate"``) and
+    ``paper_concepts/`` under ``out_dir``, each partitioned by
+    ``publication_year`` and ``source``. Keeping full texts in their own
+    dataset lets metadata-only readers skip them entirely. Returns the row
+    count written per dataset.
+    """
+    if text not in TEXT_MODES:
+        raise ValueError(f"Unknown text mode: {text}")
+    pa, ds = _import_pyarrow()
+    out_dir = Path(out_dir)
+    counts: dict[str, int] = {}
+    # paper_id -> partition values, so concepts land next to their papers.
+    partitions: dict[str, tuple[Optional[int], Optional[str]]] = {}
+
+    fields = PAPER_METADATA_FIELDS + (("raw_text",) if text == "inline" else ())
+
+    def paper_rows() -> Iterator[dict]:
+        for row in store.iter_papers(
+            require_raw_text=False,
+            batch_size=batch_size,
+            fields=fields,
+        ):
+            partitions[row["paper_id"]] = (row.get("publication_year"), row.get("source"))
+            yield _paper_record(row, inline_text=text == "inline")
+
+    counts["papers"] = _write_dataset(
+        pa,
+        ds,
+        paper_rows(),
+        _paper_schema(pa, inline_text=text == "inline"),
+        out_dir / "papers",
+        batch_size,
+    )
+
+    if text == "separate":
+        text_rows = (
+            {
+                "paper_id": row["paper_id"],
+                "raw_text": row["raw_text"],
+                "publication_year": row.get("publication_year"),
+                "source": row.get("source"),
+            }
+            for row in store.iter_papers(
+                require_raw_text=True,
+                batch_size=batch_size,
+                fields=("raw_text",) + PARTITION_FIELDS,
+            )
+        )
+        counts["paper_texts"] = _write_dataset(
+            pa,
+            ds,
+            text_rows,
+            _text_schema(pa),
+            out_dir / "paper_texts",
+            batch_size,
+        )
+
+    if include_concepts:
+        concept_rows = (
+            _concept_record(row, partitions.get(row["paper_id"], (None, None)))
+            for row in store.iter_concepts(batch_size=batch_size)
+        )
+        counts["paper_concepts"] = _write_dataset(
+            pa,
+            ds,
+            concept_rows,
+            _concept_schema(pa),
+            out_dir / "paper_concepts",
+            batch_size,
+        )
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export stored papers and concepts to partitioned Parquet."
+    )
+    parser.add_argument("--out", default="data/exports", help="Output directory")
+    parser.add_argument(
+        "--text",
+        choices=TEXT_MODES,
+        default="separate",
+        help="Full texts: skip, write a separate paper_texts dataset, or inline",
+    )
+    parser.add_argument("--no-concepts", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--store-backend",
+        choices=["mysql", "sqlite"],
+        help="Paper store backend (default: PAPERATLAS_STORE_BACKEND or mysql)",
+    )
+    parser.add_argument("--sqlite-path", help="SQLite database file")
+    parser.add_argument("--mysql-host", help="MySQL host override")
+    parser.add_argument("--mysql-port", type=int, help="MySQL port override")
+    parser.add_argument("--mysql-user", help="MySQL user override")
+    parser.add_argument("--mysql-password", help="MySQL password override")
+    parser.add_argument("--mysql-database", help="MySQL database override")
+    args = parser.parse_args()
+
+    mysql_config = {
+        "host": args.mysql_host,
+        "port": args.mysql_port,
+        "user": args.mysql_user,
+        "password": args.mysql_password,
+        "database": args.mysql_database,
+    }
+    mysql_config = {
+        key: value for key, value in mysql_config.items() if value is not None
+    }
+    store = create_paper_store(
+        args.store_backend,
+        mysql_config=mysql_config or None,
+        pool_size=0,
+        sqlite_path=args.sqlite_path,
+    )
+    counts = export_parquet(
+        store,
+        args.out,
+        text=args.text,
+        include_concepts=not args.no_concepts,
+        batch_size=args.batch_size,
+    )
+    for dataset, count in counts.items():
+        logger.info("Exported %d rows to %s", count, Path(args.out) / dataset)
+
+
+def _write_dataset(pa, ds, rows: Iterable[dict], schema, path: Path, batch_size: int) -> int:
+    written = 0
+
+    def batches():
+        nonlocal written
+        iterator = iter(rows)
+        while True:
+            chunk = list(islice(iterator, batch_size))
+            if not chunk:
+                return
+            written += len(chunk)
+            yield pa.RecordBatch.from_pylist(chunk, schema=schema)
+
+    ds.write_dataset(
+        batches(),
+        path,
+        schema=schema,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([schema.field(name) for name in PARTITION_FIELDS]),
+            flavor="hive",
+        ),
+        existing_data_behavior="delete_matching",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        max_rows_per_group=max(batch_size, 1024),
+    )
+    return written
+
+
+def _paper_record(row: dict, inline_text: bool) -> dict:
+    record = {field: row.get(field) for field in PAPER_METADATA_FIELDS}
+    record["authors"] = [
+        {
+            "name": author.get("name"),
+            "affiliation": author.get("affiliation"),
+            "orcid": author.get("orcid"),
+        }
+        for author in row.get("authors") or []
+        if isinstance(author, dict)
+    ]
+    if inline_text:
+        record["raw_text"] = row.get("raw_text")
+    return record
+
+
+def _concept_record(row: dict, partition: tuple[Optional[int], Optional[str]]) -> dict:
+    created_at = row.get("created_at")
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return {
+        "paper_id": row["paper_id"],
+        "concept_id": row["concept_id"],
+        "concept_name": row.get("concept_name"),
+        "summary": row.get("summary"),
+        # "source" is the partition column (the paper's source), so the
+        # concept's extractor is exported under its own name.
+        "extraction_source": row.get("source"),
+        "created_at": created_at,
+        "publication_year": partition[0],
+        "source": partition[1],
+    }
+
+
+def _paper_schema(pa, inline_text: bool):
+    author = pa.struct(
+        [
+            ("name", pa.string()),
+            ("affiliation", pa.string()),
+            ("orcid", pa.string()),
+        ]
+    )
+    fields = [
+        ("paper_id", pa.string()),
+        ("title", pa.string()),
+        ("abstract", pa.string()),
+        ("venue", pa.string()),
+        ("doi", pa.string()),
+        ("arxiv_id", pa.string()),
+        ("openalex_id", pa.string()),
+        ("crossref_id", pa.string()),
+        ("url", pa.string()),
+        ("pdf_url", pa.string()),
+        ("authors", pa.list_(author)),
+    ]
+    if inline_text:
+        fields.append(("raw_text", pa.large_string()))
+    fields.extend([("publication_year", pa.int32()), ("source", pa.string())])
+    return pa.schema(fields)
+
+
+def _text_schema(pa):
+    return pa.schema(
+        [
+            ("paper_id", pa.string()),
+            ("raw_text", pa.large_string()),
+            ("publication_year", pa.int32()),
+            ("source", pa.string()),
+        ]
+    )
+
+
+def _concept_schema(pa):
+    return pa.schema(
+        [
+            ("paper_id", pa.string()),
+            ("concept_id", pa.string()),
+            ("concept_name", pa.string()),
+            ("summary", pa.large_string()),
+            ("extraction_source", pa.string()),
+            ("created_at", pa.timestamp("s")),
+            ("publication_year", pa.int32()),
+            ("source", pa.string()),
+        ]
+    )
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow  # type: ignore
+        import pyarrow.dataset  # type: ignore
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(
+            "pyarrow is required for Parquet export. "
+            "Install it with `pip install pyarrow`."
+        ) from exc
+    return pyarrow, pyarrow.dataset
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
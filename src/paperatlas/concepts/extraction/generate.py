@@ -4,15 +4,29 @@ import argparse
 import csv
 import json
 import logging
+from contextlib import closing, nullcontext
 from datetime import UTC, datetime
 from pathlib import Path
+from paperatlas.concepts.extraction.batch_extract import (
+    BatchExtractionRunner,
+    LLMBatchClient,
+)
+from paperatlas.concepts.extraction.config import get_llm_cache_backend
+from paperatlas.concepts.extraction.leasing import LeaseHeartbeat, default_worker_id
+from paperatlas.concepts.extraction.llm_cache import (
+    CACHE_BACKENDS,
+    DEFAULT_CACHE_COMPRESSION,
+    create_llm_cache,
+)
 from paperatlas.concepts.extraction.llm_extractor import (
-    LLMCache,
     LLMConceptExtractor,
     build_default_llm_client,
 )
 
-from paperatlas.concepts.extraction.pipeline import ConceptExtractionPipeline
+from paperatlas.concepts.extraction.pipeline import (
+    SUMMARY_MODES,
+    ConceptExtractionPipeline,
+)
 from paperatlas.concepts.summarization.concept_summarizer import ConceptSummarizer
 
 logger = logging.getLogger(__name__)
@@ -31,17 +45,118 @@ def _save_checkpoint(path: Path, payload: dict) -> None:
         json.dump(payload, handle, ensure_ascii=True, indent=2)
 
 
+def _write_records(
+    paper_id: str,
+    records: list,
+    args: argparse.Namespace,
+    json_handle,
+    writer: csv.DictWriter,
+) -> None:
+    logger.info("Paper %s: extracted %d concepts", paper_id, len(records))
+    if len(records) < args.min_concepts or len(records) > args.max_concepts:
+        logger.warning(
+            "Paper %s yielded %d concepts (expected %d-%d).",
+            paper_id,
+            len(records),
+            args.min_concepts,
+            args.max_concepts,
+        )
+    for record in records:
+        payload = {
+            "paper_id": record.paper_id,
+            "concept_id": record.concept_id,
+            "concept_name": record.name,
+            "summary": record.summary,
+            "bullets": record.bullets,
+            "source": record.source,
+        }
+        json_handle.write(json.dumps(payload, ensure_ascii=True) + "\n")
+        writer.writerow(
+            {
+                **payload,
+                "bullets": " | ".join(record.bullets),
+            }
+        )
+
+
+def _iter_unprocessed(store, limit: int, batch_size: int, after_paper_id=None):
+    remaining = limit
+    while remaining > 0:
+        rows = store.fetch_unprocessed_papers(
+            limit=min(batch_size, remaining),
+            after_paper_id=after_paper_id,
+        )
+        if not rows:
+            return
+        yield from rows
+        remaining -= len(rows)
+        after_paper_id = rows[-1]["paper_id"]
+
+
+def _run_batch_api(args: argparse.Namespace, pipeline, llm_client) -> None:
+    if llm_client is None:
+        raise SystemExit("--batch-api needs an LLM API key.")
+    with LLMBatchClient(llm_client.config) as batch_client:
+        runner = BatchExtractionRunner(
+            pipeline,
+            batch_client,
+            state_path=args.batch_state,
+        )
+        if args.batch_api in {"submit", "run"}:
+            submitted = runner.submit(
+                _iter_unprocessed(
+                    pipeline.mysql_store,
+                    args.limit,
+                    args.batch_size,
+                    args.after_paper_id,
+                )
+            )
+            logger.info("Submitted %d extraction requests.", submitted)
+        if args.batch_api == "collect":
+            counts = runner.collect()
+        elif args.batch_api == "run":
+            counts = runner.wait(poll_interval=args.batch_poll_interval)
+        else:
+            return
+    logger.info(
+        "Batch extraction: %d papers ingested, %d failed, %d batches still open.",
+        counts["ingested"],
+        counts["failed"],
+        counts["open"],
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Run Phase 2 concept extraction."
     )
     parser.add_argument("--limit", type=int, default=500)
     parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument(
+        "--after-paper-id",
+        help="Start after this paper_id (keyset position)",
+    )
     parser.add_argument("--batch-size", type=int, default=50)
     parser.add_argument("--min-concepts", type=int, default=5)
     parser.add_argument("--max-concepts", type=int, default=15)
     parser.add_argument("--dedup-threshold", type=float, default=0.85)
     parser.add_argument("--cache-dir", default="data/llm_cache")
+    parser.add_argument(
+        "--cache-backend",
+        choices=CACHE_BACKENDS,
+        help="LLM response cache (default: PAPERATLAS_LLM_CACHE_BACKEND or dir)",
+    )
+    parser.add_argument(
+        "--cache-db",
+        default="data/llm_cache.db",
+        help="SQLite file for --cache-backend sqlite",
+    )
+    parser.add_argument(
+        "--cache-compression",
+        choices=["zstd", "zlib", "none"],
+        default=DEFAULT_CACHE_COMPRESSION,
+        help="Codec for responses in the SQLite cache (zstd falls back to zlib)",
+    )
     parser.add_argument("--log-dir", default="data/concepts/phase2")
     parser.add_argument(
         "--paper-id",
@@ -56,21 +171,112 @@ def main() -> None:
         "--skip-processed",
         action="store_true",
         default=True,
-        help="Skip papers that already have concepts in paper_concepts table (default: True)",
+        help="Only process papers still pending in paper_processing (default: True)",
     )
     parser.add_argument(
         "--reprocess-all",
         action="store_true",
         help="Reprocess all papers, even those already processed (overrides --skip-processed)",
     )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Stop retrying a paper after this many failed attempts",
+    )
+    parser.add_argument(
+        "--requeue-prompt-changes",
+        action="store_true",
+        help="Queue finished papers again if they ran under an older prompt",
+    )
+    parser.add_argument(
+        "--worker-id",
+        help=(
+            "Claim work through leases so several workers can share the queue "
+            "('auto' uses hostname-pid)"
+        ),
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=int,
+        default=600,
+        help="Lease length for --worker-id; renewed while the worker is alive",
+    )
+    parser.add_argument(
+        "--graph-spill-file",
+        help=(
+            "Spill queued Neo4j concept writes here so a crash replays them "
+            "on the next run (use one file per worker)"
+        ),
+    )
+    parser.add_argument(
+        "--summary-mode",
+        choices=SUMMARY_MODES,
+        default="per-concept",
+        help=(
+            "Concept summaries: one LLM call per concept, parsed from the "
+            "extraction post (no extra calls), or one call per paper; "
+            "--batch-api always uses post"
+        ),
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=1,
+        help="Papers to extract at once (20-50 suits most API tiers)",
+    )
+    parser.add_argument(
+        "--llm-rpm",
+        type=float,
+        help="LLM requests-per-minute budget (default: PAPERATLAS_LLM_RPM)",
+    )
+    parser.add_argument(
+        "--llm-tpm",
+        type=float,
+        help="LLM tokens-per-minute budget (default: PAPERATLAS_LLM_TPM)",
+    )
+    parser.add_argument(
+        "--batch-api",
+        choices=["submit", "collect", "run"],
+        help=(
+            "Extract through the provider Batch API: submit prompts for up to "
+            "--limit unprocessed papers and exit, collect finished batches "
+            "once, or run both and poll until everything is ingested"
+        ),
+    )
+    parser.add_argument(
+        "--batch-state",
+        default="data/llm_batches/state.json",
+        help="Where submitted batch jobs are tracked between runs",
+    )
+    parser.add_argument(
+        "--batch-poll-interval",
+        type=float,
+        default=300.0,
+        help="Seconds between status checks for --batch-api run",
+    )
     parser.add_argument("--offline", action="store_true")
     parser.add_argument("--no-llm", action="store_true")
     parser.add_argument("--no-neo4j", action="store_true")
+    parser.add_argument(
+        "--store-backend",
+        choices=["mysql", "sqlite"],
+        help="Paper store backend (default: PAPERATLAS_STORE_BACKEND or mysql)",
+    )
+    parser.add_argument(
+        "--sqlite-path",
+        help="SQLite database file for --store-backend sqlite",
+    )
     parser.add_argument("--mysql-host", help="MySQL host override")
     parser.add_argument("--mysql-port", type=int, help="MySQL port override")
     parser.add_argument("--mysql-user", help="MySQL user override")
     parser.add_argument("--mysql-password", help="MySQL password override")
     parser.add_argument("--mysql-database", help="MySQL database override")
+    parser.add_argument(
+        "--mysql-pool-size",
+        type=int,
+        help="Pooled MySQL connections (0 disables pooling)",
+    )
     args = parser.parse_args()
 
     mysql_config = {
@@ -84,22 +290,49 @@ def main() -> None:
         key: value for key, value in mysql_config.items() if value is not None
     }
 
-    llm_client = None if args.no_llm else build_default_llm_client()
+    llm_client = (
+        None
+        if args.no_llm
+        else build_default_llm_client(
+            requests_per_minute=args.llm_rpm,
+            tokens_per_minute=args.llm_tpm,
+        )
+    )
+    cache_backend = args.cache_backend or get_llm_cache_backend()
+    if cache_backend == "sqlite":
+        cache = create_llm_cache(
+            cache_backend,
+            args.cache_db,
+            compression=args.cache_compression,
+        )
+    else:
+        cache = create_llm_cache(cache_backend, args.cache_dir)
     llm_extractor = LLMConceptExtractor(
         client=llm_client,
-        cache=LLMCache(args.cache_dir),
+        cache=cache,
         offline=args.offline or args.no_llm or llm_client is None,
     )
-    summarizer = ConceptSummarizer(llm_client=llm_client)
+    summarizer = ConceptSummarizer(llm_client=llm_client, cache=llm_extractor.cache)
 
     pipeline = ConceptExtractionPipeline(
         mysql_config=mysql_config or None,
+        mysql_pool_size=args.mysql_pool_size,
+        store_backend=args.store_backend,
+        sqlite_path=args.sqlite_path,
         llm_extractor=llm_extractor,
         summarizer=summarizer,
         use_neo4j=not args.no_neo4j,
         dedup_threshold=args.dedup_threshold,
+        max_attempts=args.max_attempts,
+        spill_path=args.graph_spill_file,
+        summary_mode=args.summary_mode,
     )
 
+    if args.batch_api:
+        with closing(llm_client) if llm_client else nullcontext(), closing(pipeline):
+            _run_batch_api(args, pipeline, llm_client)
+        return
+
     log_dir = Path(args.log_dir)
     log_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
@@ -109,13 +342,18 @@ def main() -> None:
 
     total_processed = 0
     total_concepts = 0
+    total_failed = 0
     with json_path.open(
         "w", encoding="utf-8"
     ) as json_handle, csv_path.open(
         "w",
         encoding="utf-8",
         newline="",
-    ) as csv_handle:
+    ) as csv_handle, closing(llm_client) if llm_client else nullcontext(), closing(
+        pipeline
+    ):
+        # closing() drains the background Neo4j writes before the summary,
+        # then releases the LLM client's pooled connections.
         writer = csv.DictWriter(
             csv_handle,
             fieldnames=[
@@ -136,150 +374,146 @@ def main() -> None:
             records = pipeline.process_paper(row)
             total_processed = 1
             total_concepts = len(records)
-            if len(records) < args.min_concepts or len(records) > args.max_concepts:
-                logger.warning(
-                    "Paper %s yielded %d concepts (expected %d-%d).",
-                    row["paper_id"],
-                    len(records),
-                    args.min_concepts,
-                    args.max_concepts,
-                )
-            for record in records:
-                payload = {
-                    "paper_id": record.paper_id,
-                    "concept_id": record.concept_id,
-                    "concept_name": record.name,
-                    "summary": record.summary,
-                    "bullets": record.bullets,
-                    "source": record.source,
-                }
-                json_handle.write(json.dumps(payload, ensure_ascii=True) + "\n")
-                writer.writerow(
-                    {
-                        **payload,
-                        "bullets": " | ".join(record.bullets),
-                    }
-                )
+            _write_records(row["paper_id"], records, args, json_handle, writer)
+        elif args.worker_id:
+            # Leased mode: any number of workers, on any machine, can run
+            # against the same database; each claims disjoint batches from
+            # paper_processing and only stores results while its lease holds.
+            worker_id = (
+                default_worker_id() if args.worker_id == "auto" else args.worker_id
+            )
+            store = pipeline.mysql_store
+            with LeaseHeartbeat(store, worker_id, args.lease_seconds) as heartbeat:
+                while total_processed + total_failed < args.limit:
+                    rows = store.claim_papers(
+                        worker_id,
+                        limit=min(
+                            args.batch_size,
+                            args.limit - total_processed - total_failed,
+                        ),
+                        lease_seconds=args.lease_seconds,
+                        max_attempts=args.max_attempts,
+                    )
+                    if not rows:
+                        logger.info("No pending papers left to claim.")
+                        break
+                    heartbeat.hold(row["paper_id"] for row in rows)
+                    logger.info(
+                        "Worker %s claimed %d papers",
+                        worker_id,
+                        len(rows),
+                    )
+                    for row, records, error in pipeline.process_many(
+                        rows,
+                        worker_id=worker_id,
+                        max_workers=args.llm_concurrency,
+                    ):
+                        paper_id = row["paper_id"]
+                        heartbeat.done(paper_id)
+                        if error is not None:
+                            logger.error(
+                                "Paper %s failed",
+                                paper_id,
+                                exc_info=error,
+                            )
+                            total_failed += 1
+                            continue
+                        total_processed += 1
+                        total_concepts += len(records)
+                        _write_records(paper_id, records, args, json_handle, writer)
         else:
-            start_offset = args.offset
+            after_paper_id = args.after_paper_id
             if args.resume and checkpoint_path.exists():
                 checkpoint = _load_checkpoint(checkpoint_path)
-                if checkpoint:
-                    start_offset = int(
-                        checkpoint.get("next_offset", start_offset)
-                    )
+                if checkpoint and checkpoint.get("last_paper_id"):
+                    after_paper_id = checkpoint["last_paper_id"]
                     logger.info(
-                        "Resuming from checkpoint offset %d (paper_id=%s).",
-                        start_offset,
-                        checkpoint.get("last_paper_id"),
+                        "Resuming after checkpoint paper_id=%s.",
+                        after_paper_id,
                     )
 
             # Determine whether to skip already-processed papers
             skip_processed = args.skip_processed and not args.reprocess_all
 
+            if skip_processed and args.requeue_prompt_changes:
+                requeued = pipeline.mysql_store.requeue_stale(
+                    llm_extractor.prompt_version
+                )
+                logger.info(
+                    "Requeued %d papers processed with an older prompt.",
+                    requeued,
+                )
+
             if skip_processed:
                 unprocessed_count = pipeline.mysql_store.count_unprocessed_papers()
                 logger.info(
-                    "Processing only unprocessed papers (not in paper_concepts table). "
+                    "Processing only unprocessed papers (pending in paper_processing). "
                     "Found %d unprocessed papers.",
                     unprocessed_count,
                 )
             else:
                 logger.info("Processing all papers (including already-processed)")
 
-            for batch_offset in range(
-                start_offset,
-                args.offset + args.limit,
-                args.batch_size,
-            ):
-                # Use fetch_unprocessed_papers or fetch_papers based on flag
-                if skip_processed:
-                    rows = pipeline.mysql_store.fetch_unprocessed_papers(
-                        limit=min(
-                            args.batch_size,
-                            args.offset + args.limit - batch_offset,
-                        ),
-                        offset=batch_offset,
-                    )
-                else:
-                    rows = pipeline.mysql_store.fetch_papers(
-                        limit=min(
-                            args.batch_size,
-                            args.offset + args.limit - batch_offset,
-                        ),
-                        offset=batch_offset,
-                    )
+            # Pages are keyed on paper_id, so papers processed during the run
+            # (which drop out of the unprocessed set) never shift later pages.
+            # --offset only applies to the first page.
+            offset = 0 if after_paper_id else args.offset
+            while total_processed + total_failed < args.limit:
+                fetch = (
+                    pipeline.mysql_store.fetch_unprocessed_papers
+                    if skip_processed
+                    else pipeline.mysql_store.fetch_papers
+                )
+                rows = fetch(
+                    limit=min(
+                        args.batch_size,
+                        args.limit - total_processed - total_failed,
+                    ),
+                    offset=offset,
+                    after_paper_id=after_paper_id,
+                )
+                offset = 0
                 if not rows:
                     logger.info(
-                        "No more papers to process at offset %d. "
+                        "No more papers to process after %s. "
                         "Total processed: %d papers, %d concepts.",
-                        batch_offset,
+                        after_paper_id,
                         total_processed,
                         total_concepts,
                     )
                     break
                 logger.info(
-                    "Processing batch at offset %d (%d papers)",
-                    batch_offset,
+                    "Processing batch after %s (%d papers)",
+                    after_paper_id,
                     len(rows),
                 )
-                for index, row in enumerate(rows):
+                for row, records, error in pipeline.process_many(
+                    rows,
+                    max_workers=args.llm_concurrency,
+                ):
                     paper_id = row["paper_id"]
-                    logger.info(
-                        "Processing paper %d/%d: %s",
-                        total_processed + 1,
-                        args.offset + args.limit,
-                        paper_id,
-                    )
-                    records = pipeline.process_paper(row)
+                    if error is not None:
+                        # The failure is recorded in paper_processing and
+                        # the paper is retried by a later run.
+                        logger.error("Paper %s failed", paper_id, exc_info=error)
+                        total_failed += 1
+                        continue
                     total_processed += 1
                     total_concepts += len(records)
-                    logger.info(
-                        "Paper %s: extracted %d concepts",
-                        paper_id,
-                        len(records),
-                    )
-                    if (
-                        len(records) < args.min_concepts
-                        or len(records) > args.max_concepts
-                    ):
-                        logger.warning(
-                            "Paper %s yielded %d concepts (expected %d-%d).",
-                            paper_id,
-                            len(records),
-                            args.min_concepts,
-                            args.max_concepts,
-                        )
-                    for record in records:
-                        payload = {
-                            "paper_id": record.paper_id,
-                            "concept_id": record.concept_id,
-                            "concept_name": record.name,
-                            "summary": record.summary,
-                            "bullets": record.bullets,
-                            "source": record.source,
-                        }
-                        json_handle.write(
-                            json.dumps(payload, ensure_ascii=True) + "\n"
-                        )
-                        writer.writerow(
-                            {
-                                **payload,
-                                "bullets": " | ".join(record.bullets),
-                            }
-                        )
-                    next_offset = batch_offset + index + 1
-                    _save_checkpoint(
-                        checkpoint_path,
-                        {
-                            "next_offset": next_offset,
-                            "last_paper_id": row["paper_id"],
-                        },
-                    )
+                    _write_records(paper_id, records, args, json_handle, writer)
+                # Papers finish out of order, so the checkpoint only moves
+                # once the whole page is done.
+                after_paper_id = rows[-1]["paper_id"]
+                _save_checkpoint(
+                    checkpoint_path,
+                    {"last_paper_id": after_paper_id},
+                )
 
+    logger.info("LLM cache: %s", llm_extractor.cache.stats.snapshot())
     logger.info(
-        "Processed %d papers, extracted %d concepts. Logs: %s",
+        "Processed %d papers (%d failed), extracted %d concepts. Logs: %s",
         total_processed,
+        total_failed,
         total_concepts,
         json_path,
     )
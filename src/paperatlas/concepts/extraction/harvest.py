@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+@dataclass
+class HarvestWatermark:
+    query: str
+    last_published: Optional[str] = None
+    last_ids: List[str] = field(default_factory=list)
+    updated_at: Optional[str] = None
+
+    def published_at(self) -> Optional[datetime]:
+        if not self.last_published:
+            return None
+        return datetime.fromisoformat(self.last_published)
+
+
+class HarvestStateStore:
+    """Per-query harvest watermarks persisted as one JSON document."""
+
+    def __init__(self, path: str | Path = "data/harvest/watermarks.json") -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[HarvestWatermark]:
+        payload = self._load().get(_query_key(query))
+        return HarvestWatermark(**payload) if payload else None
+
+    def set(self, watermark: HarvestWatermark) -> None:
+        watermark.updated_at = datetime.now(UTC).isoformat()
+        with self._lock:
+            payload = self._load()
+            payload[_query_key(watermark.query)] = asdict(watermark)
+            tmp_path = self.path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                json.dump(payload, handle, ensure_ascii=True, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+
+def _query_key(query: str) -> str:
+    return " ".join(query.lower().split())
@@ -3,10 +3,18 @@ from __future__ import annotations
 import argparse
 import logging
 from datetime import date, timedelta
+from pathlib import Path
 from typing import List
 
+from paperatlas.concepts.extraction.concurrent_ingest import ConcurrencyConfig
+from paperatlas.concepts.extraction.harvest import HarvestStateStore
 from paperatlas.concepts.extraction.models import PaperIdentifier
+from paperatlas.concepts.extraction.pdf_cache import PdfCache
+from paperatlas.concepts.extraction.pdf_parser import PdfParser
 from paperatlas.concepts.extraction.pipeline import IngestionPipeline
+from paperatlas.concepts.extraction.segment_store import SegmentedPaperStore
+from paperatlas.concepts.extraction.sources import parse_day
+from paperatlas.concepts.extraction.storage import JsonPaperStore
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +35,10 @@ def main() -> None:
         default=[],
         help="arXiv ID to ingest",
     )
+    parser.add_argument(
+        "--arxiv-file",
+        help="File with one arXiv ID per line to ingest",
+    )
     parser.add_argument(
         "--url",
         action="append",
@@ -36,21 +48,129 @@ def main() -> None:
     # OpenAlex ingestion removed; keep CLI focused on arXiv/DOI inputs only.
     parser.add_argument("--query", help="Search query to ingest")
     parser.add_argument("--max-results", type=int, default=5)
-    parser.add_argument("--from-date", help="Filter results from YYYY-MM-DD")
+    parser.add_argument(
+        "--from-date",
+        type=_date_bound(end=False),
+        help="Filter results from YYYY-MM-DD (or the start of YYYY / YYYY-MM)",
+    )
+    parser.add_argument(
+        "--to-date",
+        type=_date_bound(end=True),
+        help="Filter results up to YYYY-MM-DD (or the end of YYYY / YYYY-MM)",
+    )
     parser.add_argument(
         "--last-days",
         type=int,
         help="Filter results from the last N days",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With --query, only ingest papers newer than the stored watermark",
+    )
+    parser.add_argument(
+        "--watermark-file",
+        default="data/harvest/watermarks.json",
+        help="Where per-query harvest watermarks are kept",
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="Bulk-load an arXiv metadata snapshot (JSON lines, optionally .gz)",
+    )
+    parser.add_argument(
+        "--category",
+        action="append",
+        default=[],
+        help="Snapshot category or archive filter (e.g. cs.LG or cs)",
+    )
+    parser.add_argument("--snapshot-batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--persist-batch-size",
+        type=int,
+        default=100,
+        help="Buffer this many papers before writing them in one bulk upsert",
+    )
+    parser.add_argument(
+        "--persist-delay",
+        type=float,
+        default=2.0,
+        help="Write a partial batch once its oldest paper has waited this long (seconds)",
+    )
+    parser.add_argument(
+        "--spill-file",
+        default="data/ingest_spill.jsonl",
+        help=(
+            "Crash-safe log of queued writes, replayed on the next run; one "
+            "run at a time per file, so give overlapping runs their own "
+            "('' disables)"
+        ),
+    )
+    parser.add_argument("--limit", type=int, help="Stop after N snapshot/backfill records")
+    parser.add_argument(
+        "--with-pdfs",
+        action="store_true",
+        help="Download and parse PDFs while loading the snapshot",
+    )
+    parser.add_argument(
+        "--backfill-pdfs",
+        action="store_true",
+        help="Fetch PDFs for stored papers that have no text yet",
+    )
+    parser.add_argument(
+        "--rebuild-graph",
+        action="store_true",
+        help="Re-sync Neo4j paper nodes from stored metadata (no full texts)",
+    )
+    parser.add_argument(
+        "--paper-store",
+        choices=["json", "segments"],
+        default="json",
+        help="Local paper copies: one JSON file per paper, or append-only "
+        "segments (single writer; default: json)",
+    )
+    parser.add_argument(
+        "--paper-dir",
+        default="data/papers",
+        help="Directory of one-file-per-paper JSON copies; with --paper-store "
+        "segments, papers found here still count as stored until imported",
+    )
+    parser.add_argument(
+        "--segment-dir",
+        default="data/paper_segments",
+        help="Directory for --paper-store segments",
+    )
+    parser.add_argument(
+        "--import-json-dir",
+        help="Copy a legacy one-file-per-paper directory into the segmented store",
+    )
+    parser.add_argument(
+        "--compact-segments",
+        action="store_true",
+        help="Rewrite the segmented store without superseded paper versions",
+    )
+    parser.add_argument(
+        "--store-backend",
+        choices=["mysql", "sqlite"],
+        help="Paper store backend (default: PAPERATLAS_STORE_BACKEND or mysql)",
+    )
+    parser.add_argument(
+        "--sqlite-path",
+        help="SQLite database file for --store-backend sqlite",
+    )
     parser.add_argument("--mysql-host", help="MySQL host override")
     parser.add_argument("--mysql-port", type=int, help="MySQL port override")
     parser.add_argument("--mysql-user", help="MySQL user override")
     parser.add_argument("--mysql-password", help="MySQL password override")
     parser.add_argument("--mysql-database", help="MySQL database override")
+    parser.add_argument(
+        "--mysql-pool-size",
+        type=int,
+        help="Pooled MySQL connections (0 disables pooling)",
+    )
     parser.add_argument(
         "--no-mysql",
         action="store_true",
-        help="Disable MySQL storage",
+        help="Disable the paper store (MySQL or SQLite)",
     )
     parser.add_argument(
         "--neo4j-bolt-url",
@@ -61,6 +181,71 @@ def main() -> None:
         action="store_true",
         help="Disable Neo4j storage",
     )
+    parser.add_argument(
+        "--pdf-cache-dir",
+        default="data/pdf_cache",
+        help="Directory for the local PDF blob cache",
+    )
+    parser.add_argument(
+        "--pdf-cache-max-mb",
+        type=int,
+        default=2048,
+        help="Evict least recently used PDFs beyond this size",
+    )
+    parser.add_argument(
+        "--pdf-cache-max-age-days",
+        type=float,
+        default=7.0,
+        help="Serve cached PDFs without revalidation for this long",
+    )
+    parser.add_argument(
+        "--no-pdf-cache",
+        action="store_true",
+        help="Always download PDFs instead of using the local cache",
+    )
+    parser.add_argument(
+        "--max-pdf-mb",
+        type=int,
+        default=100,
+        help="Abort PDF downloads larger than this many megabytes",
+    )
+    parser.add_argument(
+        "--parse-processes",
+        type=int,
+        default=0,
+        help="Parse PDFs in a pool of this many processes (0 = in-thread)",
+    )
+    parser.add_argument(
+        "--max-pdf-pages",
+        type=int,
+        help="Only extract text from the first N pages of each PDF",
+    )
+    parser.add_argument(
+        "--parse-timeout",
+        type=float,
+        help="Give up on a single PDF after this many seconds",
+    )
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help="Run fetch/download/parse/persist as concurrent stages",
+    )
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--download-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=4)
+    parser.add_argument("--persist-workers", type=int, default=2)
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=32,
+        help="Bound on items buffered between stages",
+    )
+    parser.add_argument(
+        "--per-host-limit",
+        type=int,
+        default=4,
+        help="Maximum concurrent PDF downloads per host",
+    )
     args = parser.parse_args()
 
     mysql_config = {
@@ -76,39 +261,183 @@ def main() -> None:
         if value is not None
     }
 
+    pdf_cache = None
+    if not args.no_pdf_cache:
+        pdf_cache = PdfCache(
+            args.pdf_cache_dir,
+            max_bytes=args.pdf_cache_max_mb * 1024 * 1024,
+            max_age_seconds=args.pdf_cache_max_age_days * 24 * 3600,
+        )
+
+    pdf_parser = PdfParser(
+        workers=args.parse_processes,
+        max_pages=args.max_pdf_pages,
+        timeout_seconds=args.parse_timeout,
+    )
+
+    if args.import_json_dir or args.compact_segments:
+        args.paper_store = "segments"
+    if args.paper_store == "segments":
+        # Papers not yet imported from the JSON directory still count as stored.
+        json_store = SegmentedPaperStore(args.segment_dir, legacy_dir=args.paper_dir)
+    else:
+        json_store = JsonPaperStore(args.paper_dir)
+
     pipeline = IngestionPipeline(
+        parser=pdf_parser,
+        json_store=json_store,
         mysql_config=mysql_config or None,
+        mysql_pool_size=args.mysql_pool_size,
         use_mysql=not args.no_mysql,
+        store_backend=args.store_backend,
+        sqlite_path=args.sqlite_path,
         neo4j_bolt_url=args.neo4j_bolt_url,
         use_neo4j=not args.no_neo4j,
+        pdf_cache=pdf_cache,
+        use_pdf_cache=not args.no_pdf_cache,
+        max_pdf_bytes=args.max_pdf_mb * 1024 * 1024,
+        persist_batch_size=args.persist_batch_size,
+        persist_delay_seconds=args.persist_delay,
+        spill_path=args.spill_file or None,
     )
+    try:
+        _run(args, pipeline)
+    finally:
+        pipeline.close()
+        if isinstance(json_store, SegmentedPaperStore):
+            json_store.close()
+        pdf_parser.close()
+        if pdf_cache:
+            pdf_cache.flush()
+            logger.info("PDF cache stats: %s", pdf_cache.stats())
+
+
+def _date_bound(end: bool):
+    def parse(value: str) -> str:
+        try:
+            day = parse_day(value, end=end)
+        except ValueError as exc:
+            raise argparse.ArgumentTypeError(str(exc)) from None
+        return day.isoformat() if day else value
+
+    return parse
+
+
+def _run(args: argparse.Namespace, pipeline: IngestionPipeline) -> None:
+    concurrency = None
+    if args.concurrent:
+        concurrency = ConcurrencyConfig(
+            fetch_workers=args.fetch_workers,
+            download_workers=args.download_workers,
+            parse_workers=args.parse_workers,
+            persist_workers=args.persist_workers,
+            queue_size=args.queue_size,
+            per_host_limit=args.per_host_limit,
+        )
+
+    if args.snapshot:
+        total = pipeline.ingest_snapshot(
+            args.snapshot,
+            categories=args.category,
+            from_date=args.from_date,
+            to_date=args.to_date,
+            batch_size=args.snapshot_batch_size,
+            limit=args.limit,
+            fetch_pdfs=args.with_pdfs,
+        )
+        logger.info("Ingested %d records from snapshot", total)
+        return
+
+    if args.backfill_pdfs:
+        total = pipeline.backfill_pdfs(limit=args.limit)
+        logger.info("Backfilled PDFs for %d stored papers", total)
+        return
+
+    if args.rebuild_graph:
+        total = pipeline.rebuild_paper_graph()
+        logger.info("Re-synced %d paper nodes", total)
+        return
+
+    if args.import_json_dir or args.compact_segments:
+        if args.import_json_dir:
+            total = pipeline.json_store.import_json_dir(args.import_json_dir)
+            logger.info("Imported %d papers from %s", total, args.import_json_dir)
+        if args.compact_segments:
+            reclaimed = pipeline.json_store.compact()
+            logger.info("Compaction reclaimed %d bytes", reclaimed)
+        return
+
     if args.query:
         from_date = args.from_date
         if args.last_days:
             from_date = (date.today() - timedelta(days=args.last_days)).isoformat()
-        records = pipeline.ingest_query(
-            args.query,
-            max_results=args.max_results,
-            from_date=from_date,
-        )
+        if args.incremental:
+            records = pipeline.harvest_query(
+                args.query,
+                HarvestStateStore(args.watermark_file),
+                max_results=args.max_results,
+                from_date=from_date,
+                to_date=args.to_date,
+                config=concurrency,
+            )
+        elif concurrency:
+            records = pipeline.ingest_query_concurrent(
+                args.query,
+                max_results=args.max_results,
+                from_date=from_date,
+                to_date=args.to_date,
+                config=concurrency,
+            )
+        else:
+            records = pipeline.ingest_query(
+                args.query,
+                max_results=args.max_results,
+                from_date=from_date,
+                to_date=args.to_date,
+            )
         logger.info("Ingested %d records from query", len(records))
         return
 
     records = []
     if args.url:
-        records.extend(pipeline.ingest_urls(args.url))
+        if concurrency:
+            records.extend(
+                pipeline.ingest_urls_concurrent(args.url, config=concurrency)
+            )
+        else:
+            records.extend(pipeline.ingest_urls(args.url))
 
     identifiers: List[PaperIdentifier] = []
     identifiers.extend(PaperIdentifier(doi=doi) for doi in args.doi)
-    identifiers.extend(PaperIdentifier(arxiv_id=arxiv_id) for arxiv_id in args.arxiv)
+    arxiv_ids = list(args.arxiv)
+    if args.arxiv_file:
+        arxiv_ids.extend(_read_identifier_file(Path(args.arxiv_file)))
+    identifiers.extend(PaperIdentifier(arxiv_id=arxiv_id) for arxiv_id in arxiv_ids)
     if identifiers:
-        records.extend(pipeline.ingest_identifiers(identifiers))
+        if concurrency:
+            records.extend(
+                pipeline.ingest_identifiers_concurrent(
+                    identifiers,
+                    config=concurrency,
+                )
+            )
+        else:
+            records.extend(pipeline.ingest_identifiers(identifiers))
 
     if not records:
-        raise SystemExit("Provide --url, --doi, --arxiv, or --query.")
+        raise SystemExit("Provide --url, --doi, --arxiv, --arxiv-file, or --query.")
     logger.info("Ingested %d records from inputs", len(records))
 
 
+def _read_identifier_file(path: Path) -> List[str]:
+    with path.open("r", encoding="utf-8") as handle:
+        return [
+            line.strip()
+            for line in handle
+            if line.strip() and not line.startswith("#")
+        ]
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from typing import Iterable, Optional
+
+from .storage import MySQLPaperStore
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseHeartbeat:
+    """Keeps a worker's paper leases alive from a background thread.
+
+    Leases are renewed every third of ``lease_seconds`` so a slow paper does
+    not lose its lease, while a crashed worker's leases lapse and return to
+    the queue. Papers still held on exit are released.
+    """
+
+    def __init__(
+        self,
+        store: MySQLPaperStore,
+        worker_id: str,
+        lease_seconds: int = 600,
+        interval_seconds: Optional[float] = None,
+    ) -> None:
+        self.store = store
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval_seconds = interval_seconds or max(lease_seconds / 3, 1.0)
+        self._held: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def hold(self, paper_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._held.update(paper_ids)
+
+    def done(self, paper_id: str) -> None:
+        with self._lock:
+            self._held.discard(paper_id)
+
+    def start(self) -> "LeaseHeartbeat":
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"lease-heartbeat-{self.worker_id}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            remaining, self._held = list(self._held), set()
+        if remaining:
+            self.store.release_papers(self.worker_id, remaining)
+            logger.info("Released %d unfinished leases", len(remaining))
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                paper_ids = list(self._held)
+            if not paper_ids:
+                continue
+            try:
+                held = self.store.heartbeat(
+                    self.worker_id,
+                    paper_ids,
+                    lease_seconds=self.lease_seconds,
+                )
+            except Exception as exc:
+                logger.warning("Lease heartbeat failed: %s", exc)
+                continue
+            if held < len(paper_ids):
+                logger.warning(
+                    "Worker %s lost %d of %d leases",
+                    self.worker_id,
+                    len(paper_ids) - held,
+                    len(paper_ids),
+                )
@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .compression import compress_text, decompress_text
+from .config import get_llm_cache_backend
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ("dir", "sqlite")
+DEFAULT_CACHE_DIR = "data/llm_cache"
+DEFAULT_CACHE_DB = "data/llm_cache.db"
+# Independent of PAPERATLAS_TEXT_COMPRESSION: responses are cheap to pack and
+# this store has no uncompressed rows to stay compatible with.
+DEFAULT_CACHE_COMPRESSION = "zstd"
+
+
+class CacheStats:
+    """Hit, miss and lookup-latency counters shared by the cache backends."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.get_seconds = 0.0
+
+    def record_get(self, hit: bool, seconds: float) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.get_seconds += seconds
+
+    def record_write(self, count: int = 1) -> None:
+        with self._lock:
+            self.writes += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "avg_get_ms": self.get_seconds * 1000 / lookups if lookups else 0.0,
+            }
+
+
+class LLMCache:
+    """One JSON file per cache key under ``cache_dir`` (the default backend)."""
+
+    def __init__(self, cache_dir: str | Path = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = CacheStats()
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        started = time.perf_counter()
+        try:
+            with (self.cache_dir / f"{cache_key}.json").open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except FileNotFoundError:
+            payload = None
+        self.stats.record_get(payload is not None, time.perf_counter() - started)
+        return payload
+
+    def set(self, cache_key: str, payload: dict) -> None:
+        path = self.cache_dir / f"{cache_key}.json"
+        # Written aside and renamed so concurrent readers never see half a file.
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=True, indent=2)
+        os.replace(tmp_path, path)
+        self.stats.record_write()
+
+    def set_many(self, items: Iterable[Tuple[str, dict]]) -> int:
+        count = 0
+        for cache_key, payload in items:
+            self.set(cache_key, payload)
+            count += 1
+        return count
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        for path in sorted(self.cache_dir.glob("*.json")):
+            with path.open("r", encoding="utf-8") as handle:
+                yield path.stem, json.load(handle)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache_dir.glob("*.json"))
+
+    def evict(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> int:
+        """Drop entries older than ``max_age_seconds``, then the least
+        recently modified ones until under ``max_entries`` / ``max_bytes``."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        doomed = _select_evictions(
+            [(mtime, size) for mtime, size, _ in entries],
+            max_entries,
+            max_bytes,
+            max_age_seconds,
+        )
+        for index in doomed:
+            entries[index][2].unlink(missing_ok=True)
+        return len(doomed)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteLLMCache:
+    """LLM responses in one SQLite file, compressed with the text codecs.
+
+    Lookups are a primary-key read on a per-thread WAL connection. The last
+    access time is refreshed at most once an hour per entry, so hot reads
+    stay read-only, and it drives least-recently-used eviction. When
+    ``max_entries``, ``max_bytes`` or ``max_age_seconds`` are set, eviction
+    also runs every ``evict_every`` writes.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_DB,
+        compression: str = DEFAULT_CACHE_COMPRESSION,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        evict_every: int = 1000,
+        busy_timeout_ms: int = 30000,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evict_every = max(evict_every, 1)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._writes_since_evict = 0
+        self._lock = threading.Lock()
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)"
+        )
+
+    def get(self, cache_key: str) -> Optional[dict]:
+        started = time.perf_counter()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, accessed_at FROM llm_cache WHERE cache_key = ?",
+            (cache_key,),
+        ).fetchone()
+        payload = None
+        if row is not None:
+            payload = json.loads(decompress_text(row[0]))
+            now = time.time()
+            if now - row[1] > 3600:
+                conn.execute(
+                    "UPDATE llm_cache SET accessed_at = ? WHERE cache_key = ?",
+                    (now, cache_key),
+                )
+        self.stats.record_get(payload is not None, time.perf_counter() - started)
+        return payload
+
+    def set(self, cache_key: str, payload: dict) -> None:
+        self.set_many([(cache_key, payload)])
+
+    def set_many(self, items: Iterable[Tuple[str, dict]], batch_size: int = 500) -> int:
+        total = 0
+        batch = []
+        for cache_key, payload in items:
+            batch.append(self._row(cache_key, payload))
+            if len(batch) >= batch_size:
+                total += self._write(batch)
+                batch = []
+        if batch:
+            total += self._write(batch)
+        return total
+
+    def items(self, batch_size: int = 500) -> Iterator[Tuple[str, dict]]:
+        """Yield every entry in key order, paging on the key."""
+        after = ""
+        while True:
+            rows = self._conn().execute(
+                "SELECT cache_key, value FROM llm_cache WHERE cache_key > ? "
+                "ORDER BY cache_key LIMIT ?",
+                (after, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for cache_key, value in rows:
+                yield cache_key, json.loads(decompress_text(value))
+            after = rows[-1][0]
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        return self._conn().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+
+    def evict(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> int:
+        """Drop entries older than ``max_age_seconds``, then the least
+        recently used ones until under ``max_entries`` / ``max_bytes``."""
+        conn = self._conn()
+        deleted = 0
+        if max_age_seconds is not None:
+            deleted += conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?",
+                (time.time() - max_age_seconds,),
+            ).rowcount
+        if max_entries is not None:
+            excess = len(self) - max_entries
+            if excess > 0:
+                deleted += conn.execute(
+                    "DELETE FROM llm_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                ).rowcount
+        if max_bytes is not None:
+            excess = self.size_bytes() - max_bytes
+            if excess > 0:
+                # Walk the oldest entries until enough bytes are covered.
+                doomed = []
+                for cache_key, size in conn.execute(
+                    "SELECT cache_key, size FROM llm_cache ORDER BY accessed_at"
+                ):
+                    if excess <= 0:
+                        break
+                    doomed.append(cache_key)
+                    excess -= size
+                for start in range(0, len(doomed), 500):
+                    chunk = doomed[start : start + 500]
+                    deleted += conn.execute(
+                        "DELETE FROM llm_cache WHERE cache_key IN ("
+                        + ", ".join(["?"] * len(chunk))
+                        + ")",
+                        chunk,
+                    ).rowcount
+        return deleted
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _row(self, cache_key: str, payload: dict) -> tuple:
+        value = compress_text(
+            json.dumps(payload, ensure_ascii=True, separators=(",", ":")),
+            self.compression,
+        )
+        now = time.time()
+        return cache_key, value, len(value), now, now
+
+    def _write(self, rows: list[tuple]) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                """
+                INSERT INTO llm_cache (cache_key, value, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    value = excluded.value,
+                    size = excluded.size,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                rows,
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self.stats.record_write(len(rows))
+        with self._lock:
+            self._writes_since_evict += len(rows)
+            due = self._writes_since_evict >= self.evict_every
+            if due:
+                self._writes_since_evict = 0
+        if due and (self.max_entries or self.max_bytes or self.max_age_seconds):
+            self.evict(self.max_entries, self.max_bytes, self.max_age_seconds)
+        return len(rows)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_ms / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+        return conn
+
+
+def create_llm_cache(
+    backend: Optional[str] = None,
+    path: Optional[str | Path] = None,
+    **options,
+):
+    """Build the LLM response cache for ``backend`` (``dir`` or ``sqlite``).
+
+    The backend defaults to ``PAPERATLAS_LLM_CACHE_BACKEND`` (``dir``);
+    ``options`` are passed to ``SQLiteLLMCache``.
+    """
+    backend = (backend or get_llm_cache_backend()).strip().lower()
+    if backend == "dir":
+        return LLMCache(path or DEFAULT_CACHE_DIR)
+    if backend == "sqlite":
+        return SQLiteLLMCache(path or DEFAULT_CACHE_DB, **options)
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
+
+
+def copy_cache(source, target) -> int:
+    """Copy every entry from one cache backend into another."""
+    return target.set_many(source.items())
+
+
+def _select_evictions(
+    entries: list[tuple[float, int]],
+    max_entries: Optional[int],
+    max_bytes: Optional[int],
+    max_age_seconds: Optional[float],
+) -> list[int]:
+    """Indexes to drop from ``(last_used, size)`` entries sorted oldest first."""
+    doomed = []
+    cutoff = time.time() - max_age_seconds if max_age_seconds is not None else None
+    count = len(entries)
+    total = sum(size for _, size in entries)
+    for index, (last_used, size) in enumerate(entries):
+        too_old = cutoff is not None and last_used < cutoff
+        too_many = max_entries is not None and count > max_entries
+        too_big = max_bytes is not None and total > max_bytes
+        if not (too_old or too_many or too_big):
+            break
+        doomed.append(index)
+        count -= 1
+        total -= size
+    return doomed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Inspect, convert and evict the LLM response cache."
+    )
+    parser.add_argument("--backend", choices=CACHE_BACKENDS, help="Cache backend")
+    parser.add_argument("--path", help="Cache directory or SQLite file")
+    parser.add_argument(
+        "--import-from",
+        help="Copy entries from another cache (a directory or a .db file)",
+    )
+    parser.add_argument(
+        "--export-to",
+        help="Copy entries into another cache (a directory or a .db file)",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["zstd", "zlib", "none"],
+        help=f"Codec for SQLite values (default: {DEFAULT_CACHE_COMPRESSION})",
+    )
+    parser.add_argument("--max-entries", type=int, help="Evict down to this many entries")
+    parser.add_argument("--max-mb", type=float, help="Evict down to this many megabytes")
+    parser.add_argument("--max-age-days", type=float, help="Evict entries older than this")
+    args = parser.parse_args()
+
+    options = {"compression": args.compression} if args.compression else {}
+    cache = create_llm_cache(args.backend, args.path, **options)
+    if args.import_from:
+        copied = copy_cache(_open_by_path(args.import_from, options), cache)
+        logger.info("Imported %d entries from %s", copied, args.import_from)
+    if args.export_to:
+        copied = copy_cache(cache, _open_by_path(args.export_to, options))
+        logger.info("Exported %d entries to %s", copied, args.export_to)
+    if args.max_entries or args.max_mb or args.max_age_days:
+        evicted = cache.evict(
+            max_entries=args.max_entries,
+            max_bytes=int(args.max_mb * 1024 * 1024) if args.max_mb else None,
+            max_age_seconds=args.max_age_days * 86400 if args.max_age_days else None,
+        )
+        logger.info("Evicted %d entries", evicted)
+    logger.info("Cache holds %d entries", len(cache))
+    cache.close()
+
+
+def _open_by_path(path: str, options: dict):
+    if Path(path).suffix == ".db":
+        return SQLiteLLMCache(path, **options)
+    return LLMCache(path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import logging
 import os
+import random
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import httpx
 
 from .config import DEFAULT_LLM_API_KEY, DEFAULT_LLM_MODEL
+from .llm_cache import LLMCache, SQLiteLLMCache
+from .throttle import RateLimiter, map_unordered
 
 logger = logging.getLogger(__name__)
 
@@ -135,24 +139,150 @@ Paper Text:
 """
 
 
+# Stored with each processed paper so results from an older prompt can be
+# found and requeued.
+PROMPT_VERSION = hashlib.sha1(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
 @dataclass
 class LLMConfig:
     api_key: str
     model: str
     base_url: str = "https://api.openai.com/v1"
     timeout: float = 300.0  # 5 minutes for processing full papers
+    # Charged against the tokens-per-minute budget on top of the prompt.
+    expected_output_tokens: int = 4000
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+    max_connections: int = 64
+    http2: bool = False
+    # Send a duplicate request if the first has not answered by then; the
+    # first usable response wins. Off by default since it can double spend.
+    hedge_after_seconds: Optional[float] = None
+
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+class RateLimitError(RuntimeError):
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class LLMClient:
-    def __init__(self, config: LLMConfig) -> None:
+    """Responses API client on a pooled, keep-alive ``httpx.Client``.
+
+    Retryable statuses and transport errors are retried with exponential
+    backoff and full jitter, waiting at least ``Retry-After`` when the
+    server sends one. The client is thread-safe; call ``close`` when done.
+    """
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ) -> None:
         self._config = config
+        self.rate_limiter = rate_limiter
+        if config.http2:
+            _require_http2()
+        self._http = httpx.Client(
+            base_url=config.base_url,
+            headers={"Authorization": f"Bearer {config.api_key}"},
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+            ),
+            http2=config.http2,
+            transport=transport,
+        )
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        if config.hedge_after_seconds is not None:
+            self._hedge_pool = ThreadPoolExecutor(
+                max_workers=config.max_connections,
+                thread_name_prefix="llm-hedge",
+            )
+
+    @property
+    def config(self) -> LLMConfig:
+        return self._config
+
+    def close(self) -> None:
+        if self._hedge_pool:
+            self._hedge_pool.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
+
+    def __enter__(self) -> "LLMClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def generate(self, system_prompt: str, user_prompt: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {self._config.api_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
+        """Call the model, waiting on the rate limiter and retrying failures."""
+        payload = self.request_body(system_prompt, user_prompt)
+        estimated_tokens = (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(user_prompt)
+            + self._config.expected_output_tokens
+        )
+        max_retries = self._config.max_retries
+        for attempt in range(max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                response = self._send(payload)
+            except httpx.TransportError as exc:
+                if attempt == max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(
+                    "LLM request failed model=%s attempt=%d error=%s retry_in=%.1fs",
+                    self._config.model,
+                    attempt + 1,
+                    type(exc).__name__,
+                    delay,
+                )
+                time.sleep(delay)
+                continue
+            latency_ms = (time.monotonic() - started) * 1000
+            status = response.status_code
+            if status < 400:
+                if self.rate_limiter:
+                    self.rate_limiter.on_success()
+                return self._parse(response, latency_ms, attempt)
+
+            retry_after = _retry_after(response)
+            logger.warning(
+                "LLM request failed model=%s status=%d attempt=%d latency_ms=%.0f body=%.300s",
+                self._config.model,
+                status,
+                attempt + 1,
+                latency_ms,
+                response.text,
+            )
+            if status not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                if status == 429:
+                    raise RateLimitError(
+                        f"LLM rate limited after {attempt + 1} attempts",
+                        retry_after=retry_after,
+                    )
+                response.raise_for_status()
+            if status == 429 and self.rate_limiter:
+                # The limiter holds every caller until Retry-After passes.
+                self.rate_limiter.on_rate_limited(retry_after)
+                continue
+            time.sleep(max(retry_after or 0.0, self._backoff(attempt)))
+        raise RuntimeError("unreachable")
+
+    def request_body(self, system_prompt: str, user_prompt: str) -> dict:
+        """Responses API request body; also used for Batch API input lines."""
+        return {
             "model": self._config.model,
             "input": [
                 {
@@ -170,57 +300,72 @@ class LLMClient:
             ],
             "temperature": 0.3,
         }
-        response = httpx.post(
-            f"{self._config.base_url}/responses",
-            headers=headers,
-            json=payload,
-            timeout=self._config.timeout,
-        )
-        if response.status_code >= 400:
-            logger.error(
-                "OpenAI error %s: %s",
-                response.status_code,
-                response.text,
-            )
-            response.raise_for_status()
-        data = response.json()
-        print(f"Response: {data}")
-        output_blocks = data.get("output", [])
-        for block in output_blocks:
+
+    @staticmethod
+    def output_text(data: dict) -> str:
+        for block in data.get("output", []):
             for item in block.get("content", []):
                 if item.get("type") == "output_text":
                     return item.get("text", "")
         raise RuntimeError("No text output found in response.")
 
-
-class LLMCache:
-    def __init__(self, cache_dir: str | Path = "data/llm_cache") -> None:
-        self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-
-    def get(self, cache_key: str) -> Optional[dict]:
-        path = self.cache_dir / f"{cache_key}.json"
-        if not path.exists():
-            return None
-        with path.open("r", encoding="utf-8") as handle:
-            return json.load(handle)
-
-    def set(self, cache_key: str, payload: dict) -> None:
-        path = self.cache_dir / f"{cache_key}.json"
-        with path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=True, indent=2)
+    def _send(self, payload: dict) -> httpx.Response:
+        hedge_after = self._config.hedge_after_seconds
+        if self._hedge_pool is None or hedge_after is None:
+            return self._http.post("/responses", json=payload)
+        futures = [self._hedge_pool.submit(self._http.post, "/responses", json=payload)]
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            logger.info(
+                "LLM request slower than %.1fs; sending a hedged request",
+                hedge_after,
+            )
+            futures.append(
+                self._hedge_pool.submit(self._http.post, "/responses", json=payload)
+            )
+        first: Optional[Future] = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                first = first or future
+                if future.exception() is None and future.result().status_code < 400:
+                    return future.result()
+        # Nothing succeeded: surface the first outcome to the retry loop.
+        return first.result()
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self._config.backoff_max, self._config.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def _parse(self, response: httpx.Response, latency_ms: float, attempt: int) -> str:
+        data = response.json()
+        usage = data.get("usage") or {}
+        logger.debug(
+            "LLM response model=%s status=%d attempt=%d latency_ms=%.0f "
+            "input_tokens=%s output_tokens=%s http_version=%s",
+            self._config.model,
+            response.status_code,
+            attempt + 1,
+            latency_ms,
+            usage.get("input_tokens"),
+            usage.get("output_tokens"),
+            response.http_version,
+        )
+        return self.output_text(data)
 
 
 class LLMConceptExtractor:
     def __init__(
         self,
         client: Optional[LLMClient] = None,
-        cache: Optional[LLMCache] = None,
+        cache: Optional[LLMCache | SQLiteLLMCache] = None,
         offline: bool = False,
     ) -> None:
         self.client = client
-        self.cache = cache or LLMCache()
+        self.cache = cache if cache is not None else LLMCache()
         self.offline = offline
+        self.prompt_version = PROMPT_VERSION
 
     @staticmethod
     def make_cache_key(paper_id: str, prompt: str) -> str:
@@ -246,6 +391,22 @@ class LLMConceptExtractor:
         if not self.client:
             raise RuntimeError("LLM client not configured for extraction.")
         response_text = self.client.generate(SYSTEM_PROMPT, prompt)
+        return self.remember(paper_id, cache_key, response_text)
+
+    def pending_prompt(self, row: dict) -> Optional[Tuple[str, str]]:
+        """Return ``(cache_key, prompt)`` for a paper not yet in the cache."""
+        prompt = self._build_prompt(
+            row.get("title") or "",
+            row.get("abstract"),
+            row.get("raw_text"),
+        )
+        cache_key = self.make_cache_key(row["paper_id"], prompt)
+        if self.cache.get(cache_key):
+            return None
+        return cache_key, prompt
+
+    def remember(self, paper_id: str, cache_key: str, response_text: str) -> List[Dict]:
+        """Parse a model response and cache it under ``cache_key``."""
         concepts = self._parse_response(response_text)
         self.cache.set(
             cache_key,
@@ -261,18 +422,35 @@ class LLMConceptExtractor:
     def extract_many(
         self,
         rows: Iterable[dict],
+        max_workers: int = 1,
     ) -> dict[str, List[Dict]]:
         results: dict[str, List[Dict]] = {}
-        for row in rows:
-            paper_id = row["paper_id"]
-            concepts = self.extract(
-                paper_id=paper_id,
+        for row, concepts, error in self.iter_extract(rows, max_workers=max_workers):
+            if error is not None:
+                raise error
+            results[row["paper_id"]] = concepts
+        return results
+
+    def iter_extract(
+        self,
+        rows: Iterable[dict],
+        max_workers: int = 1,
+    ) -> Iterator[Tuple[dict, Optional[List[Dict]], Optional[BaseException]]]:
+        """Extract up to ``max_workers`` papers at once, yielding as each finishes.
+
+        Yields ``(row, concepts, error)`` in completion order; pacing against
+        the provider's limits is left to the client's rate limiter.
+        """
+        return map_unordered(
+            lambda row: self.extract(
+                paper_id=row["paper_id"],
                 title=row.get("title") or "",
                 abstract=row.get("abstract"),
                 raw_text=row.get("raw_text"),
-            )
-            results[paper_id] = concepts
-        return results
+            ),
+            rows,
+            max_workers,
+        )
 
     @staticmethod
     def _build_prompt(
@@ -318,7 +496,39 @@ class LLMConceptExtractor:
         return concepts
 
 
-def build_default_llm_client() -> Optional[LLMClient]:
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose.
+    return len(text) // 4 + 1
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _require_http2() -> None:
+    try:
+        import h2  # type: ignore  # noqa: F401
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(
+            "The h2 package is required for HTTP/2. "
+            "Install it with `pip install httpx[http2]`."
+        ) from exc
+
+
+def build_default_llm_client(
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> Optional[LLMClient]:
     api_key = (
         os.getenv("PAPERATLAS_LLM_API_KEY")
         or os.getenv("OPENAI_API_KEY")
@@ -332,11 +542,30 @@ def build_default_llm_client() -> Optional[LLMClient]:
         "https://api.openai.com/v1",
     )
     timeout = float(os.getenv("PAPERATLAS_LLM_TIMEOUT", "300"))
+    requests_per_minute = requests_per_minute or float(
+        os.getenv("PAPERATLAS_LLM_RPM", "0")
+    )
+    tokens_per_minute = tokens_per_minute or float(
+        os.getenv("PAPERATLAS_LLM_TPM", "0")
+    )
+    max_retries = int(os.getenv("PAPERATLAS_LLM_MAX_RETRIES", "5"))
+    http2 = os.getenv("PAPERATLAS_LLM_HTTP2", "").lower() in {"1", "true", "yes"}
+    hedge_after = os.getenv("PAPERATLAS_LLM_HEDGE_AFTER")
+    rate_limiter = None
+    if requests_per_minute or tokens_per_minute:
+        rate_limiter = RateLimiter(
+            requests_per_minute=requests_per_minute or None,
+            tokens_per_minute=tokens_per_minute or None,
+        )
     return LLMClient(
         LLMConfig(
             api_key=api_key,
             model=model,
             base_url=base_url,
             timeout=timeout,
-        )
+            max_retries=max_retries,
+            http2=http2,
+            hedge_after_seconds=float(hedge_after) if hedge_after else None,
+        ),
+        rate_limiter=rate_limiter,
     )
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+from datetime import datetime
 from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, HttpUrl
@@ -17,6 +18,7 @@ class PaperMetadata(BaseModel):
     abstract: Optional[str] = None
     authors: List[PaperAuthor] = Field(default_factory=list)
     publication_year: Optional[int] = None
+    published_at: Optional[datetime] = None
     venue: Optional[str] = None
     doi: Optional[str] = None
     arxiv_id: Optional[str] = None
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+_INDEX_SAVE_INTERVAL = 100
+
+
+@dataclass
+class PdfCacheEntry:
+    digest: str
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    validated_at: float = 0.0
+    accessed_at: float = 0.0
+
+
+class PdfCache:
+    """Content-addressed PDF blob cache keyed by normalized URL.
+
+    Blobs live under ``blobs/<aa>/<sha256>.pdf`` so mirrors of the same file
+    share one copy; ``index.json`` maps URLs to blobs and HTTP validators.
+    Entries younger than ``max_age_seconds`` are served without touching the
+    network, older ones are revalidated with a conditional GET.
+
+    ``path_for`` and ``store_file`` pin the blob they return until the caller
+    calls ``release``, so eviction never removes a file that is still
+    waiting to be parsed.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path = "data/pdf_cache",
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ) -> None:
+        self.base_dir = Path(base_dir)
+        self.blob_dir = self.base_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.base_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, PdfCacheEntry] = self._load_index()
+        self._pending_touches = 0
+        # digest -> number of callers holding its path
+        self._pins: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    def lookup(self, url: str) -> Optional[PdfCacheEntry]:
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not self._blob_path(entry.digest).exists():
+                del self._entries[key]
+                return None
+            return entry
+
+    def is_fresh(self, entry: PdfCacheEntry) -> bool:
+        return time.time() - entry.validated_at < self.max_age_seconds
+
+    def conditional_headers(self, entry: PdfCacheEntry) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def path_for(self, url: str, revalidated: bool = False) -> Optional[Path]:
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            path = self._blob_path(entry.digest)
+            if not path.exists():
+                del self._entries[key]
+                return None
+            now = time.time()
+            entry.accessed_at = now
+            if revalidated:
+                entry.validated_at = now
+                self.revalidated += 1
+            self.hits += 1
+            self.bytes_saved += entry.size
+            self._pending_touches += 1
+            if revalidated or self._pending_touches >= _INDEX_SAVE_INTERVAL:
+                self._save_index()
+            self._pin(entry.digest)
+            return path
+
+    def store_file(
+        self,
+        url: str,
+        source_path: Path,
+        digest: str,
+        size: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Path:
+        """Move a fully downloaded file into the blob store."""
+        path = self._blob_path(digest)
+        if path.exists():
+            Path(source_path).unlink(missing_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(source_path), path)
+        now = time.time()
+        entry = PdfCacheEntry(
+            digest=digest,
+            size=size,
+            etag=etag,
+            last_modified=last_modified,
+            validated_at=now,
+            accessed_at=now,
+        )
+        with self._lock:
+            self.misses += 1
+            self._entries[normalize_url(url)] = entry
+            self._pin(digest)
+            self._evict()
+            self._save_index()
+        return path
+
+    def release(self, digest: str) -> None:
+        """Unpin a blob handed out by ``path_for`` or ``store_file``."""
+        with self._lock:
+            count = self._pins.get(digest, 0) - 1
+            if count > 0:
+                self._pins[digest] = count
+            else:
+                self._pins.pop(digest, None)
+
+    @property
+    def tmp_dir(self) -> Path:
+        path = self.base_dir / "tmp"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
+
+    def flush(self) -> None:
+        with self._lock:
+            self._save_index()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.pdf"
+
+    def _total_bytes(self) -> int:
+        sizes = {entry.digest: entry.size for entry in self._entries.values()}
+        return sum(sizes.values())
+
+    def _pin(self, digest: str) -> None:
+        self._pins[digest] = self._pins.get(digest, 0) + 1
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        by_access = sorted(
+            self._entries.items(),
+            key=lambda item: item[1].accessed_at,
+        )
+        for key, entry in by_access:
+            if total <= self.max_bytes:
+                break
+            if entry.digest in self._pins:
+                continue
+            del self._entries[key]
+            self.evictions += 1
+            if any(other.digest == entry.digest for other in self._entries.values()):
+                continue
+            total -= entry.size
+            try:
+                self._blob_path(entry.digest).unlink()
+            except OSError:
+                pass
+
+    def _load_index(self) -> Dict[str, PdfCacheEntry]:
+        try:
+            with self.index_path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable PDF cache index: %s", exc)
+            return {}
+        return {key: PdfCacheEntry(**value) for key, value in payload.items()}
+
+    def _save_index(self) -> None:
+        payload = {key: asdict(entry) for key, entry in self._entries.items()}
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=True)
+        os.replace(tmp_path, self.index_path)
+        self._pending_touches = 0
+
+
+def normalize_url(url: str) -> str:
+    parsed = urlparse(str(url).strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    if port and not (
+        (scheme == "http" and port == 80) or (scheme == "https" and port == 443)
+    ):
+        host = f"{host}:{port}"
+    path = parsed.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, "", query, ""))
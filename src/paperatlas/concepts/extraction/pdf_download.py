@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+from .pdf_cache import PdfCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PDF_BYTES = 100 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class PdfTooLargeError(RuntimeError):
+    pass
+
+
+@dataclass
+class DownloadedPdf:
+    path: Path
+    size: int
+    temporary: bool = False
+    # Set for cache blobs, which stay pinned against eviction until cleanup.
+    cache: Optional[PdfCache] = None
+
+    def cleanup(self) -> None:
+        if self.temporary:
+            self.path.unlink(missing_ok=True)
+        if self.cache is not None:
+            self.cache.release(self.path.stem)
+            self.cache = None
+
+    def __enter__(self) -> "DownloadedPdf":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()
+
+
+class PdfDownloader:
+    """Streams PDFs to disk in chunks, enforcing a maximum size.
+
+    The response body never sits in memory as a whole: it is written to a
+    temporary file while being hashed, then either handed to the parser
+    directly or moved into the :class:`PdfCache` blob store.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.Client,
+        cache: Optional[PdfCache] = None,
+        max_bytes: int = DEFAULT_MAX_PDF_BYTES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        self.http_client = http_client
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+
+    def fetch(self, url: str) -> Optional[DownloadedPdf]:
+        headers: Dict[str, str] = {}
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry:
+            if self.cache.is_fresh(entry):
+                path = self.cache.path_for(url)
+                if path is not None:
+                    return DownloadedPdf(path=path, size=entry.size, cache=self.cache)
+            headers = self.cache.conditional_headers(entry)
+        try:
+            result = self._stream(url, headers)
+            if result is None and entry:
+                path = self.cache.path_for(url, revalidated=True)
+                if path is not None:
+                    return DownloadedPdf(path=path, size=entry.size, cache=self.cache)
+                result = self._stream(url, {})
+        except (httpx.HTTPError, PdfTooLargeError) as exc:
+            logger.warning("Failed to download PDF %s: %s", url, exc)
+            return None
+        if result is None:
+            return None
+        tmp_path, size, digest, response_headers = result
+        if not self.cache:
+            return DownloadedPdf(path=tmp_path, size=size, temporary=True)
+        path = self.cache.store_file(
+            url,
+            tmp_path,
+            digest,
+            size,
+            etag=response_headers.get("ETag"),
+            last_modified=response_headers.get("Last-Modified"),
+        )
+        return DownloadedPdf(path=path, size=size, cache=self.cache)
+
+    def _stream(
+        self,
+        url: str,
+        headers: Dict[str, str],
+    ) -> Optional[tuple[Path, int, str, httpx.Headers]]:
+        with self.http_client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                raise PdfTooLargeError(
+                    f"Content-Length {declared} exceeds {self.max_bytes} bytes"
+                )
+            tmp_dir = self.cache.tmp_dir if self.cache else None
+            handle = tempfile.NamedTemporaryFile(
+                dir=tmp_dir,
+                suffix=".pdf",
+                delete=False,
+            )
+            tmp_path = Path(handle.name)
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with handle:
+                    for chunk in response.iter_bytes(self.chunk_size):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise PdfTooLargeError(
+                                f"Download exceeded {self.max_bytes} bytes"
+                            )
+                        digest.update(chunk)
+                        handle.write(chunk)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            return tmp_path, size, digest.hexdigest(), response.headers
@@ -1,52 +1,243 @@
 from __future__ import annotations
 
+import io
 import logging
-from typing import Optional
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
 from xml.etree import ElementTree
 
 import httpx
 
 logger = logging.getLogger(__name__)
 
+PdfSource = Union[bytes, str]
+
 
 class PdfParser:
-    def __init__(self, strategy: str = "auto", grobid_url: str = "http://localhost:8070") -> None:
+    def __init__(
+        self,
+        strategy: str = "auto",
+        grobid_url: str = "http://localhost:8070",
+        workers: int = 0,
+        max_pages: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        pages_per_task: int = 64,
+    ) -> None:
         self.strategy = strategy
         self.grobid_url = grobid_url.rstrip("/")
+        self.workers = workers
+        self.max_pages = max_pages
+        self.timeout_seconds = timeout_seconds
+        self.pages_per_task = max(1, pages_per_task)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
 
     def parse_bytes(self, data: bytes) -> str:
-        if self.strategy == "pymupdf":
-            return _parse_pdf_pymupdf(data)
+        return self._parse(data)
+
+    def parse_file(self, path: str | Path) -> str:
+        # PyMuPDF maps the file itself, so the PDF is never loaded into
+        # Python memory; pool workers receive the path instead of the bytes.
+        return self._parse(str(path))
+
+    def parse_many(self, documents: Iterable[PdfSource]) -> List[Optional[str]]:
+        """Parse several PDFs, spreading them across the worker pool.
+
+        Documents that fail or time out yield ``None`` instead of aborting the
+        whole batch.
+        """
+        documents = [
+            str(item) if isinstance(item, Path) else item for item in documents
+        ]
+        if self.strategy == "grobid" or not self.workers:
+            return [self._parse_or_none(data) for data in documents]
+        pending = []
+        for data in documents:
+            try:
+                pending.append(self._submit_pymupdf(data))
+            except RuntimeError as exc:
+                pending.append(exc)
+        results: List[Optional[str]] = []
+        for data, item in zip(documents, pending):
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                results.append(self._collect(item))
+            except RuntimeError as exc:
+                if self.strategy == "auto":
+                    results.append(self._parse_or_none(data, grobid_only=True))
+                    continue
+                logger.warning("Failed to parse PDF: %s", exc)
+                results.append(None)
+        return results
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def __enter__(self) -> "PdfParser":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _parse(self, source: PdfSource) -> str:
         if self.strategy == "grobid":
-            return _parse_pdf_grobid(data, self.grobid_url)
+            return _parse_pdf_grobid(source, self.grobid_url)
         try:
-            return _parse_pdf_pymupdf(data)
+            return self._collect(self._submit_pymupdf(source))
         except RuntimeError:
-            return _parse_pdf_grobid(data, self.grobid_url)
+            if self.strategy == "pymupdf":
+                raise
+            return _parse_pdf_grobid(source, self.grobid_url)
+
+    def _parse_or_none(
+        self,
+        source: PdfSource,
+        grobid_only: bool = False,
+    ) -> Optional[str]:
+        try:
+            if grobid_only:
+                return _parse_pdf_grobid(source, self.grobid_url)
+            return self._parse(source)
+        except RuntimeError as exc:
+            logger.warning("Failed to parse PDF: %s", exc)
+            return None
+
+    def _submit_pymupdf(self, source: PdfSource) -> List[Future]:
+        if not self.workers:
+            future: Future = Future()
+            try:
+                future.set_result(
+                    _parse_pymupdf_pages(
+                        source,
+                        0,
+                        self.max_pages,
+                        self.timeout_seconds,
+                    )
+                )
+            except RuntimeError as exc:
+                future.set_exception(exc)
+            return [future]
 
+        page_count = _pymupdf_page_count(source)
+        if self.max_pages is not None:
+            page_count = min(page_count, self.max_pages)
+        pool = self._get_pool()
+        return [
+            pool.submit(
+                _parse_pymupdf_pages,
+                source,
+                start,
+                min(start + self.pages_per_task, page_count),
+                self.timeout_seconds,
+            )
+            for start in range(0, max(page_count, 1), self.pages_per_task)
+        ]
 
-def _parse_pdf_pymupdf(data: bytes) -> str:
+    def _collect(self, futures: List[Future]) -> str:
+        done, not_done = wait(futures, timeout=self.timeout_seconds)
+        if not_done:
+            # A page stuck inside MuPDF keeps its worker busy until it
+            # returns; the caller gets control back and the rest of the
+            # document's ranges are dropped from the queue.
+            for future in not_done:
+                future.cancel()
+            raise RuntimeError(
+                f"PDF parsing timed out after {self.timeout_seconds}s"
+            )
+        try:
+            return "\n".join(future.result() for future in futures).strip()
+        except BrokenProcessPool:
+            # A worker died (e.g. MuPDF segfault); start a fresh pool for the
+            # next document instead of failing every later submission.
+            self.close()
+            raise
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+
+def _open_pymupdf(source: PdfSource):
     try:
         import fitz  # type: ignore
     except Exception as exc:  # pragma: no cover - optional dependency
         raise RuntimeError(
             "PyMuPDF is required for PDF parsing. Install it with `pip install pymupdf`."
         ) from exc
-    doc = fitz.open(stream=data, filetype="pdf")
-    pages = []
-    for page in doc:
-        pages.append(page.get_text())
-    return "\n".join(pages).strip()
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return fitz.open(stream=source, filetype="pdf")
+        return fitz.open(source, filetype="pdf")
+    except Exception as exc:
+        raise RuntimeError(f"PyMuPDF could not open PDF: {exc}") from exc
+
+
+def _pymupdf_page_count(source: PdfSource) -> int:
+    with _open_pymupdf(source) as doc:
+        return doc.page_count
 
 
-def _parse_pdf_grobid(data: bytes, base_url: str) -> str:
+def _parse_pymupdf_pages(
+    source: PdfSource,
+    start: int = 0,
+    stop: Optional[int] = None,
+    timeout_seconds: Optional[float] = None,
+) -> str:
+    deadline = time.monotonic() + timeout_seconds if timeout_seconds else None
+    buffer = io.StringIO()
+    with _open_pymupdf(source) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for page_number in range(start, stop):
+            if deadline is not None and time.monotonic() > deadline:
+                # Raised rather than returning the pages so far, so in-thread
+                # parsing fails the same way as a pool wait that times out.
+                raise RuntimeError(
+                    f"PDF parsing timed out after {timeout_seconds}s "
+                    f"at page {page_number} of {stop}"
+                )
+            if page_number > start:
+                buffer.write("\n")
+            buffer.write(doc.load_page(page_number).get_text())
+    return buffer.getvalue()
+
+
+def _parse_pdf_grobid(source: PdfSource, base_url: str) -> str:
     url = f"{base_url}/api/processFulltextDocument"
-    response = httpx.post(url, files={"input": ("paper.pdf", data, "application/pdf")}, timeout=60.0)
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as handle:
+                response = _post_grobid(url, handle)
+        else:
+            response = _post_grobid(url, source)
+    except (httpx.HTTPError, OSError) as exc:
+        raise RuntimeError(f"GROBID request failed: {exc}") from exc
     if response.status_code != 200:
         raise RuntimeError(f"GROBID failed with status {response.status_code}")
     return _extract_text_from_tei(response.text)
 
 
+def _post_grobid(url: str, content) -> httpx.Response:
+    return httpx.post(
+        url,
+        files={"input": ("paper.pdf", content, "application/pdf")},
+        timeout=60.0,
+    )
+
+
 def _extract_text_from_tei(tei_xml: str) -> str:
     if not tei_xml:
         return ""
@@ -1,19 +1,25 @@
 from __future__ import annotations
 
 import logging
-from typing import Iterable, Optional
+import time
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 from urllib.parse import urlparse
 
 import httpx
 
-from paperatlas.graph.builders.paper_graph import upsert_paper_node
+from paperatlas.graph.builders.paper_graph import upsert_paper_nodes
 from paperatlas.graph.neo4j_client import Neo4jClient
 from paperatlas.graph.builders.concept_graph import (
     link_papers_to_concepts,
     upsert_concepts,
 )
 
-from .config import get_mysql_config, get_neo4j_bolt_url, parse_neo4j_bolt_url
+from .concurrent_ingest import ConcurrencyConfig, ConcurrentIngestor
+from .config import get_neo4j_bolt_url, parse_neo4j_bolt_url
+from .harvest import HarvestStateStore, HarvestWatermark
 from .heuristic_extractor import HeuristicConceptExtractor
 from .llm_extractor import LLMConceptExtractor, build_default_llm_client
 from .models import (
@@ -27,38 +33,82 @@ from .models import (
     normalize_arxiv_id,
     normalize_doi,
 )
-from .storage import JsonPaperStore, MySQLPaperStore
+from .segment_store import SegmentedPaperStore
+from .snapshot import iter_snapshot_records
+from .storage import (
+    DEFAULT_MAX_ATTEMPTS,
+    PAPER_METADATA_FIELDS,
+    JsonPaperStore,
+    MySQLPaperStore,
+    create_paper_store,
+    record_from_row,
+)
 from ..summarization.concept_summarizer import ConceptSummarizer
 from ..validation.deduplication import deduplicate_concepts
+from .pdf_cache import PdfCache
+from .pdf_download import DEFAULT_MAX_PDF_BYTES, DownloadedPdf, PdfDownloader
 from .pdf_parser import PdfParser
-from .sources import ArxivClient
+from .sources import ARXIV_ID_LIST_BATCH_SIZE, ArxivClient
+from .throttle import map_unordered
+from .write_behind import WriteBehindBuffer
 
 logger = logging.getLogger(__name__)
 
+# How concept summaries are produced: one LLM call per concept, parsed from
+# the extraction post (no extra calls), or one LLM call per paper.
+SUMMARY_MODES = ("per-concept", "post", "batched")
+
 
 class IngestionPipeline:
     def __init__(
         self,
         arxiv_client: Optional[ArxivClient] = None,
         parser: Optional[PdfParser] = None,
-        json_store: Optional[JsonPaperStore] = None,
+        json_store: Optional[JsonPaperStore | SegmentedPaperStore] = None,
         mysql_store: Optional[MySQLPaperStore] = None,
         mysql_config: Optional[dict] = None,
+        mysql_pool_size: Optional[int] = None,
         use_mysql: bool = True,
+        store_backend: Optional[str] = None,
+        sqlite_path: Optional[str] = None,
         neo4j_client: Optional[Neo4jClient] = None,
         neo4j_bolt_url: Optional[str] = None,
         use_neo4j: bool = True,
+        http_client: Optional[httpx.Client] = None,
+        pdf_cache: Optional[PdfCache] = None,
+        use_pdf_cache: bool = True,
+        max_pdf_bytes: int = DEFAULT_MAX_PDF_BYTES,
+        persist_batch_size: int = 100,
+        persist_delay_seconds: float = 2.0,
+        persist_max_pending: int = 1000,
+        spill_path: Optional[str] = None,
     ) -> None:
         self.arxiv_client = arxiv_client or ArxivClient()
         self.parser = parser or PdfParser()
-        self.json_store = json_store or JsonPaperStore()
+        self.http_client = http_client or httpx.Client(
+            timeout=60.0,
+            follow_redirects=True,
+        )
+        self.pdf_cache = pdf_cache
+        if self.pdf_cache is None and use_pdf_cache:
+            self.pdf_cache = PdfCache()
+        self.downloader = PdfDownloader(
+            self.http_client,
+            cache=self.pdf_cache,
+            max_bytes=max_pdf_bytes,
+        )
+        self.json_store = json_store if json_store is not None else JsonPaperStore()
         self.mysql_store = mysql_store
         if self.mysql_store is None and use_mysql:
-            config = mysql_config or get_mysql_config()
             try:
-                self.mysql_store = MySQLPaperStore(config)
+                self.mysql_store = create_paper_store(
+                    store_backend,
+                    mysql_config=mysql_config,
+                    pool_size=mysql_pool_size,
+                    sqlite_path=sqlite_path,
+                )
             except RuntimeError as exc:
-                logger.warning("MySQL store disabled: %s", exc)
+                logger.warning("Paper store disabled: %s", exc)
         self.neo4j_client = neo4j_client
         if self.neo4j_client is None and use_neo4j:
             bolt_url = (neo4j_bolt_url or get_neo4j_bolt_url()).strip()
@@ -68,60 +118,363 @@ class IngestionPipeline:
                     self.neo4j_client = Neo4jClient(uri, user, password)
                 except (RuntimeError, ValueError) as exc:
                     logger.warning("Neo4j client disabled: %s", exc)
+        # Records are written behind the pipeline: each sink batches on its
+        # own thread, so a slow Neo4j commit does not hold up downloads and
+        # parsing. Every public ingest method flushes before returning.
+        self.persist_batch_size = max(persist_batch_size, 1)
+        sinks = {"json": self.json_store.save_many}
+        if self.mysql_store:
+            sinks["mysql"] = self.mysql_store.save_many
+        if self.neo4j_client:
+            sinks["neo4j"] = partial(upsert_paper_nodes, self.neo4j_client)
+        self._writer = WriteBehindBuffer(
+            sinks,
+            max_batch=self.persist_batch_size,
+            max_delay_seconds=persist_delay_seconds,
+            max_pending=persist_max_pending,
+            spill_path=spill_path,
+            encode=lambda record: record.model_dump(mode="json"),
+            decode=PaperRecord.model_validate,
+        )
 
     def ingest_identifiers(
         self,
         identifiers: Iterable[PaperIdentifier],
     ) -> list[PaperRecord]:
         records = []
-        for identifier in identifiers:
-            metadata = self._fetch_metadata(identifier)
-            if not metadata:
-                logger.warning(
-                    "No metadata found for %s",
-                    identifier.model_dump(),
-                )
-                continue
-            record = self._enrich_record(metadata)
-            self._persist(record)
-            records.append(record)
+        try:
+            for metadata in self._resolve_identifiers(identifiers):
+                record = self._enrich_record(metadata)
+                self._persist(record)
+                records.append(record)
+        finally:
+            self.flush()
         return records
 
     def ingest_urls(self, urls: Iterable[str]) -> list[PaperRecord]:
         records = []
-        for url in urls:
-            record = self.ingest_url(url)
-            if record:
-                records.append(record)
+        try:
+            for url in urls:
+                record = self._ingest_url(url)
+                if record:
+                    records.append(record)
+        finally:
+            self.flush()
         return records
 
     def ingest_url(self, url: str) -> Optional[PaperRecord]:
-        metadata = self._metadata_from_url(url)
-        if not metadata:
-            logger.warning("No metadata resolved for URL %s", url)
-            return None
-        record = self._enrich_record(metadata)
-        self._persist(record)
-        return record
+        try:
+            return self._ingest_url(url)
+        finally:
+            self.flush()
 
     def ingest_query(
         self,
         query: str,
         max_results: int = 5,
         from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
     ) -> list[PaperRecord]:
-        metadata_results = self.arxiv_client.search(
+        metadata_results = self.arxiv_client.iter_search(
             query,
             max_results=max_results,
             from_date=from_date,
+            to_date=to_date,
         )
         records = []
-        for metadata in metadata_results:
-            record = self._enrich_record(metadata)
-            self._persist(record)
-            records.append(record)
+        try:
+            for metadata in metadata_results:
+                record = self._enrich_record(metadata)
+                self._persist(record)
+                records.append(record)
+        finally:
+            self.flush()
         return records
 
+    def ingest_identifiers_concurrent(
+        self,
+        identifiers: Iterable[PaperIdentifier],
+        config: Optional[ConcurrencyConfig] = None,
+    ) -> list[PaperRecord]:
+        return ConcurrentIngestor(self, config).run(
+            self._resolve_identifiers(identifiers),
+            lambda metadata: metadata,
+        )
+
+    def ingest_urls_concurrent(
+        self,
+        urls: Iterable[str],
+        config: Optional[ConcurrencyConfig] = None,
+    ) -> list[PaperRecord]:
+        return ConcurrentIngestor(self, config).run(
+            urls,
+            self._metadata_from_url,
+        )
+
+    def ingest_query_concurrent(
+        self,
+        query: str,
+        max_results: int = 5,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        config: Optional[ConcurrencyConfig] = None,
+    ) -> list[PaperRecord]:
+        metadata_results = self.arxiv_client.iter_search(
+            query,
+            max_results=max_results,
+            from_date=from_date,
+            to_date=to_date,
+        )
+        return ConcurrentIngestor(self, config).run(
+            metadata_results,
+            lambda metadata: metadata,
+        )
+
+    def harvest_query(
+        self,
+        query: str,
+        state: HarvestStateStore,
+        max_results: int = 100,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        check_batch_size: int = 100,
+        config: Optional[ConcurrencyConfig] = None,
+    ) -> list[PaperRecord]:
+        """Ingest only papers newer than the query's stored watermark.
+
+        Candidates are checked against the store in bulk before any PDF is
+        downloaded, and the watermark only advances once the search has
+        been read back to the previous watermark (or exhausted). A first
+        run cut short by ``max_results`` stores no watermark, so the older
+        papers in the window are picked up by a later, larger run.
+        """
+        watermark = state.get(query) or HarvestWatermark(query=query)
+        previous = watermark.published_at()
+        if previous:
+            watermark_day = previous.date().isoformat()
+            if not from_date or watermark_day > from_date:
+                from_date = watermark_day
+        seen = 0
+        reached_watermark = False
+        newest: Optional[datetime] = None
+        newest_ids: list[str] = []
+
+        def candidates() -> Iterator[PaperMetadata]:
+            nonlocal seen, reached_watermark, newest, newest_ids
+            for metadata in self.arxiv_client.iter_search(
+                query,
+                max_results=max_results,
+                from_date=from_date,
+                to_date=to_date,
+            ):
+                seen += 1
+                published = metadata.published_at
+                paper_id = metadata.canonical_id()
+                if published:
+                    if newest is None or published > newest:
+                        newest = published
+                        newest_ids = [paper_id]
+                    elif published == newest:
+                        newest_ids.append(paper_id)
+                if previous and published and (
+                    published < previous
+                    or (published == previous and paper_id in watermark.last_ids)
+                ):
+                    reached_watermark = True
+                    if published < previous:
+                        return
+                    continue
+                yield metadata
+
+        def new_papers() -> Iterator[PaperMetadata]:
+            for chunk in _chunked(candidates(), check_batch_size):
+                existing = self._existing_ids(
+                    metadata.canonical_id() for metadata in chunk
+                )
+                for metadata in chunk:
+                    if metadata.canonical_id() not in existing:
+                        yield metadata
+
+        if config:
+            records = ConcurrentIngestor(self, config).run(
+                new_papers(),
+                lambda metadata: metadata,
+            )
+        else:
+            records = []
+            try:
+                for metadata in new_papers():
+                    record = self._enrich_record(metadata)
+                    self._persist(record)
+                    records.append(record)
+            finally:
+                self.flush()
+
+        if newest is None:
+            logger.info("Harvest for %r found no new papers", query)
+        elif reached_watermark or seen < max_results:
+            if previous is None or newest >= previous:
+                watermark.last_published = newest.isoformat()
+                watermark.last_ids = newest_ids
+                state.set(watermark)
+        else:
+            logger.warning(
+                "Harvest for %r stopped at max_results=%d before reaching the "
+                "%s; watermark not advanced.",
+                query,
+                max_results,
+                "previous watermark" if previous else "end of the search window",
+            )
+        logger.info(
+            "Harvest for %r: %d candidates, %d new papers ingested",
+            query,
+            seen,
+            len(records),
+        )
+        return records
+
+    def ingest_snapshot(
+        self,
+        path: str,
+        categories: Optional[Iterable[str]] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        batch_size: int = 1000,
+        limit: Optional[int] = None,
+        fetch_pdfs: bool = False,
+    ) -> int:
+        """Bulk-load an arXiv metadata snapshot; returns the record count.
+
+        Records are written in batches and never accumulated, so memory use
+        does not grow with the snapshot. PDFs are skipped unless
+        ``fetch_pdfs`` is set; ``backfill_pdfs`` fetches them later.
+        """
+        records = iter_snapshot_records(
+            path,
+            categories=categories,
+            from_date=from_date,
+            to_date=to_date,
+        )
+        if limit is not None:
+            records = islice(records, limit)
+        total = 0
+        started = time.monotonic()
+        try:
+            for batch in _chunked(records, batch_size):
+                if fetch_pdfs:
+                    for record in batch:
+                        record.raw_text = self._enrich_record(record.metadata).raw_text
+                self._persist_batch(batch)
+                total += len(batch)
+                logger.debug("Snapshot ingest: %d records queued", total)
+        finally:
+            self.flush()
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logger.info(
+            "Snapshot ingest: %d records in %.1fs (%.0f records/s)",
+            total,
+            elapsed,
+            total / elapsed,
+        )
+        return total
+
+    def backfill_pdfs(
+        self,
+        limit: Optional[int] = None,
+        batch_size: int = 100,
+    ) -> int:
+        """Download and parse PDFs for stored papers that have no text yet."""
+        if not self.mysql_store:
+            raise RuntimeError("PDF backfill requires a paper store.")
+        total = 0
+        after_paper_id = None
+        try:
+            while limit is None or total < limit:
+                size = batch_size if limit is None else min(batch_size, limit - total)
+                rows = self.mysql_store.fetch_papers_missing_text(
+                    limit=size,
+                    after_paper_id=after_paper_id,
+                )
+                if not rows:
+                    break
+                after_paper_id = rows[-1]["paper_id"]
+                batch = []
+                for row in rows:
+                    stored = record_from_row(row)
+                    record = self._enrich_record(stored.metadata)
+                    record.source_payload = stored.source_payload
+                    if record.raw_text:
+                        batch.append(record)
+                self._persist_batch(batch)
+                total += len(rows)
+        finally:
+            self.flush()
+        return total
+
+    def rebuild_paper_graph(self, batch_size: int = 1000) -> int:
+        """Re-sync every stored paper's Neo4j node from stored metadata."""
+        if not self.mysql_store or not self.neo4j_client:
+            raise RuntimeError("Graph rebuild requires a paper store and Neo4j.")
+        rows = self.mysql_store.iter_papers(
+            require_raw_text=False,
+            batch_size=batch_size,
+            fields=PAPER_METADATA_FIELDS,
+        )
+        total = 0
+        for chunk in _chunked(rows, batch_size):
+            upsert_paper_nodes(
+                self.neo4j_client,
+                [record_from_row(row) for row in chunk],
+            )
+            total += len(chunk)
+        return total
+
+    def flush(self) -> None:
+        """Block until every persisted record has reached every store."""
+        self._writer.flush()
+
+    def close(self) -> None:
+        """Flush pending writes and stop the background writers."""
+        self._writer.close()
+
+    def _ingest_url(self, url: str) -> Optional[PaperRecord]:
+        metadata = self._metadata_from_url(url)
+        if not metadata:
+            logger.warning("No metadata resolved for URL %s", url)
+            return None
+        record = self._enrich_record(metadata)
+        self._persist(record)
+        return record
+
+    def _existing_ids(self, paper_ids: Iterable[str]) -> set[str]:
+        if self.mysql_store:
+            return self.mysql_store.existing_ids(paper_ids)
+        return self.json_store.existing_ids(paper_ids)
+
+    def _resolve_identifiers(
+        self,
+        identifiers: Iterable[PaperIdentifier],
+    ) -> Iterator[PaperMetadata]:
+        # arXiv IDs are resolved a chunk at a time through one id_list query
+        # each; other identifiers keep the per-item lookup.
+        for chunk in _chunked(identifiers, ARXIV_ID_LIST_BATCH_SIZE):
+            arxiv_ids = [item.arxiv_id for item in chunk if item.arxiv_id]
+            prefetched = (
+                self.arxiv_client.fetch_many(arxiv_ids) if arxiv_ids else {}
+            )
+            for identifier in chunk:
+                if identifier.arxiv_id:
+                    metadata = prefetched.get(identifier.arxiv_id)
+                else:
+                    metadata = self._fetch_metadata(identifier)
+                if not metadata:
+                    logger.warning(
+                        "No metadata found for %s",
+                        identifier.model_dump(),
+                    )
+                    continue
+                yield metadata
+
     def _fetch_metadata(
         self,
         identifier: PaperIdentifier,
@@ -170,28 +523,31 @@ class IngestionPipeline:
         return PaperRecord(metadata=metadata, raw_text=raw_text)
 
     def _download_and_parse_pdf(self, pdf_url: str) -> Optional[str]:
-        try:
-            response = httpx.get(
-                str(pdf_url),
-                timeout=60.0,
-                follow_redirects=True,
-            )
-            response.raise_for_status()
-        except httpx.HTTPError as exc:
-            logger.warning("Failed to download PDF %s: %s", pdf_url, exc)
+        downloaded = self._download_pdf(str(pdf_url))
+        if downloaded is None:
             return None
+        with downloaded:
+            return self._parse_pdf(str(pdf_url), downloaded)
+
+    def _download_pdf(self, pdf_url: str) -> Optional[DownloadedPdf]:
+        return self.downloader.fetch(pdf_url)
+
+    def _parse_pdf(
+        self,
+        pdf_url: str,
+        downloaded: DownloadedPdf,
+    ) -> Optional[str]:
         try:
-            return self.parser.parse_bytes(response.content)
+            return self.parser.parse_file(downloaded.path)
         except RuntimeError as exc:
             logger.warning("Failed to parse PDF %s: %s", pdf_url, exc)
             return None
 
     def _persist(self, record: PaperRecord) -> None:
-        self.json_store.save(record)
-        if self.mysql_store:
-            self.mysql_store.save(record)
-        if self.neo4j_client:
-            upsert_paper_node(self.neo4j_client, record)
+        self._writer.submit(record)
+
+    def _persist_batch(self, records: list[PaperRecord]) -> None:
+        self._writer.submit_many(records)
 
 
 class ConceptExtractionPipeline:
@@ -199,6 +555,9 @@ class ConceptExtractionPipeline:
         self,
         mysql_store: Optional[MySQLPaperStore] = None,
         mysql_config: Optional[dict] = None,
+        mysql_pool_size: Optional[int] = None,
+        store_backend: Optional[str] = None,
+        sqlite_path: Optional[str] = None,
         llm_extractor: Optional[LLMConceptExtractor] = None,
         heuristic_extractor: Optional[HeuristicConceptExtractor] = None,
         summarizer: Optional[ConceptSummarizer] = None,
@@ -206,11 +565,23 @@ class ConceptExtractionPipeline:
         neo4j_bolt_url: Optional[str] = None,
         use_neo4j: bool = True,
         dedup_threshold: float = 0.85,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        graph_batch_size: int = 50,
+        spill_path: Optional[str] = None,
+        summary_mode: str = "per-concept",
     ) -> None:
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode: {summary_mode}")
+        self.summary_mode = summary_mode
+        self.max_attempts = max_attempts
         self.mysql_store = mysql_store
         if self.mysql_store is None:
-            config = mysql_config or get_mysql_config()
-            self.mysql_store = MySQLPaperStore(config)
+            self.mysql_store = create_paper_store(
+                store_backend,
+                mysql_config=mysql_config,
+                pool_size=mysql_pool_size,
+                sqlite_path=sqlite_path,
+            )
 
         if llm_extractor:
             self.llm_extractor = llm_extractor
@@ -224,7 +595,8 @@ class ConceptExtractionPipeline:
             heuristic_extractor or HeuristicConceptExtractor()
         )
         self.summarizer = summarizer or ConceptSummarizer(
-            llm_client=self.llm_extractor.client
+            llm_client=self.llm_extractor.client,
+            cache=self.llm_extractor.cache,
         )
         self.dedup_threshold = dedup_threshold
         self.neo4j_client = neo4j_client
@@ -236,8 +608,99 @@ class ConceptExtractionPipeline:
                     self.neo4j_client = Neo4jClient(uri, user, password)
                 except (RuntimeError, ValueError) as exc:
                     logger.warning("Neo4j client disabled: %s", exc)
+        # Concept graph writes trail extraction on a background thread; the
+        # paper_processing commit stays synchronous because lease checks
+        # decide whether results are kept.
+        self._graph_writer = None
+        if self.neo4j_client:
+            self._graph_writer = WriteBehindBuffer(
+                {"neo4j": self._write_concept_graph},
+                max_batch=graph_batch_size,
+                spill_path=spill_path,
+            )
+
+    def flush(self) -> None:
+        """Block until queued concept graph writes have been applied."""
+        if self._graph_writer:
+            self._graph_writer.flush()
+
+    def close(self) -> None:
+        if self._graph_writer:
+            self._graph_writer.close()
+
+    def process_paper(
+        self,
+        row: dict,
+        worker_id: Optional[str] = None,
+    ) -> list[ConceptRecord]:
+        """Extract, summarize and store concepts for one paper row.
+
+        ``worker_id`` is set when the paper was leased with ``claim_papers``;
+        results are then only stored while that lease is still held.
+        """
+        try:
+            records = self._extract_records(row)
+        except Exception as exc:
+            if self.mysql_store:
+                self.mysql_store.mark_failed(
+                    row["paper_id"],
+                    f"{type(exc).__name__}: {exc}",
+                    max_attempts=self.max_attempts,
+                    worker_id=worker_id,
+                )
+            raise
+        if self.mysql_store:
+            payload = [
+                {
+                    "paper_id": record.paper_id,
+                    "concept_id": record.concept_id,
+                    "name": record.name,
+                    "summary": record.summary,
+                    "bullets": record.bullets,
+                    "source": record.source,
+                }
+                for record in records
+            ]
+            completed = self.mysql_store.complete_paper(
+                row["paper_id"],
+                payload,
+                prompt_version=self.llm_extractor.prompt_version,
+                worker_id=worker_id,
+            )
+            if not completed:
+                logger.warning(
+                    "Lease on %s expired before completion; results dropped",
+                    row["paper_id"],
+                )
+                return []
+        if self._graph_writer and records:
+            self._graph_writer.submit([record.model_dump() for record in records])
+        return records
+
+    def process_many(
+        self,
+        rows: Iterable[dict],
+        worker_id: Optional[str] = None,
+        max_workers: int = 1,
+    ) -> Iterator[tuple[dict, Optional[list[ConceptRecord]], Optional[BaseException]]]:
+        """Run ``process_paper`` on up to ``max_workers`` papers at once.
+
+        Yields ``(row, records, error)`` as each paper finishes, so callers
+        see results in completion order rather than input order. LLM calls
+        are paced by the client's rate limiter.
+        """
+        return map_unordered(
+            lambda row: self.process_paper(row, worker_id=worker_id),
+            rows,
+            max_workers,
+        )
+
+    def _write_concept_graph(self, batches: list[list[dict]]) -> None:
+        rows = [row for batch in batches for row in batch]
+        upsert_concepts(self.neo4j_client, rows)
+        link_papers_to_concepts(self.neo4j_client, rows)
 
-    def process_paper(self, row: dict) -> list[ConceptRecord]:
+    def _extract_records(self, row: dict) -> list[ConceptRecord]:
         paper_id = row["paper_id"]
         title = row.get("title") or ""
         abstract = row.get("abstract")
@@ -259,13 +722,11 @@ class ConceptExtractionPipeline:
             concepts,
             similarity_threshold=self.dedup_threshold,
         )
+        candidates = [ConceptCandidate(**concept) for concept in concepts]
         records = []
-        for concept in concepts:
-            candidate = ConceptCandidate(**concept)
-            summary_payload = self.summarizer.summarize(
-                candidate.post or candidate.evidence or candidate.name,
-                candidate.name,
-            )
+        for candidate, summary_payload in zip(
+            candidates, self._summarize(candidates)
+        ):
             summary = ConceptSummary(**summary_payload)
             concept_id = canonical_concept_id(candidate.name)
             record = ConceptRecord(
@@ -277,46 +738,57 @@ class ConceptExtractionPipeline:
                 source=candidate.source,
             )
             records.append(record)
-        if self.mysql_store and records:
-            payload = [
-                {
-                    "paper_id": record.paper_id,
-                    "concept_id": record.concept_id,
-                    "name": record.name,
-                    "summary": record.summary,
-                    "bullets": record.bullets,
-                    "source": record.source,
-                }
-                for record in records
-            ]
-            self.mysql_store.save_concepts(payload)
-        if self.neo4j_client and records:
-            rows = [record.model_dump() for record in records]
-            upsert_concepts(self.neo4j_client, rows)
-            link_papers_to_concepts(self.neo4j_client, rows)
         return records
 
+    def _summarize(self, candidates: list[ConceptCandidate]) -> list[dict]:
+        texts = [
+            (candidate.post or candidate.evidence or candidate.name, candidate.name)
+            for candidate in candidates
+        ]
+        if self.summary_mode == "batched":
+            return self.summarizer.summarize_many(texts)
+        if self.summary_mode == "post":
+            return [self.summarizer.summarize_post(text, name) for text, name in texts]
+        return [self.summarizer.summarize(text, name) for text, name in texts]
+
     def process_paper_id(self, paper_id: str) -> list[ConceptRecord]:
         row = self.mysql_store.fetch_paper_by_id(paper_id)
         if not row:
             return []
-        return self.process_paper(row)
+        try:
+            return self.process_paper(row)
+        finally:
+            self.flush()
 
     def process_batch(
         self,
         limit: int,
         offset: int = 0,
+        after_paper_id: Optional[str] = None,
     ) -> list[ConceptRecord]:
         rows = self.mysql_store.fetch_papers(
             limit=limit,
             offset=offset,
+            after_paper_id=after_paper_id,
         )
         all_records: list[ConceptRecord] = []
-        for row in rows:
-            all_records.extend(self.process_paper(row))
+        try:
+            for row in rows:
+                all_records.extend(self.process_paper(row))
+        finally:
+            self.flush()
         return all_records
 
 
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def _normalize_http_url(url: str) -> Optional[str]:
     cleaned = (url or "").strip()
     if not cleaned:
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .compression import compress_text
+from .models import PaperRecord
+from .storage import JsonPaperStore, PaperRow, _defer_text
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+_SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.jsonl$")
+_INDEX_NAME = "index.jsonl"
+_LOCK_NAME = "LOCK"
+
+
+class SegmentedPaperStore:
+    """Append-only paper store: JSON-lines segments plus an offset index.
+
+    Each save appends one compact line to the active segment and one
+    ``[paper_id, segment, offset, length]`` entry to ``index.jsonl``; the
+    index is read into memory on open, so ``load`` is a single seek and
+    read. Re-saving a paper leaves the old line behind until ``compact``
+    rewrites the live versions into fresh segments. Lines written after the
+    last index entry (a crash between the two appends) are re-indexed on
+    open, and a torn trailing line is dropped.
+
+    Appends are not coordinated between processes, so a store directory has
+    a single writer: opening it takes an exclusive ``flock`` on ``LOCK`` and
+    a second process fails fast until ``close``. Papers still sitting in a
+    legacy ``JsonPaperStore`` directory (``legacy_dir``) are found by
+    ``load`` and ``existing_ids`` until ``import_json_dir`` moves them over.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path = "data/paper_segments",
+        compression: Optional[str] = None,
+        segment_max_bytes: int = DEFAULT_SEGMENT_BYTES,
+        legacy_dir: Optional[str | Path] = None,
+    ) -> None:
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._lock_handle = _acquire_writer_lock(self.base_dir / _LOCK_NAME)
+        self._legacy = (
+            JsonPaperStore(legacy_dir)
+            if legacy_dir and Path(legacy_dir).is_dir()
+            else None
+        )
+        self.compression = compression
+        self.segment_max_bytes = segment_max_bytes
+        self._index: dict[str, tuple[int, int, int]] = {}
+        # Indexed end of each segment, superseded entries included, so
+        # recovery only rescans lines the index has never seen.
+        self._ends: dict[int, int] = {}
+        self._stale_bytes = 0
+        self._lock = threading.Lock()
+        self._load_index()
+        self._recover()
+        segments = self._segment_numbers()
+        self._active = segments[-1] if segments else 1
+        self._index_handle = (self.base_dir / _INDEX_NAME).open("a", encoding="utf-8")
+
+    def save(self, record: PaperRecord) -> str:
+        self.save_many([record])
+        return record.metadata.canonical_id()
+
+    def save_many(self, records: Iterable[PaperRecord]) -> int:
+        payloads = [
+            {
+                "paper_id": record.metadata.canonical_id(),
+                "metadata": record.metadata.model_dump(mode="json"),
+                "raw_text": compress_text(record.raw_text, self.compression),
+                "source_payload": record.source_payload,
+            }
+            for record in records
+        ]
+        if not payloads:
+            return 0
+        with self._lock:
+            lines = []
+            for payload in payloads:
+                location = self._index.get(payload["paper_id"])
+                if payload["raw_text"] is None and location is not None:
+                    # Metadata-only saves (snapshot loads) keep stored text.
+                    payload["raw_text"] = json.loads(self._read(location))["raw_text"]
+                line = json.dumps(payload, ensure_ascii=True, separators=(",", ":"))
+                lines.append((payload["paper_id"], (line + "\n").encode("ascii")))
+            entries = self._append(lines)
+            self._write_index(entries)
+        return len(lines)
+
+    def load(self, paper_id: str) -> Optional[dict]:
+        for _ in range(2):
+            location = self._index.get(paper_id)
+            if location is None:
+                return self._legacy.load(paper_id) if self._legacy else None
+            try:
+                data = self._read(location)
+            except FileNotFoundError:
+                # Segment removed by a concurrent compact(); the index now
+                # points at the rewritten copy.
+                continue
+            return _defer_text(PaperRow(json.loads(data)))
+        return None
+
+    def existing_ids(self, paper_ids: Iterable[str]) -> set[str]:
+        paper_ids = list(paper_ids)
+        found = {paper_id for paper_id in paper_ids if paper_id in self._index}
+        if self._legacy:
+            found |= self._legacy.existing_ids(
+                paper_id for paper_id in paper_ids if paper_id not in found
+            )
+        return found
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._index
+
+    @property
+    def stale_bytes(self) -> int:
+        """Bytes held by superseded versions that ``compact`` would drop."""
+        return self._stale_bytes
+
+    def iter_papers(self) -> Iterator[dict]:
+        """Yield the live version of every paper in segment order.
+
+        Segments are read sequentially; superseded lines are skipped by
+        checking their offset against the index.
+        """
+        live = {location[:2] for location in self._index.values()}
+        for segment in self._segment_numbers():
+            with self._segment_path(segment).open("rb") as handle:
+                offset = 0
+                for line in handle:
+                    if (segment, offset) in live:
+                        yield _defer_text(PaperRow(json.loads(line)))
+                    offset += len(line)
+
+    def compact(self) -> int:
+        """Rewrite live versions into new segments and drop the old ones.
+
+        Returns the number of bytes reclaimed.
+        """
+        with self._lock:
+            old_segments = self._segment_numbers()
+            if not old_segments:
+                return 0
+            reclaimed = self._stale_bytes
+            self._active = old_segments[-1] + 1
+            new_index: dict[str, tuple[int, int, int]] = {}
+            by_position = sorted(self._index.items(), key=lambda item: item[1])
+            batch: list[tuple[str, bytes]] = []
+            for paper_id, location in by_position:
+                batch.append((paper_id, self._read(location)))
+                if len(batch) >= 1000:
+                    new_index.update(self._append(batch, sync=True))
+                    batch = []
+            if batch:
+                new_index.update(self._append(batch, sync=True))
+
+            self._ends = {}
+            for segment, offset, length in new_index.values():
+                self._ends[segment] = max(self._ends.get(segment, 0), offset + length)
+            self._index = new_index
+            self._stale_bytes = 0
+
+            # Old segments go before the index file is swapped: after a crash
+            # in between, entries pointing at missing segments are dropped and
+            # the new segments are re-indexed by _recover().
+            self._index_handle.close()
+            for segment in old_segments:
+                self._segment_path(segment).unlink()
+            tmp_path = self.base_dir / f"{_INDEX_NAME}.tmp"
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                for paper_id, location in new_index.items():
+                    handle.write(json.dumps([paper_id, *location]) + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, self.base_dir / _INDEX_NAME)
+            self._index_handle = (self.base_dir / _INDEX_NAME).open(
+                "a", encoding="utf-8"
+            )
+        logger.info(
+            "Compacted %d papers from %d segments, reclaimed %d bytes",
+            len(new_index),
+            len(old_segments),
+            reclaimed,
+        )
+        return reclaimed
+
+    def import_json_dir(self, json_dir: str | Path, batch_size: int = 500) -> int:
+        """Copy papers from a ``JsonPaperStore`` directory into this store."""
+        total = 0
+        batch: list[tuple[str, bytes]] = []
+        for path in sorted(Path(json_dir).glob("*.json")):
+            with path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+            line = json.dumps(payload, ensure_ascii=True, separators=(",", ":"))
+            batch.append((payload["paper_id"], (line + "\n").encode("ascii")))
+            if len(batch) >= batch_size:
+                total += self._append_indexed(batch)
+                batch = []
+        if batch:
+            total += self._append_indexed(batch)
+        return total
+
+    def close(self) -> None:
+        with self._lock:
+            self._index_handle.close()
+            self._lock_handle.close()
+
+    def _append_indexed(self, lines: list[tuple[str, bytes]]) -> int:
+        with self._lock:
+            self._write_index(self._append(lines))
+        return len(lines)
+
+    def _read(self, location: tuple[int, int, int]) -> bytes:
+        segment, offset, length = location
+        with self._segment_path(segment).open("rb") as handle:
+            handle.seek(offset)
+            return handle.read(length)
+
+    def _append(
+        self,
+        lines: list[tuple[str, bytes]],
+        sync: bool = False,
+    ) -> dict[str, tuple[int, int, int]]:
+        entries: dict[str, tuple[int, int, int]] = {}
+        handle = self._segment_path(self._active).open("ab")
+        try:
+            offset = handle.tell()
+            for paper_id, data in lines:
+                if offset and offset + len(data) > self.segment_max_bytes:
+                    if sync:
+                        os.fsync(handle.fileno())
+                    handle.close()
+                    self._active += 1
+                    handle = self._segment_path(self._active).open("ab")
+                    offset = 0
+                handle.write(data)
+                entries[paper_id] = (self._active, offset, len(data))
+                offset += len(data)
+            if sync:
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            handle.close()
+        return entries
+
+    def _write_index(self, entries: dict[str, tuple[int, int, int]]) -> None:
+        for paper_id, location in entries.items():
+            self._index_handle.write(json.dumps([paper_id, *location]) + "\n")
+            self._track(paper_id, location)
+        self._index_handle.flush()
+
+    def _track(self, paper_id: str, location: tuple[int, int, int]) -> None:
+        segment, offset, length = location
+        self._ends[segment] = max(self._ends.get(segment, 0), offset + length)
+        previous = self._index.get(paper_id)
+        if previous is not None and previous != location:
+            self._stale_bytes += previous[2]
+        self._index[paper_id] = location
+
+    def _load_index(self) -> None:
+        path = self.base_dir / _INDEX_NAME
+        if not path.exists():
+            return
+        with path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    paper_id, segment, offset, length = json.loads(line)
+                except ValueError:
+                    # Torn final entry; the segment scan in _recover() covers it.
+                    continue
+                self._track(paper_id, (segment, offset, length))
+
+    def _recover(self) -> None:
+        segments = self._segment_numbers()
+        missing = {
+            paper_id
+            for paper_id, location in self._index.items()
+            if location[0] not in segments
+        }
+        for paper_id in missing:
+            del self._index[paper_id]
+        recovered: dict[str, tuple[int, int, int]] = {}
+        for segment in segments:
+            path = self._segment_path(segment)
+            start = self._ends.get(segment, 0)
+            if path.stat().st_size <= start:
+                continue
+            with path.open("rb+") as handle:
+                handle.seek(start)
+                offset = start
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        handle.truncate(offset)
+                        logger.warning("Dropped torn record at %s:%d", path.name, offset)
+                        break
+                    paper_id = json.loads(line)["paper_id"]
+                    recovered[paper_id] = (segment, offset, len(line))
+                    offset += len(line)
+        if recovered:
+            logger.info("Re-indexed %d papers missing from the index", len(recovered))
+            with (self.base_dir / _INDEX_NAME).open("a", encoding="utf-8") as handle:
+                for paper_id, location in recovered.items():
+                    handle.write(json.dumps([paper_id, *location]) + "\n")
+            for paper_id, location in recovered.items():
+                self._track(paper_id, location)
+
+    def _segment_numbers(self) -> list[int]:
+        numbers = []
+        for path in self.base_dir.iterdir():
+            match = _SEGMENT_PATTERN.match(path.name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.base_dir / f"segment-{segment:06d}.jsonl"
+
+
+def _acquire_writer_lock(path: Path):
+    handle = path.open("a")
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise RuntimeError(
+            f"Paper segments in {path.parent} are already open by another "
+            "writer; only one may use a segment store at a time."
+        ) from None
+    return handle
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional
+
+from .models import PaperAuthor, PaperMetadata, PaperRecord, normalize_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+
+def iter_snapshot_records(
+    path: str | Path,
+    categories: Optional[Iterable[str]] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+) -> Iterator[PaperRecord]:
+    """Stream paper records from an arXiv JSON-lines metadata snapshot.
+
+    Lines are parsed one at a time, so memory stays flat regardless of the
+    snapshot size. Category filters match either a full category
+    (``cs.LG``) or an archive prefix (``cs``); date filters apply to the
+    first-version submission date.
+    """
+    wanted = {category.strip() for category in categories or [] if category.strip()}
+    lower = date.fromisoformat(from_date) if from_date else None
+    upper = date.fromisoformat(to_date) if to_date else None
+    skipped = 0
+    with _open_snapshot(Path(path)) as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            paper_categories = (item.get("categories") or "").split()
+            if wanted and not _matches_categories(paper_categories, wanted):
+                continue
+            submitted = _first_version_date(item)
+            submitted_day = submitted.date() if submitted else None
+            if lower or upper:
+                if submitted_day is None:
+                    continue
+                if lower and submitted_day < lower:
+                    continue
+                if upper and submitted_day > upper:
+                    continue
+            try:
+                metadata = _snapshot_metadata(item, paper_categories, submitted)
+            except Exception as exc:
+                skipped += 1
+                logger.debug("Skipping snapshot line %d: %s", line_number, exc)
+                continue
+            yield PaperRecord(
+                metadata=metadata,
+                source_payload=_snapshot_payload(item),
+            )
+    if skipped:
+        logger.warning("Skipped %d unreadable snapshot records in %s", skipped, path)
+
+
+def _snapshot_metadata(
+    item: dict,
+    categories: list[str],
+    submitted: Optional[datetime],
+) -> PaperMetadata:
+    arxiv_id = normalize_arxiv_id(item.get("id"))
+    if not arxiv_id:
+        raise ValueError("record has no arXiv id")
+    # The DOI is kept in source_payload rather than on the metadata so the
+    # canonical id stays ``arxiv:<id>``, matching papers ingested through
+    # the arXiv API.
+    return PaperMetadata(
+        title=" ".join((item.get("title") or "").split()),
+        abstract=(item.get("abstract") or "").strip() or None,
+        authors=_snapshot_authors(item),
+        publication_year=submitted.year if submitted else None,
+        published_at=submitted,
+        venue=categories[0] if categories else None,
+        arxiv_id=arxiv_id,
+        url=f"https://arxiv.org/abs/{arxiv_id}",
+        pdf_url=f"https://arxiv.org/pdf/{arxiv_id}.pdf",
+        source="arxiv",
+    )
+
+
+def _snapshot_payload(item: dict) -> dict:
+    return {
+        "snapshot": {
+            key: item.get(key)
+            for key in ("categories", "doi", "journal-ref", "comments", "license", "update_date")
+            if item.get(key)
+        }
+    }
+
+
+def _snapshot_authors(item: dict) -> list[PaperAuthor]:
+    parsed = item.get("authors_parsed")
+    if parsed:
+        authors = []
+        for parts in parsed:
+            last, first, suffix = (list(parts) + ["", "", ""])[:3]
+            name = " ".join(part for part in (first, last, suffix) if part)
+            if name:
+                authors.append(PaperAuthor(name=name))
+        return authors
+    raw = item.get("authors") or ""
+    names = raw.replace(" and ", ", ").split(",")
+    return [PaperAuthor(name=name.strip()) for name in names if name.strip()]
+
+
+def _first_version_date(item: dict) -> Optional[datetime]:
+    versions = item.get("versions") or []
+    if versions:
+        created = versions[0].get("created")
+        if created:
+            try:
+                return parsedate_to_datetime(created)
+            except (TypeError, ValueError):
+                pass
+    update_date = item.get("update_date")
+    if update_date:
+        try:
+            return datetime.fromisoformat(update_date)
+        except ValueError:
+            return None
+    return None
+
+
+def _matches_categories(paper_categories: list[str], wanted: set[str]) -> bool:
+    for category in paper_categories:
+        if category in wanted or category.split(".", 1)[0] in wanted:
+            return True
+    return False
+
+
+def _open_snapshot(path: Path) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open("r", encoding="utf-8")
@@ -1,18 +1,37 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional
 from xml.etree import ElementTree
 
 import httpx
 
 from .models import PaperAuthor, PaperMetadata, normalize_arxiv_id
 
+logger = logging.getLogger(__name__)
+
 ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ARXIV_ID_LIST_BATCH_SIZE = 200
+ARXIV_PAGE_SIZE = 100
+# arXiv asks API clients to wait three seconds between calls.
+ARXIV_RETRY_SECONDS = 3.0
 
 
 class ArxivClient:
-    def __init__(self, timeout_seconds: float = 20.0) -> None:
-        self._client = httpx.Client(
+    def __init__(
+        self,
+        timeout_seconds: float = 20.0,
+        http_client: Optional[httpx.Client] = None,
+        max_retries: int = 4,
+        retry_seconds: float = ARXIV_RETRY_SECONDS,
+    ) -> None:
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self._client = http_client or httpx.Client(
             timeout=timeout_seconds,
             follow_redirects=True,
         )
@@ -23,50 +42,162 @@ class ArxivClient:
             return None
         params = {"id_list": normalized_id}
         data = self._get_text(ARXIV_API_URL, params=params)
-        return self._parse_feed_entry(data)[0] if data else None
+        entries = self._parse_feed_entry(data) if data else []
+        return entries[0] if entries else None
+
+    def fetch_many(
+        self,
+        arxiv_ids: Iterable[str],
+        batch_size: int = ARXIV_ID_LIST_BATCH_SIZE,
+    ) -> Dict[str, Optional[PaperMetadata]]:
+        """Resolve many arXiv IDs with one ``id_list`` query per batch.
+
+        Returns a mapping from each input ID to its metadata, in input order;
+        IDs the API did not return map to ``None``.
+        """
+        results: Dict[str, Optional[PaperMetadata]] = {}
+        pending: Dict[str, List[str]] = {}
+        for arxiv_id in arxiv_ids:
+            results[arxiv_id] = None
+            normalized_id = normalize_arxiv_id(arxiv_id)
+            if normalized_id:
+                pending.setdefault(normalized_id, []).append(arxiv_id)
+
+        normalized_ids = list(pending)
+        for start in range(0, len(normalized_ids), batch_size):
+            chunk = normalized_ids[start : start + batch_size]
+            params = {
+                "id_list": ",".join(chunk),
+                "max_results": len(chunk),
+            }
+            status, data = self._get_batch(params)
+            if status == 400:
+                # A single malformed ID fails the whole id_list query, so
+                # fall back to per-ID lookups for this chunk only.
+                entries = [
+                    entry
+                    for entry in (self.fetch_by_id(item) for item in chunk)
+                    if entry
+                ]
+            else:
+                entries = self._parse_feed_entry(data) if data else []
+            for entry in entries:
+                for original_id in pending.get(entry.arxiv_id or "", []):
+                    results[original_id] = entry
+
+        missing = [key for key, value in results.items() if value is None]
+        if missing:
+            logger.warning(
+                "arXiv returned no metadata for %d of %d IDs: %s",
+                len(missing),
+                len(results),
+                ", ".join(missing[:20]),
+            )
+        return results
 
     def search(
         self,
         query: str,
         max_results: int = 5,
         from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
     ) -> List[PaperMetadata]:
+        return list(
+            self.iter_search(
+                query,
+                max_results=max_results,
+                from_date=from_date,
+                to_date=to_date,
+            )
+        )
+
+    def iter_search(
+        self,
+        query: str,
+        max_results: int = 5,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        page_size: int = ARXIV_PAGE_SIZE,
+    ) -> Iterator[PaperMetadata]:
+        """Yield search results page by page as they arrive.
+
+        A date window is sent to arXiv as a ``submittedDate`` range sorted
+        newest first, so paging stops as soon as results leave the window.
+        The next page is requested in the background while the caller
+        consumes the current one.
+        """
         if max_results <= 0:
-            return []
+            return
+        window_start = parse_day(from_date)
+        window_end = parse_day(to_date, end=True)
+        params: Dict = {"search_query": _build_search_query(query, window_start, window_end)}
+        if window_start or window_end:
+            params["sortBy"] = "submittedDate"
+            params["sortOrder"] = "descending"
 
-        page_size = 100
-        collected: List[PaperMetadata] = []
-        start = 0
-        total_pages = (max_results + page_size - 1) // page_size
-        for page_index in range(total_pages):
-            remaining = max_results - len(collected)
-            if remaining <= 0:
-                break
-            batch_size = min(page_size, remaining)
-            params = {
-                "search_query": f"all:{query}",
-                "start": start,
-                "max_results": batch_size,
-            }
-            data = self._get_text(ARXIV_API_URL, params=params)
-            batch = self._parse_feed_entry(data) if data else []
-            if not batch:
+        def fetch_page(start: int, size: int) -> List[PaperMetadata]:
+            data = self._get_text(
+                ARXIV_API_URL,
+                params={**params, "start": start, "max_results": size},
+            )
+            return self._parse_feed_entry(data) if data else []
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            start = 0
+            size = min(page_size, max_results)
+            pending: Optional[Future] = executor.submit(fetch_page, start, size)
+            yielded = 0
+            while pending is not None:
+                batch = pending.result()
+                pending = None
+                start += size
+                remaining = max_results - yielded - len(batch)
+                oldest = batch[-1].published_at if batch else None
+                in_window = not (
+                    window_start and oldest and oldest.date() < window_start
+                )
+                if len(batch) == size and remaining > 0 and in_window:
+                    size = min(page_size, remaining)
+                    pending = executor.submit(fetch_page, start, size)
+                for item in batch:
+                    published = item.published_at
+                    if window_start and published and published.date() < window_start:
+                        return
+                    yield item
+                    yielded += 1
+                    if yielded >= max_results:
+                        return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_batch(self, params: Dict) -> tuple[int, Optional[str]]:
+        """GET an ``id_list`` query, backing off on 429 and 5xx responses."""
+        for attempt in range(self.max_retries + 1):
+            response = self._client.get(ARXIV_API_URL, params=params)
+            status = response.status_code
+            if status == 200:
+                return status, response.text
+            if status != 429 and status < 500:
+                return status, None
+            if attempt == self.max_retries:
                 break
-            if from_date:
-                try:
-                    from_year = int(from_date.split("-", 1)[0])
-                except (ValueError, AttributeError):
-                    from_year = None
-                if from_year:
-                    batch = [
-                        item
-                        for item in batch
-                        if item.publication_year
-                        and item.publication_year >= from_year
-                    ]
-            collected.extend(batch)
-            start += batch_size
-        return collected[:max_results]
+            delay = max(
+                _retry_after_seconds(response) or 0.0,
+                self.retry_seconds * 2**attempt,
+            )
+            logger.warning(
+                "arXiv returned %d for an id_list batch; retrying in %.1fs",
+                status,
+                delay,
+            )
+            time.sleep(delay)
+        logger.error(
+            "arXiv id_list batch still failing with %d after %d attempts",
+            status,
+            self.max_retries + 1,
+        )
+        return status, None
 
     def _get_text(self, url: str, params: Optional[Dict] = None) -> Optional[str]:
         response = self._client.get(url, params=params)
@@ -102,7 +233,8 @@ class ArxivClient:
                 default="",
                 namespaces=namespace,
             )
-            year = int(published[:4]) if published else None
+            published_at = _parse_timestamp(published)
+            year = published_at.year if published_at else None
             arxiv_id = normalize_arxiv_id(
                 entry.findtext(
                     "atom:id",
@@ -129,6 +261,7 @@ class ArxivClient:
                     abstract=summary,
                     authors=authors,
                     publication_year=year,
+                    published_at=published_at,
                     venue=_first(_arxiv_categories(entry, namespace)),
                     arxiv_id=arxiv_id,
                     url=entry.findtext(
@@ -143,6 +276,69 @@ class ArxivClient:
         return entries
 
 
+def _build_search_query(
+    query: str,
+    window_start: Optional[date],
+    window_end: Optional[date],
+) -> str:
+    search_query = f"all:{query}"
+    if not window_start and not window_end:
+        return search_query
+    lower = window_start.strftime("%Y%m%d0000") if window_start else "000001010000"
+    upper = window_end.strftime("%Y%m%d2359") if window_end else "999912312359"
+    # Parenthesised so an OR in the query cannot swallow the date range.
+    return f"({search_query}) AND submittedDate:[{lower} TO {upper}]"
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_day(value: Optional[str], end: bool = False) -> Optional[date]:
+    """Parse ``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD`` into a window bound.
+
+    A year or month stands for its first day, or its last day with ``end``.
+    Anything else raises ``ValueError`` rather than widening the search.
+    """
+    if not value:
+        return None
+    text = value.strip()[:10]
+    try:
+        if len(text) == 4:
+            year = int(text)
+            return date(year, 12, 31) if end else date(year, 1, 1)
+        if len(text) == 7 and text[4] == "-":
+            first = date(int(text[:4]), int(text[5:]), 1)
+            if not end:
+                return first
+            next_month = (first + timedelta(days=31)).replace(day=1)
+            return next_month - timedelta(days=1)
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(
+            f"Invalid date {value!r}; expected YYYY, YYYY-MM or YYYY-MM-DD"
+        ) from None
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
 def _arxiv_categories(
     entry: ElementTree.Element,
     namespace: Dict[str, str],
@@ -0,0 +1,647 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .compression import decompress_text, is_compressed
+from .models import PaperRecord
+from .storage import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_UPSERT_BYTES,
+    DEFAULT_UPSERT_ROWS,
+    PAPER_COLUMNS,
+    STATUS_DONE,
+    STATUS_EMPTY,
+    STATUS_FAILED,
+    STATUS_LEASED,
+    STATUS_NO_TEXT,
+    STATUS_PENDING,
+    PaperRow,
+    _PageTextLoader,
+    _chunk_rows,
+    _concept_page_query,
+    _concept_rows,
+    _decode_row,
+    _defer_text,
+    _paper_row,
+    _paper_scan_query,
+    _processing_row,
+    _projection,
+    _unprocessed_statuses,
+)
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps bound parameters per statement (32766 on current builds, 999 on
+# old ones); IN lists are chunked well below the old limit.
+_IN_BATCH = 500
+
+# Ordered and append-only; PRAGMA user_version records the last one applied.
+_MIGRATIONS = (
+    (
+        """
+        CREATE TABLE IF NOT EXISTS papers (
+            paper_id TEXT PRIMARY KEY,
+            title TEXT,
+            abstract TEXT,
+            venue TEXT,
+            source TEXT,
+            doi TEXT,
+            arxiv_id TEXT,
+            openalex_id TEXT,
+            crossref_id TEXT,
+            url TEXT,
+            pdf_url TEXT,
+            publication_year INTEGER,
+            authors TEXT,
+            raw_text TEXT,
+            source_payload TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS paper_concepts (
+            paper_id TEXT NOT NULL,
+            concept_id TEXT NOT NULL,
+            concept_name TEXT,
+            summary TEXT,
+            source TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (paper_id, concept_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS paper_processing (
+            paper_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            content_hash TEXT,
+            prompt_version TEXT,
+            concept_count INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            processed_at TEXT,
+            lease_owner TEXT,
+            lease_expires_at TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_processing_status
+        ON paper_processing (status, paper_id)
+        """,
+    ),
+    (
+        """
+        CREATE INDEX IF NOT EXISTS idx_processing_lease
+        ON paper_processing (status, lease_expires_at)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_concepts_concept
+        ON paper_concepts (concept_id, paper_id)
+        """,
+    ),
+)
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+_PAPER_UPSERT_SQL = (
+    "INSERT INTO papers ("
+    + ", ".join(PAPER_COLUMNS)
+    + ") VALUES ("
+    + ", ".join(["?"] * len(PAPER_COLUMNS))
+    + ") ON CONFLICT(paper_id) DO UPDATE SET "
+    + ", ".join(
+        # Metadata-only saves (snapshot loads) keep previously stored text.
+        f"{column} = COALESCE(excluded.{column}, papers.{column})"
+        if column == "raw_text"
+        else f"{column} = excluded.{column}"
+        for column in PAPER_COLUMNS[1:]
+    )
+)
+# Same rules as the MySQL upsert; SQLite evaluates every SET expression
+# against the old row, so no ordering tricks are needed.
+_PROCESSING_UPSERT_SQL = """
+    INSERT INTO paper_processing (paper_id, status, content_hash)
+    VALUES (?, ?, ?)
+    ON CONFLICT(paper_id) DO UPDATE SET
+        status = CASE
+            WHEN excluded.content_hash IS NULL THEN status
+            WHEN content_hash IS NULL
+                THEN CASE WHEN status = 'no_text' THEN 'pending' ELSE status END
+            WHEN content_hash <> excluded.content_hash THEN 'pending'
+            ELSE status
+        END,
+        attempts = CASE
+            WHEN content_hash <> excluded.content_hash THEN 0
+            ELSE attempts
+        END,
+        content_hash = COALESCE(excluded.content_hash, content_hash),
+        updated_at = CURRENT_TIMESTAMP
+"""
+_CONCEPT_UPSERT_SQL = """
+    INSERT INTO paper_concepts (paper_id, concept_id, concept_name, summary, source)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(paper_id, concept_id) DO UPDATE SET
+        concept_name = excluded.concept_name,
+        summary = excluded.summary,
+        source = excluded.source
+"""
+
+
+class SQLitePaperStore:
+    """Embedded drop-in for ``MySQLPaperStore`` backed by one SQLite file.
+
+    The database runs in WAL mode so readers never block the writer; each
+    thread gets its own connection, and every public write is one
+    transaction. Leasing works across processes on the same host
+    (``BEGIN IMMEDIATE`` serializes claims) but not across machines.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "data/paperatlas.db",
+        compression: Optional[str] = None,
+        busy_timeout_ms: int = 30000,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._migrate()
+
+    def save(self, record: PaperRecord) -> None:
+        self.save_many([record])
+
+    def save_many(
+        self,
+        records: Iterable[PaperRecord],
+        max_rows: int = DEFAULT_UPSERT_ROWS,
+        max_bytes: int = DEFAULT_UPSERT_BYTES,
+    ) -> int:
+        """Upsert papers in transactions of up to ``max_rows`` rows."""
+        records = list(records)
+        rows = [_paper_row(record, self.compression) for record in records]
+        if not rows:
+            return 0
+        processing = {
+            row[0]: _processing_row(row[0], record.raw_text)
+            for row, record in zip(rows, records)
+        }
+        written = 0
+        for chunk in _chunk_rows(rows, max_rows, max_bytes):
+            with self._transaction() as conn:
+                conn.executemany(_PAPER_UPSERT_SQL, chunk)
+                conn.executemany(
+                    _PROCESSING_UPSERT_SQL,
+                    [processing[row[0]] for row in chunk],
+                )
+            written += len(chunk)
+        return written
+
+    def fetch_papers(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        require_raw_text: bool = True,
+        after_paper_id: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        return self._fetch_page(
+            limit,
+            offset,
+            require_raw_text,
+            after_paper_id,
+            unprocessed=False,
+            fields=fields,
+        )
+
+    def fetch_unprocessed_papers(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        require_raw_text: bool = True,
+        after_paper_id: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        return self._fetch_page(
+            limit,
+            offset,
+            require_raw_text,
+            after_paper_id,
+            unprocessed=True,
+            fields=fields,
+        )
+
+    def count_unprocessed_papers(self, require_raw_text: bool = True) -> int:
+        statuses = _unprocessed_statuses(require_raw_text)
+        placeholders = ", ".join(["?"] * len(statuses))
+        row = self._conn().execute(
+            f"SELECT COUNT(*) FROM paper_processing WHERE status IN ({placeholders})",
+            statuses,
+        ).fetchone()
+        return row[0] if row else 0
+
+    def iter_papers(
+        self,
+        require_raw_text: bool = True,
+        unprocessed: bool = False,
+        after_paper_id: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[dict]:
+        columns = _projection(fields)
+        query, params = _paper_scan_query(
+            require_raw_text,
+            unprocessed,
+            after_paper_id,
+            columns=columns,
+        )
+        # A dedicated connection keeps the long-lived read cursor out of the
+        # thread's write transactions.
+        conn = self._open()
+        try:
+            cursor = conn.execute(_qmark(query), params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from self._paper_rows(rows, columns)
+        finally:
+            conn.close()
+
+    def iter_concepts(self, batch_size: int = 1000) -> Iterator[dict]:
+        after: Optional[tuple[str, str]] = None
+        while True:
+            query, params = _concept_page_query(after, batch_size)
+            rows = self._conn().execute(_qmark(query), params).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            after = (rows[-1]["paper_id"], rows[-1]["concept_id"])
+
+    def fetch_paper_by_id(
+        self,
+        paper_id: str,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Optional[dict]:
+        rows = self.fetch_papers_by_ids([paper_id], fields=fields)
+        return rows[0] if rows else None
+
+    def fetch_papers_by_ids(
+        self,
+        paper_ids: Iterable[str],
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        columns = _projection(fields)
+        rows = []
+        for chunk in _chunks(list(paper_ids)):
+            placeholders = ", ".join(["?"] * len(chunk))
+            rows.extend(
+                self._conn().execute(
+                    f"SELECT {', '.join(columns)} FROM papers "
+                    f"WHERE paper_id IN ({placeholders})",
+                    chunk,
+                )
+            )
+        rows.sort(key=lambda row: row["paper_id"])
+        return self._paper_rows(rows, columns)
+
+    def fetch_papers_missing_text(
+        self,
+        limit: int = 100,
+        after_paper_id: Optional[str] = None,
+    ) -> list[dict]:
+        columns = tuple(column for column in PAPER_COLUMNS if column != "raw_text")
+        rows = self._conn().execute(
+            f"""
+            SELECT {", ".join(f"p.{column}" for column in columns)}
+            FROM paper_processing pp
+            JOIN papers p ON p.paper_id = pp.paper_id
+            WHERE pp.status = ?
+            AND p.pdf_url IS NOT NULL
+            AND pp.paper_id > ?
+            ORDER BY pp.paper_id
+            LIMIT ?
+            """,
+            (STATUS_NO_TEXT, after_paper_id or "", limit),
+        ).fetchall()
+        return [_decode_row(dict(row)) for row in rows]
+
+    def existing_ids(
+        self,
+        paper_ids: Iterable[str],
+        batch_size: int = _IN_BATCH,
+    ) -> set[str]:
+        found: set[str] = set()
+        for chunk in _chunks(list(dict.fromkeys(paper_ids)), batch_size):
+            placeholders = ", ".join(["?"] * len(chunk))
+            found.update(
+                row[0]
+                for row in self._conn().execute(
+                    f"SELECT paper_id FROM papers WHERE paper_id IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return found
+
+    def load_raw_text(self, rows: Iterable[dict], batch_size: int = _IN_BATCH) -> None:
+        pending = [
+            row
+            for row in rows
+            if not (row.text_loaded() if isinstance(row, PaperRow) else "raw_text" in row)
+        ]
+        for row in pending:
+            if isinstance(row, PaperRow):
+                row._loader = None
+        texts: dict[str, Optional[str]] = {}
+        for chunk in _chunks([row["paper_id"] for row in pending], batch_size):
+            placeholders = ", ".join(["?"] * len(chunk))
+            texts.update(
+                (row[0], row[1])
+                for row in self._conn().execute(
+                    f"SELECT paper_id, raw_text FROM papers WHERE paper_id IN ({placeholders})",
+                    chunk,
+                )
+            )
+        for row in pending:
+            text = texts.get(row["paper_id"])
+            if isinstance(row, PaperRow) and is_compressed(text):
+                row._packed = text
+            else:
+                row["raw_text"] = decompress_text(text)
+
+    def save_concepts(self, records: list[dict]) -> None:
+        if not records:
+            return
+        with self._transaction() as conn:
+            conn.executemany(_CONCEPT_UPSERT_SQL, _concept_rows(records))
+
+    def complete_paper(
+        self,
+        paper_id: str,
+        records: list[dict],
+        prompt_version: Optional[str] = None,
+        worker_id: Optional[str] = None,
+    ) -> bool:
+        with self._transaction(immediate=True) as conn:
+            if worker_id is not None:
+                row = conn.execute(
+                    "SELECT status, lease_owner FROM paper_processing WHERE paper_id = ?",
+                    (paper_id,),
+                ).fetchone()
+                if not row or row[0] != STATUS_LEASED or row[1] != worker_id:
+                    return False
+            if records:
+                conn.executemany(_CONCEPT_UPSERT_SQL, _concept_rows(records))
+            conn.execute(
+                """
+                INSERT INTO paper_processing (
+                    paper_id, status, attempts, prompt_version, concept_count,
+                    processed_at
+                )
+                VALUES (?, ?, 1, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(paper_id) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = attempts + 1,
+                    prompt_version = excluded.prompt_version,
+                    concept_count = excluded.concept_count,
+                    last_error = NULL,
+                    processed_at = CURRENT_TIMESTAMP,
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (
+                    paper_id,
+                    STATUS_DONE if records else STATUS_EMPTY,
+                    prompt_version,
+                    len(records),
+                ),
+            )
+        return True
+
+    def mark_failed(
+        self,
+        paper_id: str,
+        error: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        owner_condition = "AND lease_owner = ?" if worker_id is not None else ""
+        params = [max_attempts, STATUS_FAILED, STATUS_PENDING, error[:2000], paper_id]
+        if worker_id is not None:
+            params.append(worker_id)
+        with self._transaction() as conn:
+            conn.execute(
+                f"""
+                UPDATE paper_processing
+                SET
+                    attempts = attempts + 1,
+                    status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END,
+                    last_error = ?,
+                    processed_at = CURRENT_TIMESTAMP,
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE paper_id = ?
+                {owner_condition}
+                """,
+                params,
+            )
+
+    def requeue_stale(self, prompt_version: str) -> int:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE paper_processing
+                SET status = ?, attempts = 0, updated_at = CURRENT_TIMESTAMP
+                WHERE status IN (?, ?)
+                AND (prompt_version IS NULL OR prompt_version <> ?)
+                """,
+                (STATUS_PENDING, STATUS_DONE, STATUS_EMPTY, prompt_version),
+            )
+            return cursor.rowcount
+
+    def claim_papers(
+        self,
+        worker_id: str,
+        limit: int = 50,
+        lease_seconds: int = 600,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        with self._transaction(immediate=True) as conn:
+            conn.execute(
+                """
+                UPDATE paper_processing
+                SET
+                    attempts = attempts + 1,
+                    status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END,
+                    last_error = 'lease expired',
+                    lease_owner = NULL,
+                    lease_expires_at = NULL
+                WHERE status = ? AND lease_expires_at < CURRENT_TIMESTAMP
+                """,
+                (max_attempts, STATUS_FAILED, STATUS_PENDING, STATUS_LEASED),
+            )
+            paper_ids = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT paper_id FROM paper_processing
+                    WHERE status = ?
+                    ORDER BY paper_id
+                    LIMIT ?
+                    """,
+                    (STATUS_PENDING, limit),
+                )
+            ]
+            for chunk in _chunks(paper_ids):
+                placeholders = ", ".join(["?"] * len(chunk))
+                conn.execute(
+                    f"""
+                    UPDATE paper_processing
+                    SET
+                        status = ?,
+                        lease_owner = ?,
+                        lease_expires_at = datetime('now', '+' || ? || ' seconds')
+                    WHERE paper_id IN ({placeholders})
+                    """,
+                    [STATUS_LEASED, worker_id, lease_seconds, *chunk],
+                )
+        return self.fetch_papers_by_ids(paper_ids, fields=fields)
+
+    def heartbeat(
+        self,
+        worker_id: str,
+        paper_ids: Iterable[str],
+        lease_seconds: int = 600,
+    ) -> int:
+        held = 0
+        with self._transaction() as conn:
+            for chunk in _chunks(list(paper_ids)):
+                placeholders = ", ".join(["?"] * len(chunk))
+                held += conn.execute(
+                    f"""
+                    UPDATE paper_processing
+                    SET lease_expires_at = datetime('now', '+' || ? || ' seconds')
+                    WHERE status = ? AND lease_owner = ?
+                    AND paper_id IN ({placeholders})
+                    """,
+                    [lease_seconds, STATUS_LEASED, worker_id, *chunk],
+                ).rowcount
+        return held
+
+    def release_papers(self, worker_id: str, paper_ids: Iterable[str]) -> None:
+        with self._transaction() as conn:
+            for chunk in _chunks(list(paper_ids)):
+                placeholders = ", ".join(["?"] * len(chunk))
+                conn.execute(
+                    f"""
+                    UPDATE paper_processing
+                    SET status = ?, lease_owner = NULL, lease_expires_at = NULL
+                    WHERE status = ? AND lease_owner = ?
+                    AND paper_id IN ({placeholders})
+                    """,
+                    [STATUS_PENDING, STATUS_LEASED, worker_id, *chunk],
+                )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _fetch_page(
+        self,
+        limit: int,
+        offset: int,
+        require_raw_text: bool,
+        after_paper_id: Optional[str],
+        unprocessed: bool,
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        columns = _projection(fields)
+        query, params = _paper_scan_query(
+            require_raw_text,
+            unprocessed,
+            after_paper_id,
+            columns=columns,
+            limit=limit,
+            offset=offset,
+        )
+        rows = self._conn().execute(_qmark(query), params).fetchall()
+        return self._paper_rows(rows, columns)
+
+    def _paper_rows(
+        self,
+        rows: list[sqlite3.Row],
+        columns: tuple[str, ...],
+    ) -> list[PaperRow]:
+        loaded = [_defer_text(PaperRow(_decode_row(dict(row)))) for row in rows]
+        if "raw_text" not in columns and loaded:
+            loader = _PageTextLoader(self, loaded)
+            for row in loaded:
+                row._loader = loader
+        return loaded
+
+    def _migrate(self) -> None:
+        conn = self._conn()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # BEGIN IMMEDIATE takes the write lock, so concurrent openers wait
+        # and then see the bumped user_version.
+        with self._transaction(immediate=True) as conn:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, statements in enumerate(_MIGRATIONS, start=1):
+                if version <= current:
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {version}")
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are explicit in _transaction().
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+
+def _qmark(query: str) -> str:
+    return query.replace("%s", "?")
+
+
+def _chunks(items: list, size: int = _IN_BATCH) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
@@ -1,283 +1,597 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
-from .models import PaperRecord
+from .compression import compress_text, decompress_text, is_compressed
+from .config import (
+    MAX_MYSQL_POOL_SIZE,
+    get_mysql_config,
+    get_mysql_pool_size,
+    get_sqlite_path,
+    get_store_backend,
+)
+from .models import PaperMetadata, PaperRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPSERT_ROWS = 500
+# Well under MySQL's default 64MB max_allowed_packet, leaving room for
+# escaping overhead on full-text rows.
+DEFAULT_UPSERT_BYTES = 16 * 1024 * 1024
+
+PAPER_COLUMNS = (
+    "paper_id",
+    "title",
+    "abstract",
+    "venue",
+    "source",
+    "doi",
+    "arxiv_id",
+    "openalex_id",
+    "crossref_id",
+    "url",
+    "pdf_url",
+    "publication_year",
+    "authors",
+    "raw_text",
+    "source_payload",
+)
+# Columns needed for metadata-only work (graph sync, exports, listings).
+PAPER_METADATA_FIELDS = tuple(
+    column for column in PAPER_COLUMNS if column not in ("raw_text", "source_payload")
+)
+_LAZY_FIELDS = ("raw_text",)
+# paper_processing.status values. Papers without text wait in "no_text"
+# until a PDF is parsed; "pending" is the work queue and "leased" marks
+# papers a worker has claimed; failed papers go back to "pending" until they
+# run out of attempts.
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_NO_TEXT = "no_text"
+STATUS_DONE = "done"
+STATUS_EMPTY = "empty"
+STATUS_FAILED = "failed"
+DEFAULT_MAX_ATTEMPTS = 3
+_SCAN_RETRIES = 3
+# Saving a paper queues it for extraction when it first gets text or its text
+# changes; re-saving identical text leaves finished papers alone. Assignments
+# run left to right, so status and attempts compare against the old hash.
+_PROCESSING_UPSERT_SQL = (
+    "INSERT INTO paper_processing (paper_id, status, content_hash) VALUES {values} "
+    "ON DUPLICATE KEY UPDATE "
+    "status = CASE "
+    "WHEN VALUES(content_hash) IS NULL THEN status "
+    "WHEN content_hash IS NULL THEN IF(status = 'no_text', 'pending', status) "
+    "WHEN content_hash <> VALUES(content_hash) THEN 'pending' "
+    "ELSE status END, "
+    "attempts = IF(content_hash <> VALUES(content_hash), 0, attempts), "
+    "content_hash = COALESCE(VALUES(content_hash), content_hash)"
+)
+_CONCEPT_UPSERT_SQL = """
+    INSERT INTO paper_concepts (
+        paper_id,
+        concept_id,
+        concept_name,
+        summary,
+        source
+    )
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        concept_name = VALUES(concept_name),
+        summary = VALUES(summary),
+        source = VALUES(source)
+"""
+_PAPER_ROW_PLACEHOLDER = "(" + ", ".join(["%s"] * len(PAPER_COLUMNS)) + ")"
+_PAPER_UPSERT_SQL = (
+    "INSERT INTO papers ("
+    + ", ".join(PAPER_COLUMNS)
+    + ") VALUES {values} ON DUPLICATE KEY UPDATE "
+    + ", ".join(
+        # Metadata-only saves (snapshot loads) keep previously stored text.
+        f"{column} = COALESCE(VALUES({column}), {column})"
+        if column == "raw_text"
+        else f"{column} = VALUES({column})"
+        for column in PAPER_COLUMNS[1:]
+    )
+)
 
 
 class JsonPaperStore:
-    def __init__(self, base_dir: str | Path = "data/papers") -> None:
+    def __init__(
+        self,
+        base_dir: str | Path = "data/papers",
+        compression: Optional[str] = None,
+    ) -> None:
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
 
     def save(self, record: PaperRecord) -> Path:
         paper_id = record.metadata.canonical_id()
         safe_id = _safe_filename(paper_id)
+        path = self.base_dir / f"{safe_id}.json"
+        raw_text = compress_text(record.raw_text, self.compression)
+        if raw_text is None and path.exists():
+            # Metadata-only saves (snapshot loads) keep previously stored text.
+            with path.open("r", encoding="utf-8") as handle:
+                raw_text = json.load(handle).get("raw_text")
         payload = {
             "paper_id": paper_id,
             "metadata": record.metadata.model_dump(mode="json"),
-            "raw_text": record.raw_text,
+            "raw_text": raw_text,
             "source_payload": record.source_payload,
         }
-        path = self.base_dir / f"{safe_id}.json"
         with path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=True, indent=2)
+            json.dump(payload, handle, ensure_ascii=True, separators=(",", ":"))
         return path
 
+    def save_many(self, records: Iterable[PaperRecord]) -> int:
+        count = 0
+        for record in records:
+            self.save(record)
+            count += 1
+        return count
+
     def load(self, paper_id: str) -> Optional[dict]:
         path = self.base_dir / f"{_safe_filename(paper_id)}.json"
         if not path.exists():
             return None
         with path.open("r", encoding="utf-8") as handle:
-            return json.load(handle)
+            return _defer_text(PaperRow(json.load(handle)))
+
+    def existing_ids(self, paper_ids: Iterable[str]) -> set[str]:
+        return {
+            paper_id
+            for paper_id in paper_ids
+            if (self.base_dir / f"{_safe_filename(paper_id)}.json").exists()
+        }
+
+
+class PaperRow(dict):
+    """Row dict whose ``raw_text`` is loaded on first access.
+
+    Rows fetched with a projection that leaves out ``raw_text`` share a
+    loader per page, so the first access on any of them pulls the texts for
+    the whole page in one follow-up query. Compressed text is kept packed
+    until it is read or the row is iterated, so ``dict(row)`` and
+    ``json.dumps(row)`` see plain text.
+    """
+
+    __slots__ = ("_loader", "_packed")
+
+    def __init__(self, *args, loader=None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._loader = loader
+        self._packed: Optional[str] = None
+
+    def __missing__(self, key):
+        if key not in _LAZY_FIELDS:
+            raise KeyError(key)
+        if self._packed is None and self._loader is not None:
+            self._loader()
+            if key in self:
+                return dict.__getitem__(self, key)
+        if self._packed is None:
+            raise KeyError(key)
+        self._unpack()
+        return dict.__getitem__(self, key)
+
+    # dict(), json.dumps() and copies read through these rather than
+    # __getitem__, so they unpack first.
+    def __iter__(self):
+        self._unpack()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self._unpack()
+        return dict.keys(self)
+
+    def values(self):
+        self._unpack()
+        return dict.values(self)
+
+    def items(self):
+        self._unpack()
+        return dict.items(self)
+
+    def _unpack(self) -> None:
+        if self._packed is not None:
+            self["raw_text"] = decompress_text(self._packed)
+            self._packed = None
+
+    def text_loaded(self) -> bool:
+        """Whether ``raw_text`` is available without another query."""
+        return "raw_text" in self or self._packed is not None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
 
 
 class MySQLPaperStore:
-    def __init__(self, config: dict) -> None:
+    def __init__(
+        self,
+        config: dict,
+        pool_size: Optional[int] = None,
+        compression: Optional[str] = None,
+    ) -> None:
         self._config = config
+        self.compression = compression
+        if pool_size is None:
+            pool_size = get_mysql_pool_size()
+        if pool_size > MAX_MYSQL_POOL_SIZE:
+            logger.warning(
+                "MySQL pool size %d exceeds connector limit; using %d",
+                pool_size,
+                MAX_MYSQL_POOL_SIZE,
+            )
+            pool_size = MAX_MYSQL_POOL_SIZE
+        self._pool_size = max(pool_size, 0)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # mysql.connector raises PoolError when the pool is exhausted, so
+        # checkouts wait on a semaphore instead of failing under load.
+        self._pool_slots = (
+            threading.BoundedSemaphore(self._pool_size)
+            if self._pool_size
+            else None
+        )
         self._ensure_schema()
 
     def _ensure_schema(self) -> None:
-        conn = self._connect()
-        try:
+        """Bring the database up to ``SCHEMA_VERSION``.
+
+        The common case is one indexed read of ``schema_migrations`` (and
+        nothing at all for later stores on the same database in this
+        process). Pending migrations run in order under a named lock, so
+        concurrent workers starting together apply each one exactly once.
+        """
+        key = (
+            self._config.get("host"),
+            self._config.get("port"),
+            self._config.get("database"),
+        )
+        if key in _SCHEMA_READY:
+            return
+        with self._connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS papers (
-                        paper_id VARCHAR(255) PRIMARY KEY,
-                        title TEXT,
-                        abstract LONGTEXT,
-                        venue VARCHAR(255),
-                        source VARCHAR(50),
-                        doi VARCHAR(255),
-                        arxiv_id VARCHAR(255),
-                        openalex_id VARCHAR(255),
-                        crossref_id VARCHAR(255),
-                        url TEXT,
-                        pdf_url TEXT,
-                        publication_year INT,
-                        authors JSON,
-                        raw_text LONGTEXT,
-                        source_payload JSON
-                    )
-                    """
-                )
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS paper_concepts (
-                        paper_id VARCHAR(255) NOT NULL,
-                        concept_id VARCHAR(64) NOT NULL,
-                        concept_name TEXT,
-                        summary LONGTEXT,
-                        source VARCHAR(50),
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (paper_id, concept_id)
-                    )
-                    """
-                )
-                cursor.execute("SELECT DATABASE()")
-                database = cursor.fetchone()[0]
-                cursor.execute(
-                    """
-                    SELECT COLUMN_NAME
-                    FROM INFORMATION_SCHEMA.COLUMNS
-                    WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'papers'
-                    """,
-                    (database,),
-                )
-                existing_columns = {row[0] for row in cursor.fetchall()}
-                for column, column_type in _column_definitions().items():
-                    if column in existing_columns:
-                        continue
-                    cursor.execute(
-                        f"ALTER TABLE papers ADD COLUMN {column} {column_type}"
-                    )
-                conn.commit()
+                if _schema_version(cursor) < SCHEMA_VERSION:
+                    cursor.execute("SELECT GET_LOCK(%s, %s)", (_SCHEMA_LOCK, 300))
+                    if cursor.fetchone()[0] != 1:
+                        raise RuntimeError("Timed out waiting for the schema lock.")
+                    try:
+                        _apply_migrations(conn, cursor)
+                    finally:
+                        cursor.execute("SELECT RELEASE_LOCK(%s)", (_SCHEMA_LOCK,))
+                        cursor.fetchone()
             finally:
                 cursor.close()
-        finally:
-            conn.close()
+        _SCHEMA_READY.add(key)
 
     def save(self, record: PaperRecord) -> None:
-        paper_id = record.metadata.canonical_id()
-        metadata = record.metadata.model_dump(mode="json")
-        conn = self._connect()
-        try:
+        self.save_many([record])
+
+    def save_many(
+        self,
+        records: Iterable[PaperRecord],
+        max_rows: int = DEFAULT_UPSERT_ROWS,
+        max_bytes: int = DEFAULT_UPSERT_BYTES,
+    ) -> int:
+        """Upsert papers with multi-row statements, one commit per chunk.
+
+        Chunks are bounded by row count and by an estimate of the statement
+        size so a batch of full-text papers stays under ``max_allowed_packet``.
+        Returns the number of rows written.
+        """
+        records = list(records)
+        rows = [_paper_row(record, self.compression) for record in records]
+        if not rows:
+            return 0
+        processing = {
+            row[0]: _processing_row(row[0], record.raw_text)
+            for row, record in zip(rows, records)
+        }
+        written = 0
+        with self._connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute(
-                    """
-                    INSERT INTO papers (
-                        paper_id,
-                        title,
-                        abstract,
-                        venue,
-                        source,
-                        doi,
-                        arxiv_id,
-                        openalex_id,
-                        crossref_id,
-                        url,
-                        pdf_url,
-                        publication_year,
-                        authors,
-                        raw_text,
-                        source_payload
-                    )
-                    VALUES (
-                        %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s
+                for chunk in _chunk_rows(rows, max_rows, max_bytes):
+                    placeholders = ", ".join([_PAPER_ROW_PLACEHOLDER] * len(chunk))
+                    cursor.execute(
+                        _PAPER_UPSERT_SQL.format(values=placeholders),
+                        [value for row in chunk for value in row],
                     )
-                    ON DUPLICATE KEY UPDATE
-                        title = VALUES(title),
-                        abstract = VALUES(abstract),
-                        venue = VALUES(venue),
-                        source = VALUES(source),
-                        doi = VALUES(doi),
-                        arxiv_id = VALUES(arxiv_id),
-                        openalex_id = VALUES(openalex_id),
-                        crossref_id = VALUES(crossref_id),
-                        url = VALUES(url),
-                        pdf_url = VALUES(pdf_url),
-                        publication_year = VALUES(publication_year),
-                        authors = VALUES(authors),
-                        raw_text = VALUES(raw_text),
-                        source_payload = VALUES(source_payload)
-                    """,
-                    (
-                        paper_id,
-                        metadata.get("title"),
-                        metadata.get("abstract"),
-                        metadata.get("venue"),
-                        metadata.get("source"),
-                        metadata.get("doi"),
-                        metadata.get("arxiv_id"),
-                        metadata.get("openalex_id"),
-                        metadata.get("crossref_id"),
-                        metadata.get("url"),
-                        metadata.get("pdf_url"),
-                        metadata.get("publication_year"),
-                        json.dumps(
-                            metadata.get("authors") or [],
-                            ensure_ascii=True,
+                    states = [processing[row[0]] for row in chunk]
+                    cursor.execute(
+                        _PROCESSING_UPSERT_SQL.format(
+                            values=", ".join(["(%s, %s, %s)"] * len(states))
                         ),
-                        record.raw_text,
-                        json.dumps(
-                            record.source_payload,
-                            ensure_ascii=True,
-                        )
-                        if record.source_payload
-                        else None,
-                    ),
-                )
+                        [value for state in states for value in state],
+                    )
+                    conn.commit()
+                    written += len(chunk)
             finally:
                 cursor.close()
-            conn.commit()
-        finally:
-            conn.close()
+        return written
 
     def fetch_papers(
         self,
         limit: int = 100,
         offset: int = 0,
         require_raw_text: bool = True,
+        after_paper_id: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
     ) -> list[dict]:
-        conn = self._connect()
-        try:
-            cursor = conn.cursor(dictionary=True)
-            try:
-                if require_raw_text:
-                    condition = "WHERE raw_text IS NOT NULL AND raw_text != ''"
-                else:
-                    condition = ""
-                query = f"""
-                    SELECT
-                        paper_id,
-                        title,
-                        abstract,
-                        venue,
-                        source,
-                        doi,
-                        arxiv_id,
-                        openalex_id,
-                        crossref_id,
-                        url,
-                        pdf_url,
-                        publication_year,
-                        authors,
-                        raw_text,
-                        source_payload
-                    FROM papers
-                    {condition}
-                    ORDER BY paper_id
-                    LIMIT %s OFFSET %s
-                """
-                cursor.execute(query, (limit, offset))
-                rows = cursor.fetchall()
-            finally:
-                cursor.close()
-        finally:
-            conn.close()
-        for row in rows:
-            if row.get("authors"):
-                try:
-                    row["authors"] = json.loads(row["authors"])
-                except Exception:
-                    row["authors"] = []
-            if row.get("source_payload"):
-                try:
-                    row["source_payload"] = json.loads(row["source_payload"])
-                except Exception:
-                    row["source_payload"] = None
-        return rows
+        """Fetch one page of papers in paper_id order.
+
+        Pass the last ``paper_id`` of the previous page as ``after_paper_id``
+        to page by key; ``offset`` is kept for callers that still need it but
+        gets slower as it grows. ``fields`` limits the selected columns (see
+        ``PaperRow`` for how a skipped ``raw_text`` is loaded).
+        """
+        return self._fetch_page(
+            limit,
+            offset,
+            require_raw_text,
+            after_paper_id,
+            unprocessed=False,
+            fields=fields,
+        )
 
     def count_unprocessed_papers(self, require_raw_text: bool = True) -> int:
-        """Count papers that haven't been processed yet (not in paper_concepts table)."""
-        conn = self._connect()
-        try:
+        """Count papers waiting for concept extraction."""
+        statuses = _unprocessed_statuses(require_raw_text)
+        with self._connection() as conn:
             cursor = conn.cursor()
             try:
-                text_condition = (
-                    "AND p.raw_text IS NOT NULL AND p.raw_text != ''"
-                    if require_raw_text
-                    else ""
+                placeholders = ", ".join(["%s"] * len(statuses))
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM paper_processing WHERE status IN ({placeholders})",
+                    statuses,
                 )
-                query = f"""
-                    SELECT COUNT(*) as count
-                    FROM papers p
-                    LEFT JOIN paper_concepts pc ON p.paper_id = pc.paper_id
-                    WHERE pc.paper_id IS NULL
-                    {text_condition}
-                """
-                cursor.execute(query)
                 result = cursor.fetchone()
                 return result[0] if result else 0
             finally:
                 cursor.close()
-        finally:
-            conn.close()
 
     def fetch_unprocessed_papers(
         self,
         limit: int = 100,
         offset: int = 0,
         require_raw_text: bool = True,
+        after_paper_id: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
     ) -> list[dict]:
-        """Fetch papers that haven't been processed yet (not in paper_concepts table)."""
+        """Fetch papers waiting for concept extraction, in paper_id order.
+
+        Work is selected from ``paper_processing`` by an index range scan on
+        (status, paper_id). The set shrinks while a run is writing concepts,
+        so offsets drift and skip papers; page with ``after_paper_id`` instead.
+        """
+        return self._fetch_page(
+            limit,
+            offset,
+            require_raw_text,
+            after_paper_id,
+            unprocessed=True,
+            fields=fields,
+        )
+
+    def iter_papers(
+        self,
+        require_raw_text: bool = True,
+        unprocessed: bool = False,
+        after_paper_id: Optional[str] = None,
+        batch_size: int = 500,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[dict]:
+        """Stream papers in paper_id order without materializing the result.
+
+        Rows are read ``batch_size`` at a time from an unbuffered cursor on a
+        dedicated connection, so memory stays flat for full-corpus scans. If
+        the server drops the connection mid-scan (for example on
+        ``net_write_timeout`` behind a slow consumer), the scan reopens after
+        the last row it yielded.
+        """
+        errors = _import_mysql_connector().errors
+        columns = _projection(fields)
+        last_paper_id = after_paper_id
+        failures = 0
+        while True:
+            try:
+                for row in self._stream_papers(
+                    require_raw_text,
+                    unprocessed,
+                    last_paper_id,
+                    batch_size,
+                    columns,
+                ):
+                    last_paper_id = row["paper_id"]
+                    failures = 0
+                    yield row
+                return
+            except (errors.OperationalError, errors.InterfaceError) as exc:
+                failures += 1
+                if failures > _SCAN_RETRIES:
+                    raise
+                logger.warning(
+                    "Paper scan interrupted after %s (%s); resuming",
+                    last_paper_id,
+                    exc,
+                )
+
+    def iter_concepts(self, batch_size: int = 1000) -> Iterator[dict]:
+        """Stream ``paper_concepts`` rows in (paper_id, concept_id) order.
+
+        Pages are keyed on the primary key, one short query each, so the scan
+        neither holds a pool slot nor slows down as it goes.
+        """
+        after: Optional[tuple[str, str]] = None
+        while True:
+            query, params = _concept_page_query(after, batch_size)
+            with self._connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            if not rows:
+                return
+            yield from rows
+            after = (rows[-1]["paper_id"], rows[-1]["concept_id"])
+
+    def _stream_papers(
+        self,
+        require_raw_text: bool,
+        unprocessed: bool,
+        after_paper_id: Optional[str],
+        batch_size: int,
+        columns: tuple[str, ...],
+    ) -> Iterator[dict]:
+        query, params = _paper_scan_query(
+            require_raw_text,
+            unprocessed,
+            after_paper_id,
+            columns=columns,
+        )
+        # Long scans would pin a pool slot for their whole lifetime, so they
+        # get their own connection; closing it also discards any unread rows
+        # when the consumer stops early.
         conn = self._connect()
         try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from self._paper_rows(rows, columns)
+        finally:
+            conn.close()
+
+    def _fetch_page(
+        self,
+        limit: int,
+        offset: int,
+        require_raw_text: bool,
+        after_paper_id: Optional[str],
+        unprocessed: bool,
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        columns = _projection(fields)
+        query, params = _paper_scan_query(
+            require_raw_text,
+            unprocessed,
+            after_paper_id,
+            columns=columns,
+            limit=limit,
+            offset=offset,
+        )
+        with self._connection() as conn:
             cursor = conn.cursor(dictionary=True)
             try:
-                text_condition = (
-                    "AND p.raw_text IS NOT NULL AND p.raw_text != ''"
-                    if require_raw_text
-                    else ""
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        return self._paper_rows(rows, columns)
+
+    def _paper_rows(
+        self,
+        rows: list[dict],
+        columns: tuple[str, ...],
+    ) -> list[PaperRow]:
+        lazy = any(field not in columns for field in _LAZY_FIELDS)
+        loaded = [_defer_text(PaperRow(_decode_row(row))) for row in rows]
+        if lazy and loaded:
+            loader = _PageTextLoader(self, loaded)
+            for row in loaded:
+                row._loader = loader
+        return loaded
+
+    def load_raw_text(self, rows: Iterable[dict], batch_size: int = 500) -> None:
+        """Fill in ``raw_text`` for rows fetched without it, one query per batch."""
+        pending = [
+            row
+            for row in rows
+            if not (row.text_loaded() if isinstance(row, PaperRow) else "raw_text" in row)
+        ]
+        for row in pending:
+            if isinstance(row, PaperRow):
+                row._loader = None
+        if not pending:
+            return
+        texts: dict[str, Optional[str]] = {}
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for start in range(0, len(pending), batch_size):
+                    chunk = [row["paper_id"] for row in pending[start : start + batch_size]]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(
+                        f"SELECT paper_id, raw_text FROM papers WHERE paper_id IN ({placeholders})",
+                        chunk,
+                    )
+                    texts.update(cursor.fetchall())
+            finally:
+                cursor.close()
+        for row in pending:
+            text = texts.get(row["paper_id"])
+            if isinstance(row, PaperRow) and is_compressed(text):
+                row._packed = text
+            else:
+                row["raw_text"] = decompress_text(text)
+
+    def fetch_paper_by_id(
+        self,
+        paper_id: str,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Optional[dict]:
+        columns = _projection(fields)
+        with self._connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(
+                    f"""
+                    SELECT {", ".join(columns)}
+                    FROM papers
+                    WHERE paper_id = %s
+                    LIMIT 1
+                    """,
+                    (paper_id,),
                 )
-                query = f"""
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        if not row:
+            return None
+        return self._paper_rows([row], columns)[0]
+
+    def fetch_papers_missing_text(
+        self,
+        limit: int = 100,
+        after_paper_id: Optional[str] = None,
+    ) -> list[dict]:
+        """Papers with a PDF URL but no extracted text, in paper_id order.
+
+        Driven from the (status, paper_id) index on ``paper_processing``
+        rather than a scan of ``papers`` testing the LONGTEXT column.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(
+                    """
                     SELECT
                         p.paper_id,
                         p.title,
@@ -292,136 +606,793 @@ class MySQLPaperStore:
                         p.pdf_url,
                         p.publication_year,
                         p.authors,
-                        p.raw_text,
                         p.source_payload
-                    FROM papers p
-                    LEFT JOIN paper_concepts pc ON p.paper_id = pc.paper_id
-                    WHERE pc.paper_id IS NULL
-                    {text_condition}
-                    ORDER BY p.paper_id
-                    LIMIT %s OFFSET %s
-                """
-                cursor.execute(query, (limit, offset))
+                    FROM paper_processing pp
+                    JOIN papers p ON p.paper_id = pp.paper_id
+                    WHERE pp.status = %s
+                    AND p.pdf_url IS NOT NULL
+                    AND pp.paper_id > %s
+                    ORDER BY pp.paper_id
+                    LIMIT %s
+                    """,
+                    (STATUS_NO_TEXT, after_paper_id or "", limit),
+                )
                 rows = cursor.fetchall()
             finally:
                 cursor.close()
-        finally:
-            conn.close()
-        for row in rows:
-            if row.get("authors"):
-                try:
-                    row["authors"] = json.loads(row["authors"])
-                except Exception:
-                    row["authors"] = []
-            if row.get("source_payload"):
-                try:
-                    row["source_payload"] = json.loads(row["source_payload"])
-                except Exception:
-                    row["source_payload"] = None
-        return rows
+        return [_decode_row(row) for row in rows]
 
-    def fetch_paper_by_id(self, paper_id: str) -> Optional[dict]:
-        conn = self._connect()
-        try:
-            cursor = conn.cursor(dictionary=True)
+    def existing_ids(
+        self,
+        paper_ids: Iterable[str],
+        batch_size: int = 500,
+    ) -> set[str]:
+        paper_ids = list(dict.fromkeys(paper_ids))
+        found: set[str] = set()
+        if not paper_ids:
+            return found
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for start in range(0, len(paper_ids), batch_size):
+                    chunk = paper_ids[start : start + batch_size]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(
+                        f"SELECT paper_id FROM papers WHERE paper_id IN ({placeholders})",
+                        chunk,
+                    )
+                    found.update(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.close()
+        return found
+
+    def complete_paper(
+        self,
+        paper_id: str,
+        records: list[dict],
+        prompt_version: Optional[str] = None,
+        worker_id: Optional[str] = None,
+    ) -> bool:
+        """Write a paper's concepts and mark it done (or empty) in one commit.
+
+        With ``worker_id`` the write only happens while that worker still
+        holds the paper's lease; returns False (and writes nothing) if the
+        lease expired and the paper moved on to another worker.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
             try:
+                if worker_id is not None and not self._holds_lease(
+                    cursor, paper_id, worker_id
+                ):
+                    conn.rollback()
+                    return False
+                if records:
+                    cursor.executemany(_CONCEPT_UPSERT_SQL, _concept_rows(records))
                 cursor.execute(
                     """
-                    SELECT
+                    INSERT INTO paper_processing (
+                        paper_id, status, attempts, prompt_version,
+                        concept_count, last_error, processed_at
+                    )
+                    VALUES (%s, %s, 1, %s, %s, NULL, CURRENT_TIMESTAMP)
+                    ON DUPLICATE KEY UPDATE
+                        status = VALUES(status),
+                        attempts = attempts + 1,
+                        prompt_version = VALUES(prompt_version),
+                        concept_count = VALUES(concept_count),
+                        last_error = NULL,
+                        processed_at = CURRENT_TIMESTAMP,
+                        lease_owner = NULL,
+                        lease_expires_at = NULL
+                    """,
+                    (
                         paper_id,
-                        title,
-                        abstract,
-                        venue,
-                        source,
-                        doi,
-                        arxiv_id,
-                        openalex_id,
-                        crossref_id,
-                        url,
-                        pdf_url,
-                        publication_year,
-                        authors,
-                        raw_text,
-                        source_payload
-                    FROM papers
+                        STATUS_DONE if records else STATUS_EMPTY,
+                        prompt_version,
+                        len(records),
+                    ),
+                )
+            finally:
+                cursor.close()
+            conn.commit()
+        return True
+
+    def mark_failed(
+        self,
+        paper_id: str,
+        error: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        """Record a failed attempt; the paper is retried until max_attempts."""
+        owner_condition = "AND lease_owner = %s" if worker_id is not None else ""
+        params = [max_attempts, STATUS_FAILED, STATUS_PENDING, error[:2000], paper_id]
+        if worker_id is not None:
+            params.append(worker_id)
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"""
+                    UPDATE paper_processing
+                    SET
+                        attempts = attempts + 1,
+                        status = IF(attempts >= %s, %s, %s),
+                        last_error = %s,
+                        processed_at = CURRENT_TIMESTAMP,
+                        lease_owner = NULL,
+                        lease_expires_at = NULL
                     WHERE paper_id = %s
-                    LIMIT 1
+                    {owner_condition}
                     """,
-                    (paper_id,),
+                    params,
                 )
-                row = cursor.fetchone()
             finally:
                 cursor.close()
-        finally:
-            conn.close()
-        if not row:
-            return None
-        if row.get("authors"):
+            conn.commit()
+
+    def claim_papers(
+        self,
+        worker_id: str,
+        limit: int = 50,
+        lease_seconds: int = 600,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        """Lease up to ``limit`` pending papers to ``worker_id``.
+
+        Candidates are locked with ``FOR UPDATE SKIP LOCKED`` (MySQL 8.0+),
+        so concurrent workers claim disjoint batches without waiting on each
+        other. Leases held by crashed workers are returned to the queue once
+        they expire, counting as a failed attempt.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
             try:
-                row["authors"] = json.loads(row["authors"])
-            except Exception:
-                row["authors"] = []
-        if row.get("source_payload"):
+                cursor.execute(
+                    """
+                    UPDATE paper_processing
+                    SET
+                        attempts = attempts + 1,
+                        status = IF(attempts >= %s, %s, %s),
+                        last_error = 'lease expired',
+                        lease_owner = NULL,
+                        lease_expires_at = NULL
+                    WHERE status = %s AND lease_expires_at < CURRENT_TIMESTAMP
+                    """,
+                    (max_attempts, STATUS_FAILED, STATUS_PENDING, STATUS_LEASED),
+                )
+                conn.commit()
+                cursor.execute(
+                    """
+                    SELECT paper_id
+                    FROM paper_processing
+                    WHERE status = %s
+                    ORDER BY paper_id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    (STATUS_PENDING, limit),
+                )
+                paper_ids = [row[0] for row in cursor.fetchall()]
+                if paper_ids:
+                    placeholders = ", ".join(["%s"] * len(paper_ids))
+                    cursor.execute(
+                        f"""
+                        UPDATE paper_processing
+                        SET
+                            status = %s,
+                            lease_owner = %s,
+                            lease_expires_at = CURRENT_TIMESTAMP + INTERVAL %s SECOND
+                        WHERE paper_id IN ({placeholders})
+                        """,
+                        [STATUS_LEASED, worker_id, lease_seconds, *paper_ids],
+                    )
+                conn.commit()
+            finally:
+                cursor.close()
+        return self.fetch_papers_by_ids(paper_ids, fields=fields)
+
+    def heartbeat(
+        self,
+        worker_id: str,
+        paper_ids: Iterable[str],
+        lease_seconds: int = 600,
+    ) -> int:
+        """Extend this worker's leases; returns how many are still held."""
+        paper_ids = list(paper_ids)
+        if not paper_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(paper_ids))
+        with self._connection() as conn:
+            cursor = conn.cursor()
             try:
-                row["source_payload"] = json.loads(row["source_payload"])
-            except Exception:
-                row["source_payload"] = None
-        return row
+                cursor.execute(
+                    f"""
+                    UPDATE paper_processing
+                    SET lease_expires_at = CURRENT_TIMESTAMP + INTERVAL %s SECOND
+                    WHERE status = %s AND lease_owner = %s
+                    AND paper_id IN ({placeholders})
+                    """,
+                    [lease_seconds, STATUS_LEASED, worker_id, *paper_ids],
+                )
+                held = cursor.rowcount
+            finally:
+                cursor.close()
+            conn.commit()
+        return held
 
-    def save_concepts(self, records: list[dict]) -> None:
-        if not records:
+    def release_papers(self, worker_id: str, paper_ids: Iterable[str]) -> None:
+        """Hand unfinished leased papers back to the queue."""
+        paper_ids = list(paper_ids)
+        if not paper_ids:
             return
-        conn = self._connect()
-        try:
+        placeholders = ", ".join(["%s"] * len(paper_ids))
+        with self._connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.executemany(
+                cursor.execute(
+                    f"""
+                    UPDATE paper_processing
+                    SET status = %s, lease_owner = NULL, lease_expires_at = NULL
+                    WHERE status = %s AND lease_owner = %s
+                    AND paper_id IN ({placeholders})
+                    """,
+                    [STATUS_PENDING, STATUS_LEASED, worker_id, *paper_ids],
+                )
+            finally:
+                cursor.close()
+            conn.commit()
+
+    def fetch_papers_by_ids(
+        self,
+        paper_ids: Iterable[str],
+        fields: Optional[Iterable[str]] = None,
+    ) -> list[dict]:
+        paper_ids = list(paper_ids)
+        if not paper_ids:
+            return []
+        columns = _projection(fields)
+        placeholders = ", ".join(["%s"] * len(paper_ids))
+        with self._connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(
+                    f"""
+                    SELECT {", ".join(columns)}
+                    FROM papers
+                    WHERE paper_id IN ({placeholders})
+                    ORDER BY paper_id
+                    """,
+                    paper_ids,
+                )
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        return self._paper_rows(rows, columns)
+
+    @staticmethod
+    def _holds_lease(cursor, paper_id: str, worker_id: str) -> bool:
+        cursor.execute(
+            """
+            SELECT status, lease_owner
+            FROM paper_processing
+            WHERE paper_id = %s
+            FOR UPDATE
+            """,
+            (paper_id,),
+        )
+        row = cursor.fetchone()
+        return bool(row) and row[0] == STATUS_LEASED and row[1] == worker_id
+
+    def requeue_stale(self, prompt_version: str) -> int:
+        """Queue finished papers again if they ran under another prompt version."""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
                     """
-                    INSERT INTO paper_concepts (
-                        paper_id,
-                        concept_id,
-                        concept_name,
-                        summary,
-                        source
-                    )
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        concept_name = VALUES(concept_name),
-                        summary = VALUES(summary),
-                        source = VALUES(source)
+                    UPDATE paper_processing
+                    SET status = %s, attempts = 0
+                    WHERE status IN (%s, %s)
+                    AND (prompt_version IS NULL OR prompt_version <> %s)
                     """,
-                    [
-                        (
-                            record["paper_id"],
-                            record["concept_id"],
-                            record["name"],
-                            record["summary"],
-                            record["source"],
-                        )
-                        for record in records
-                    ],
+                    (STATUS_PENDING, STATUS_DONE, STATUS_EMPTY, prompt_version),
                 )
+                requeued = cursor.rowcount
             finally:
                 cursor.close()
             conn.commit()
-        finally:
+        return requeued
+
+    def save_concepts(self, records: list[dict]) -> None:
+        if not records:
+            return
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(_CONCEPT_UPSERT_SQL, _concept_rows(records))
+            finally:
+                cursor.close()
+            conn.commit()
+
+    @contextmanager
+    def _connection(self) -> Iterator:
+        if not self._pool_size:
+            conn = self._connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+        with self._pool_slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                # Closing a pooled connection returns it to the pool.
+                conn.close()
+
+    def _checkout(self):
+        pool = self._get_pool()
+        conn = pool.get_connection()
+        try:
+            # Health check: revive connections the server dropped while they
+            # sat idle in the pool (wait_timeout, failover, restarts).
+            conn.ping(reconnect=True, attempts=2, delay=0)
+        except Exception:
             conn.close()
+            raise
+        return conn
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                pooling = _import_mysql_connector().pooling
+                self._pool = pooling.MySQLConnectionPool(
+                    pool_name=f"paperatlas-{id(self):x}",
+                    pool_size=self._pool_size,
+                    pool_reset_session=True,
+                    **self._config,
+                )
+            return self._pool
 
     def _connect(self):
+        return _import_mysql_connector().connect(**self._config)
+
+
+def create_paper_store(
+    backend: Optional[str] = None,
+    mysql_config: Optional[dict] = None,
+    pool_size: Optional[int] = None,
+    sqlite_path: Optional[str | Path] = None,
+    compression: Optional[str] = None,
+):
+    """Build the paper store selected by ``backend`` or ``PAPERATLAS_STORE_BACKEND``."""
+    backend = (backend or get_store_backend()).strip().lower()
+    if backend == "mysql":
+        return MySQLPaperStore(
+            mysql_config or get_mysql_config(),
+            pool_size=pool_size,
+            compression=compression,
+        )
+    if backend == "sqlite":
+        from .sqlite_store import SQLitePaperStore
+
+        return SQLitePaperStore(
+            sqlite_path or get_sqlite_path(),
+            compression=compression,
+        )
+    raise ValueError(f"Unknown paper store backend: {backend}")
+
+
+def _import_mysql_connector():
+    try:
+        import mysql.connector  # type: ignore
+        import mysql.connector.pooling  # type: ignore  # noqa: F401
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(
+            "mysql-connector-python is required for MySQL storage. "
+            "Install it with `pip install mysql-connector-python`."
+        ) from exc
+    return mysql.connector
+
+
+def _schema_version(cursor) -> int:
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'schema_migrations'
+        """
+    )
+    if cursor.fetchone()[0] == 0:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def _apply_migrations(conn, cursor) -> None:
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    # Re-read under the lock: another worker may have migrated meanwhile.
+    current = _schema_version(cursor)
+    for version, description, migrate in _MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying schema migration %d: %s", version, description)
+        migrate(cursor)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description),
+        )
+        conn.commit()
+
+
+def _migrate_base_tables(cursor) -> None:
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS papers (
+            paper_id VARCHAR(255) PRIMARY KEY,
+            title TEXT,
+            abstract LONGTEXT,
+            venue VARCHAR(255),
+            source VARCHAR(50),
+            doi VARCHAR(255),
+            arxiv_id VARCHAR(255),
+            openalex_id VARCHAR(255),
+            crossref_id VARCHAR(255),
+            url TEXT,
+            pdf_url TEXT,
+            publication_year INT,
+            authors JSON,
+            raw_text LONGTEXT,
+            source_payload JSON
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS paper_concepts (
+            paper_id VARCHAR(255) NOT NULL,
+            concept_id VARCHAR(64) NOT NULL,
+            concept_name TEXT,
+            summary LONGTEXT,
+            source VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (paper_id, concept_id)
+        )
+        """
+    )
+    # Databases created before the schema was versioned may predate some
+    # of the papers columns.
+    _add_missing_columns(cursor, "papers", _column_definitions())
+
+
+def _migrate_processing_table(cursor) -> None:
+    has_processing_table = _table_exists(cursor, "paper_processing")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS paper_processing (
+            paper_id VARCHAR(255) PRIMARY KEY,
+            status VARCHAR(16) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            content_hash CHAR(64),
+            prompt_version VARCHAR(64),
+            concept_count INT NOT NULL DEFAULT 0,
+            last_error TEXT,
+            processed_at TIMESTAMP NULL,
+            lease_owner VARCHAR(128),
+            lease_expires_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_processing_status (status, paper_id)
+        )
+        """
+    )
+    if not has_processing_table:
+        # One-time seed from the existing tables; content_hash is filled in
+        # the next time each paper is saved.
+        cursor.execute(
+            """
+            INSERT IGNORE INTO paper_processing (paper_id, status, concept_count)
+            SELECT
+                p.paper_id,
+                CASE
+                    WHEN pc.concept_count > 0 THEN 'done'
+                    WHEN p.raw_text IS NULL OR p.raw_text = '' THEN 'no_text'
+                    ELSE 'pending'
+                END,
+                COALESCE(pc.concept_count, 0)
+            FROM papers p
+            LEFT JOIN (
+                SELECT paper_id, COUNT(*) AS concept_count
+                FROM paper_concepts
+                GROUP BY paper_id
+            ) pc ON pc.paper_id = p.paper_id
+            """
+        )
+    _add_missing_columns(cursor, "paper_processing", _processing_column_definitions())
+
+
+def _migrate_secondary_indexes(cursor) -> None:
+    # Expired-lease reclaim in claim_papers, and concept -> papers lookups
+    # (the primary key only serves paper -> concepts).
+    for table, name, columns in (
+        ("paper_processing", "idx_processing_lease", "status, lease_expires_at"),
+        ("paper_concepts", "idx_concepts_concept", "concept_id, paper_id"),
+    ):
+        cursor.execute(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            """,
+            (table, name),
+        )
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+def _table_exists(cursor, table: str) -> bool:
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (table,),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _add_missing_columns(cursor, table: str, definitions: dict[str, str]) -> None:
+    cursor.execute(
+        """
+        SELECT COLUMN_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (table,),
+    )
+    existing_columns = {row[0] for row in cursor.fetchall()}
+    for column, column_type in definitions.items():
+        if column not in existing_columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+# Ordered, append-only: never edit a released migration, add a new one.
+_MIGRATIONS = (
+    (1, "papers and paper_concepts tables", _migrate_base_tables),
+    (2, "paper_processing state table", _migrate_processing_table),
+    (3, "secondary indexes for lease and concept lookups", _migrate_secondary_indexes),
+)
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+_SCHEMA_LOCK = "paperatlas_schema"
+# (host, port, database) already at SCHEMA_VERSION in this process.
+_SCHEMA_READY: set[tuple] = set()
+
+
+def record_from_row(row: dict) -> PaperRecord:
+    """Rebuild a ``PaperRecord`` from a row returned by a paper store."""
+    metadata = PaperMetadata(
+        title=row.get("title") or "",
+        abstract=row.get("abstract"),
+        authors=row.get("authors") or [],
+        publication_year=row.get("publication_year"),
+        venue=row.get("venue"),
+        doi=row.get("doi"),
+        arxiv_id=row.get("arxiv_id"),
+        openalex_id=row.get("openalex_id"),
+        crossref_id=row.get("crossref_id"),
+        url=row.get("url") or None,
+        pdf_url=row.get("pdf_url") or None,
+        source=row.get("source") or "unknown",
+    )
+    # Metadata-only rows are not sent back to the database for their text.
+    if isinstance(row, PaperRow) and not row.text_loaded():
+        raw_text = None
+    else:
+        raw_text = row.get("raw_text")
+    return PaperRecord(
+        metadata=metadata,
+        raw_text=raw_text,
+        source_payload=row.get("source_payload"),
+    )
+
+
+def _paper_scan_query(
+    require_raw_text: bool,
+    unprocessed: bool,
+    after_paper_id: Optional[str],
+    columns: tuple[str, ...] = PAPER_COLUMNS,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> tuple[str, list]:
+    conditions = []
+    params: list = []
+    if unprocessed:
+        # Driven from the (status, paper_id) index; "pending" already implies
+        # stored text, so the LONGTEXT column is never read to filter.
+        source = "paper_processing pp JOIN papers p ON p.paper_id = pp.paper_id"
+        key = "pp.paper_id"
+        statuses = _unprocessed_statuses(require_raw_text)
+        conditions.append(f"pp.status IN ({', '.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+    else:
+        source = "papers p"
+        key = "p.paper_id"
+        if require_raw_text:
+            conditions.append("p.raw_text IS NOT NULL AND p.raw_text != ''")
+    if after_paper_id is not None:
+        conditions.append(f"{key} > %s")
+        params.append(after_paper_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    selected = ", ".join(f"p.{column}" for column in columns)
+    query = f"SELECT {selected} FROM {source} {where} ORDER BY {key}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+        if offset:
+            query += " OFFSET %s"
+            params.append(offset)
+    return query, params
+
+
+def _concept_page_query(
+    after: Optional[tuple[str, str]],
+    limit: int,
+) -> tuple[str, list]:
+    where = ""
+    params: list = []
+    if after is not None:
+        where = "WHERE paper_id > %s OR (paper_id = %s AND concept_id > %s)"
+        params = [after[0], after[0], after[1]]
+    query = (
+        "SELECT paper_id, concept_id, concept_name, summary, source, created_at "
+        f"FROM paper_concepts {where} ORDER BY paper_id, concept_id LIMIT %s"
+    )
+    return query, [*params, limit]
+
+
+def _unprocessed_statuses(require_raw_text: bool) -> list[str]:
+    if require_raw_text:
+        return [STATUS_PENDING]
+    return [STATUS_PENDING, STATUS_NO_TEXT]
+
+
+def _processing_row(paper_id: str, raw_text: Optional[str]) -> tuple:
+    content_hash = (
+        hashlib.sha256(raw_text.encode("utf-8")).hexdigest() if raw_text else None
+    )
+    return (
+        paper_id,
+        STATUS_PENDING if content_hash else STATUS_NO_TEXT,
+        content_hash,
+    )
+
+
+def _concept_rows(records: list[dict]) -> list[tuple]:
+    return [
+        (
+            record["paper_id"],
+            record["concept_id"],
+            record["name"],
+            record["summary"],
+            record["source"],
+        )
+        for record in records
+    ]
+
+
+def _projection(fields: Optional[Iterable[str]]) -> tuple[str, ...]:
+    if fields is None:
+        return PAPER_COLUMNS
+    requested = set(fields)
+    unknown = requested.difference(PAPER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown paper fields: {', '.join(sorted(unknown))}")
+    requested.add("paper_id")
+    return tuple(column for column in PAPER_COLUMNS if column in requested)
+
+
+class _PageTextLoader:
+    def __init__(self, store: MySQLPaperStore, rows: list[PaperRow]) -> None:
+        self._store = store
+        self._rows = rows
+
+    def __call__(self) -> None:
+        rows, self._rows = self._rows, []
+        self._store.load_raw_text(rows)
+
+
+def _decode_row(row: dict) -> dict:
+    if row.get("authors"):
+        try:
+            row["authors"] = json.loads(row["authors"])
+        except Exception:
+            row["authors"] = []
+    if row.get("source_payload"):
         try:
-            import mysql.connector  # type: ignore
-        except Exception as exc:  # pragma: no cover - optional dependency
-            raise RuntimeError(
-                "mysql-connector-python is required for MySQL storage. "
-                "Install it with `pip install mysql-connector-python`."
-            ) from exc
-        return mysql.connector.connect(**self._config)
+            row["source_payload"] = json.loads(row["source_payload"])
+        except Exception:
+            row["source_payload"] = None
+    return row
+
+
+def _defer_text(row: PaperRow) -> PaperRow:
+    if is_compressed(dict.get(row, "raw_text")):
+        row._packed = row.pop("raw_text")
+    return row
+
+
+def _paper_row(record: PaperRecord, compression: Optional[str] = None) -> tuple:
+    metadata = record.metadata.model_dump(mode="json")
+    return (
+        record.metadata.canonical_id(),
+        metadata.get("title"),
+        metadata.get("abstract"),
+        metadata.get("venue"),
+        metadata.get("source"),
+        metadata.get("doi"),
+        metadata.get("arxiv_id"),
+        metadata.get("openalex_id"),
+        metadata.get("crossref_id"),
+        metadata.get("url"),
+        metadata.get("pdf_url"),
+        metadata.get("publication_year"),
+        json.dumps(metadata.get("authors") or [], ensure_ascii=True),
+        compress_text(record.raw_text, compression),
+        json.dumps(record.source_payload, ensure_ascii=True)
+        if record.source_payload
+        else None,
+    )
+
+
+def _chunk_rows(
+    rows: list[tuple],
+    max_rows: int,
+    max_bytes: int,
+) -> Iterator[list[tuple]]:
+    chunk: list[tuple] = []
+    size = 0
+    for row in rows:
+        row_size = sum(len(value) for value in row if isinstance(value, str))
+        if chunk and (len(chunk) >= max_rows or size + row_size > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield chunk
 
 
 def _safe_filename(identifier: str) -> str:
     return identifier.replace("/", "_").replace(":", "_")
 
 
+def _processing_column_definitions() -> dict[str, str]:
+    return {
+        "lease_owner": "VARCHAR(128)",
+        "lease_expires_at": "TIMESTAMP NULL",
+    }
+
+
 def _column_definitions() -> dict[str, str]:
     return {
         "title": "TEXT",
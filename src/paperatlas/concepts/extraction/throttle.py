@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """Refills at ``rate_per_minute`` up to ``capacity``; not thread-safe."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than the bucket could never fit; let it through
+        # once the bucket is full rather than blocking forever.
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) * 60.0 / self.rate_per_minute
+
+    def take(self, amount: float) -> None:
+        self._tokens -= min(amount, self.capacity)
+
+    def set_rate(self, rate_per_minute: float, now: float) -> None:
+        self._refill(now)
+        self.rate_per_minute = rate_per_minute
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(
+            self.capacity,
+            self._tokens + elapsed * self.rate_per_minute / 60.0,
+        )
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by threads.
+
+    ``acquire`` blocks until both buckets can cover the call. A 429 from the
+    provider (``on_rate_limited``) pauses every caller until the
+    ``Retry-After`` time and cuts both rates by a quarter; each success
+    (``on_success``) wins back 5% of the configured rate.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        min_rate_fraction: float = 0.1,
+    ) -> None:
+        self._buckets: list[tuple[TokenBucket, float]] = []
+        self._requests = None
+        self._tokens = None
+        if requests_per_minute:
+            self._requests = TokenBucket(requests_per_minute)
+            self._buckets.append((self._requests, requests_per_minute))
+        if tokens_per_minute:
+            self._tokens = TokenBucket(tokens_per_minute)
+            self._buckets.append((self._tokens, tokens_per_minute))
+        self.min_rate_fraction = min_rate_fraction
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> None:
+        while True:
+            costs = [(self._requests, 1), (self._tokens, tokens)]
+            costs = [(bucket, amount) for bucket, amount in costs if bucket]
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+                for bucket, amount in costs:
+                    delay = max(delay, bucket.wait_time(amount, now))
+                if delay <= 0:
+                    for bucket, amount in costs:
+                        bucket.take(amount)
+                    return
+            time.sleep(min(delay, 5.0))
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + (retry_after or 1.0))
+            for bucket, configured in self._buckets:
+                floor = configured * self.min_rate_fraction
+                bucket.set_rate(max(bucket.rate_per_minute * 0.75, floor), now)
+        logger.warning(
+            "LLM rate limited; pausing %.1fs and lowering the request rate",
+            retry_after or 1.0,
+        )
+
+    def on_success(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            for bucket, configured in self._buckets:
+                if bucket.rate_per_minute < configured:
+                    bucket.set_rate(
+                        min(configured, bucket.rate_per_minute + configured * 0.05),
+                        now,
+                    )
+
+
+def map_unordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+) -> Iterator[tuple[T, Optional[R], Optional[BaseException]]]:
+    """Run ``fn`` over ``items`` on a thread pool, yielding as calls finish.
+
+    Yields ``(item, result, error)``. At most ``max_workers`` calls are in
+    flight and ``items`` is consumed lazily, so long inputs stream.
+    """
+    iterator = iter(items)
+    max_workers = max(max_workers, 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_workers:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(fn, item)] = item
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+                yield item, None if error else future.result(), error
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Decouples producers from slow sinks with per-sink writer threads.
+
+    ``submit`` hands an item to every sink's queue and returns; each sink
+    has its own thread that coalesces items into batches of up to
+    ``max_batch`` (or whatever arrived within ``max_delay_seconds``), so a
+    slow sink only delays itself. ``submit`` blocks once any sink has
+    ``max_pending`` items queued or in flight, which bounds memory and lets the slowest
+    sink pace the producers.
+
+    With ``spill_path`` every item is appended to a JSON-lines spill file
+    before it is queued, and each sink appends an ack once its batch is
+    written; items a sink never acknowledged (a crash, or a batch that kept
+    failing) are replayed to that sink when the buffer is next opened.
+    Sinks must therefore be idempotent, which the upserts and MERGEs used
+    here are. The spill file is held under an exclusive ``flock`` until
+    ``close``, so a second buffer on the same path fails instead of
+    replaying or truncating the first one's items. ``flush`` waits for
+    everything submitted so far, and ``close`` flushes and stops the
+    writers.
+    """
+
+    def __init__(
+        self,
+        sinks: dict[str, Callable[[list], Any]],
+        max_batch: int = 100,
+        max_delay_seconds: float = 2.0,
+        max_pending: int = 1000,
+        max_retries: int = 3,
+        spill_path: Optional[str | Path] = None,
+        encode: Callable[[Any], Any] = lambda item: item,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ) -> None:
+        self.max_batch = max(max_batch, 1)
+        self.max_delay_seconds = max_delay_seconds
+        self.max_pending = max(max_pending, self.max_batch)
+        self.max_retries = max_retries
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._encode = encode
+        self._decode = decode
+        self._sinks = sinks
+        self._queues: dict[str, deque] = {name: deque() for name in sinks}
+        # Items a writer has taken but not yet finished; flush() waits on these too.
+        self._in_flight: dict[str, int] = {name: 0 for name in sinks}
+        self._flush_requested = False
+        self._closed = False
+        self._errors: list[BaseException] = []
+        # Acks are high-water marks, so a sink that lost a batch stops
+        # acknowledging for the rest of the session and the spill file is
+        # kept; its items are replayed (idempotently) on the next open.
+        self._ack_blocked: set[str] = set()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._spill = None
+        if self.spill_path:
+            self._open_spill()
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(name,),
+                name=f"write-behind-{name}",
+                daemon=True,
+            )
+            for name in sinks
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item: Any) -> None:
+        self.submit_many([item])
+
+    def submit_many(self, items: Iterable[Any]) -> None:
+        for item in items:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Write-behind buffer is closed.")
+                while any(
+                    len(queue) + self._in_flight[name] >= self.max_pending
+                    for name, queue in self._queues.items()
+                ):
+                    self._cond.wait()
+                self._seq += 1
+                if self._spill:
+                    self._spill_write({"seq": self._seq, "item": self._encode(item)})
+                for queue in self._queues.values():
+                    queue.append((self._seq, item))
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Block until every submitted item has reached every sink.
+
+        Raises the first sink error seen since the last flush; the failed
+        items stay in the spill file for the next run.
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while any(self._queues.values()) or any(self._in_flight.values()):
+                if not any(thread.is_alive() for thread in self._threads):
+                    break
+                self._cond.wait()
+            self._flush_requested = False
+            if self._spill and not self._ack_blocked:
+                # Everything is acknowledged: start the spill file over.
+                self._spill.seek(0)
+                self._spill.truncate()
+            errors, self._errors = self._errors, []
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)} write-behind batch(es) failed"
+            ) from errors[0]
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            for thread in self._threads:
+                thread.join()
+            if self._spill:
+                self._spill.close()
+                self._spill = None
+
+    def pending(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                name: len(queue) + self._in_flight[name]
+                for name, queue in self._queues.items()
+            }
+
+    def __enter__(self) -> "WriteBehindBuffer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self, name: str) -> None:
+        queue = self._queues[name]
+        while True:
+            with self._cond:
+                deadline = None
+                while True:
+                    if queue and (
+                        len(queue) >= self.max_batch
+                        or self._flush_requested
+                        or self._closed
+                    ):
+                        break
+                    if not queue:
+                        if self._closed:
+                            return
+                        deadline = None
+                        self._cond.wait()
+                        continue
+                    if deadline is None:
+                        deadline = time.monotonic() + self.max_delay_seconds
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [queue.popleft() for _ in range(min(self.max_batch, len(queue)))]
+                self._in_flight[name] = len(batch)
+                self._cond.notify_all()
+            error = self._write(name, [item for _, item in batch])
+            with self._cond:
+                self._in_flight[name] = 0
+                if error is not None:
+                    self._errors.append(error)
+                    self._ack_blocked.add(name)
+                elif self._spill and name not in self._ack_blocked:
+                    self._spill_write({"ack": name, "seq": batch[-1][0]})
+                self._cond.notify_all()
+
+    def _write(self, name: str, items: list) -> Optional[BaseException]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._sinks[name](items)
+                return None
+            except Exception as exc:
+                if attempt == self.max_retries:
+                    logger.error(
+                        "Write-behind sink %s dropped a batch of %d after %d attempts: %s",
+                        name,
+                        len(items),
+                        attempt + 1,
+                        exc,
+                    )
+                    return exc
+                delay = min(0.5 * 2**attempt, 10.0)
+                logger.warning(
+                    "Write-behind sink %s failed (%s); retrying in %.1fs",
+                    name,
+                    exc,
+                    delay,
+                )
+                time.sleep(delay)
+        return None
+
+    def _spill_write(self, entry: dict) -> None:
+        self._spill.write(json.dumps(entry, ensure_ascii=True) + "\n")
+        self._spill.flush()
+
+    def _open_spill(self) -> None:
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        handle = self.spill_path.open("a+", encoding="utf-8")
+        if fcntl is not None:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                raise RuntimeError(
+                    f"Spill file {self.spill_path} is in use by another run; "
+                    "give each concurrent run its own spill file."
+                ) from None
+        items: dict[int, Any] = {}
+        acked: dict[str, int] = {}
+        handle.seek(0)
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn final line
+            if "ack" in entry:
+                acked[entry["ack"]] = max(acked.get(entry["ack"], 0), entry["seq"])
+            else:
+                items[entry["seq"]] = entry["item"]
+        # Rewrite the file with only what some sink still needs, then queue
+        # each unacknowledged item for the sinks that missed it.
+        handle.seek(0)
+        handle.truncate()
+        self._spill = handle
+        replayed = 0
+        for seq in sorted(items):
+            missing = [name for name in self._sinks if seq > acked.get(name, 0)]
+            if not missing:
+                continue
+            self._spill_write({"seq": seq, "item": items[seq]})
+            item = self._decode(items[seq])
+            for name in missing:
+                self._queues[name].append((seq, item))
+            replayed += 1
+        for name in self._sinks:
+            if acked.get(name):
+                self._spill_write({"ack": name, "seq": acked[name]})
+        self._seq = max([*items, *acked.values()], default=0)
+        if replayed:
+            logger.info(
+                "Replaying %d spilled items from %s", replayed, self.spill_path
+            )
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from paperatlas.concepts.extraction.llm_extractor import LLMClient
+from paperatlas.concepts.extraction.llm_extractor import LLMCache, LLMClient
+
+_CONCEPT_HEADER = re.compile(r"^\s*Concept\s*(\d+)\s*:.*$", re.IGNORECASE | re.MULTILINE)
 
 
 class ConceptSummarizer:
-    def __init__(self, llm_client: Optional[LLMClient] = None) -> None:
+    def __init__(
+        self,
+        llm_client: Optional[LLMClient] = None,
+        cache: Optional[LLMCache] = None,
+    ) -> None:
         self.llm_client = llm_client
+        self.cache = cache
 
     def summarize(
         self,
@@ -23,6 +31,77 @@ class ConceptSummarizer:
                 return parsed
         return self._heuristic_summary(concept_text, concept_name)
 
+    def summarize_post(self, post: str, concept_name: Optional[str] = None) -> Dict:
+        """Summary from an extraction post that already has the structure.
+
+        The extraction prompt asks for a hook, explanation, "Why it
+        matters" bullets and a call to action, so no LLM call is needed;
+        posts that do not parse get the heuristic summary.
+        """
+        return self._parse_response(post) or self._heuristic_summary(post, concept_name)
+
+    def summarize_many(
+        self,
+        concepts: Sequence[Tuple[str, Optional[str]]],
+    ) -> List[Dict]:
+        """Summarize ``(concept_text, concept_name)`` pairs in one LLM call.
+
+        Responses are cached when a cache is configured; concepts missing
+        from the response fall back to the heuristic summary.
+        """
+        if not concepts:
+            return []
+        parsed: Dict[int, Dict] = {}
+        if self.llm_client:
+            prompt = self._build_batch_prompt(concepts)
+            cache_key = "summary_" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:16]
+            cached = self.cache.get(cache_key) if self.cache is not None else None
+            if cached:
+                response = cached["response_text"]
+            else:
+                response = self.llm_client.generate(self._system_prompt(), prompt)
+                if self.cache is not None:
+                    self.cache.set(cache_key, {"response_text": response})
+            parsed = self._parse_batch_response(response)
+        return [
+            parsed.get(index) or self._heuristic_summary(text, name)
+            for index, (text, name) in enumerate(concepts, start=1)
+        ]
+
+    @staticmethod
+    def _build_batch_prompt(concepts: Sequence[Tuple[str, Optional[str]]]) -> str:
+        sections = [
+            f"Concept {index}: {name or 'Unnamed'}\nSource text:\n{text}"
+            for index, (text, name) in enumerate(concepts, start=1)
+        ]
+        return (
+            "\n\n".join(sections)
+            + "\n\nFor every concept above, in the same order, output a block "
+            "that starts with its header line 'Concept N: <name>' followed by "
+            "plain text with this exact structure:\n"
+            "1) A single-sentence hook question (end with '?').\n"
+            "2) A short paragraph (2-4 sentences) answering the hook.\n"
+            "3) A line that says: Why this matters:\n"
+            "4) 3-5 bullet lines, each starting with '- '.\n"
+            "5) A one-sentence CTA to explore the paper or concept.\n"
+            "Do not output JSON or extra labels."
+        )
+
+    @classmethod
+    def _parse_batch_response(cls, response: str) -> Dict[int, Dict]:
+        parsed: Dict[int, Dict] = {}
+        matches = list(_CONCEPT_HEADER.finditer(response))
+        for position, match in enumerate(matches):
+            end = (
+                matches[position + 1].start()
+                if position + 1 < len(matches)
+                else len(response)
+            )
+            summary = cls._parse_response(response[match.end() : end])
+            if summary:
+                parsed[int(match.group(1))] = summary
+        return parsed
+
     @staticmethod
     def _system_prompt() -> str:
         return (
@@ -56,7 +135,7 @@ class ConceptSummarizer:
         bullets = [
             line.lstrip("-•").strip()
             for line in lines
-            if line.startswith(("-", "•"))
+            if line.startswith(("-", "•")) and line.lstrip("-•").strip()
         ]
         if len(bullets) < 3:
             return None
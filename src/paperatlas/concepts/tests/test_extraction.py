@@ -1,9 +1,57 @@
+import json
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from paperatlas.concepts.extraction.batch_extract import (
+    BatchExtractionRunner,
+    LLMBatchClient,
+)
+from paperatlas.concepts.extraction.compression import is_compressed
 from paperatlas.concepts.extraction.heuristic_extractor import (
     HeuristicConceptExtractor,
 )
+from paperatlas.concepts.extraction.leasing import LeaseHeartbeat
+from paperatlas.concepts.extraction.llm_cache import copy_cache, create_llm_cache
 from paperatlas.concepts.extraction.llm_extractor import (
+    LLMCache,
+    LLMClient,
     LLMConceptExtractor,
+    LLMConfig,
 )
+from paperatlas.concepts.extraction.throttle import RateLimiter
+from paperatlas.concepts.extraction.models import PaperMetadata, PaperRecord
+from paperatlas.concepts.extraction.pipeline import ConceptExtractionPipeline
+from paperatlas.concepts.summarization.concept_summarizer import ConceptSummarizer
+
+
+class _ProcessingStore:
+    def __init__(self):
+        self.completed = {}
+        self.failed = []
+        self.leases = {}
+        self.heartbeats = []
+        self.released = []
+
+    def complete_paper(self, paper_id, records, prompt_version=None, worker_id=None):
+        if worker_id is not None and self.leases.get(paper_id) != worker_id:
+            return False
+        self.completed[paper_id] = (len(records), prompt_version)
+        return True
+
+    def mark_failed(self, paper_id, error, max_attempts=3, worker_id=None):
+        self.failed.append((paper_id, max_attempts))
+
+    def heartbeat(self, worker_id, paper_ids, lease_seconds=600):
+        self.heartbeats.append(sorted(paper_ids))
+        return len(paper_ids)
+
+    def release_papers(self, worker_id, paper_ids):
+        self.released.extend(paper_ids)
 
 
 def test_llm_parse_response_extracts_concepts():
@@ -18,6 +66,94 @@ def test_llm_parse_response_extracts_concepts():
     assert names == ["Graph Contrastive Learning", "Adaptive Sampling"]
 
 
+def _llm_response(request, text="Concept 1: Sparse Routing\nA hook."):
+    return httpx.Response(
+        200,
+        json={"output": [{"content": [{"type": "output_text", "text": text}]}]},
+        request=request,
+    )
+
+
+def test_extract_many_runs_concurrently_and_backs_off_on_429(tmp_path):
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    def handler(request):
+        with lock:
+            state["calls"] += 1
+            first = state["calls"] == 1
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        try:
+            if first:
+                return httpx.Response(429, headers={"Retry-After": "0.2"})
+            time.sleep(0.05)
+            return _llm_response(request)
+        finally:
+            with lock:
+                state["active"] -= 1
+
+    limiter = RateLimiter(requests_per_minute=6000)
+    limited = []
+    original = limiter.on_rate_limited
+    limiter.on_rate_limited = lambda retry_after=None: (
+        limited.append(retry_after),
+        original(retry_after),
+    )
+    client = LLMClient(
+        LLMConfig(api_key="k", model="m"),
+        rate_limiter=limiter,
+        transport=httpx.MockTransport(handler),
+    )
+    extractor = LLMConceptExtractor(client=client, cache=LLMCache(tmp_path))
+    rows = [{"paper_id": f"p{i}", "title": f"Paper {i}"} for i in range(6)]
+
+    results = extractor.extract_many(rows, max_workers=4)
+
+    assert sorted(results) == [row["paper_id"] for row in rows]
+    assert all(concepts[0]["name"] == "Sparse Routing" for concepts in results.values())
+    assert limited == [0.2]
+    assert state["calls"] == 7
+    assert state["peak"] > 1
+
+
+def test_llm_client_retries_server_errors_and_hedges_slow_calls():
+    calls = []
+
+    def flaky(request):
+        calls.append(request.headers["authorization"])
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return _llm_response(request, "done")
+
+    config = LLMConfig(api_key="k", model="m", backoff_base=0.01)
+    with LLMClient(config, transport=httpx.MockTransport(flaky)) as client:
+        assert client.generate("system", "user") == "done"
+    assert calls == ["Bearer k"] * 3
+
+    with LLMClient(
+        LLMConfig(api_key="k", model="m", max_retries=0),
+        transport=httpx.MockTransport(lambda request: httpx.Response(400)),
+    ) as client:
+        with pytest.raises(httpx.HTTPStatusError):
+            client.generate("system", "user")
+
+    slow = []
+
+    def tail(request):
+        slow.append(None)
+        if len(slow) == 1:
+            time.sleep(1.0)
+            return _llm_response(request, "slow")
+        return _llm_response(request, "fast")
+
+    config = LLMConfig(api_key="k", model="m", hedge_after_seconds=0.05)
+    with LLMClient(config, transport=httpx.MockTransport(tail)) as client:
+        started = time.monotonic()
+        assert client.generate("system", "user") == "fast"
+        assert time.monotonic() - started < 0.5
+
+
 def test_heuristic_extractor_finds_named_methods():
     text = "We propose AdaGraph, a new method for graph matching."
     extractor = HeuristicConceptExtractor()
@@ -28,3 +164,250 @@ def test_heuristic_extractor_finds_named_methods():
     )
     names = [concept["name"] for concept in concepts]
     assert any("AdaGraph" in name for name in names)
+
+
+def test_processing_state_records_done_empty_and_failed(tmp_path, monkeypatch):
+    store = _ProcessingStore()
+    extractor = LLMConceptExtractor(cache=LLMCache(tmp_path), offline=True)
+    pipeline = ConceptExtractionPipeline(
+        mysql_store=store,
+        llm_extractor=extractor,
+        summarizer=ConceptSummarizer(),
+        use_neo4j=False,
+        max_attempts=2,
+    )
+
+    pipeline.process_paper(
+        {"paper_id": "p1", "title": "AdaGraph", "raw_text": "We propose AdaGraph, a method."}
+    )
+    pipeline.process_paper({"paper_id": "p2", "title": "", "raw_text": ""})
+
+    assert store.completed["p1"][0] > 0
+    assert store.completed["p1"][1] == extractor.prompt_version
+    assert store.completed["p2"] == (0, extractor.prompt_version)
+
+    def broken(*args):
+        raise RuntimeError("extractor crashed")
+
+    monkeypatch.setattr(pipeline.heuristic_extractor, "extract", broken)
+    with pytest.raises(RuntimeError):
+        pipeline.process_paper({"paper_id": "p3", "title": "X", "raw_text": "y"})
+    assert store.failed == [("p3", 2)]
+    assert "p3" not in store.completed
+
+
+def test_leased_results_are_dropped_after_losing_the_lease(tmp_path):
+    store = _ProcessingStore()
+    store.leases = {"p1": "worker-a", "p2": "worker-b"}
+    pipeline = ConceptExtractionPipeline(
+        mysql_store=store,
+        llm_extractor=LLMConceptExtractor(cache=LLMCache(tmp_path), offline=True),
+        summarizer=ConceptSummarizer(),
+        use_neo4j=False,
+    )
+    row = {"title": "AdaGraph", "raw_text": "We propose AdaGraph, a method."}
+
+    assert pipeline.process_paper({"paper_id": "p1", **row}, worker_id="worker-a")
+    assert pipeline.process_paper({"paper_id": "p2", **row}, worker_id="worker-a") == []
+    assert set(store.completed) == {"p1"}
+
+    with LeaseHeartbeat(store, "worker-a", interval_seconds=0.01) as heartbeat:
+        heartbeat.hold(["p3", "p4"])
+        heartbeat.done("p3")
+        time.sleep(0.05)
+    assert ["p4"] in store.heartbeats
+    assert store.released == ["p4"]
+
+
+class _BatchServer(BaseHTTPRequestHandler):
+    """Minimal Files + Batches API: a batch completes on its second poll."""
+
+    files: dict = {}
+    batches: dict = {}
+    fail_once: set = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload, raw=None):
+        body = raw if raw is not None else json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            part = next(
+                part for part in message.get_payload() if part.get_filename()
+            )
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = part.get_payload(decode=True)
+            return self._reply({"id": file_id})
+        request = json.loads(body)
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {"input": request["input_file_id"], "polls": 0}
+        self._reply({"id": batch_id, "status": "validating"})
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[1] == "files":
+            return self._reply(None, raw=self.files[parts[2]])
+        batch = self.batches[parts[2]]
+        batch["polls"] += 1
+        if batch["polls"] < 2:
+            return self._reply({"id": parts[2], "status": "in_progress"})
+        lines = []
+        for line in self.files[batch["input"]].decode().splitlines():
+            request = json.loads(line)
+            paper_id = request["custom_id"]
+            if paper_id in self.fail_once:
+                self.fail_once.discard(paper_id)
+                response = {"status_code": 500, "body": {}}
+            else:
+                text = f"Concept 1: Routing for {paper_id}\nA hook."
+                output = [{"content": [{"type": "output_text", "text": text}]}]
+                response = {"status_code": 200, "body": {"output": output}}
+            lines.append(json.dumps({"custom_id": paper_id, "response": response}))
+        output_id = f"file-{len(self.files)}"
+        self.files[output_id] = "\n".join(lines).encode()
+        self._reply({"id": parts[2], "status": "completed", "output_file_id": output_id})
+
+
+def test_batch_api_submits_collects_and_resubmits_failures(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BatchServer)
+    _BatchServer.fail_once = {"arxiv:2401.00002"}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    # Collecting must not fall back to synchronous per-concept summary calls.
+    summary_client = _CountingClient()
+    pipeline = ConceptExtractionPipeline(
+        store_backend="sqlite",
+        sqlite_path=str(tmp_path / "papers.db"),
+        llm_extractor=LLMConceptExtractor(cache=LLMCache(tmp_path / "cache"), offline=True),
+        summarizer=ConceptSummarizer(llm_client=summary_client),
+        use_neo4j=False,
+        summary_mode="per-concept",
+    )
+    store = pipeline.mysql_store
+    store.save_many(
+        PaperRecord(
+            metadata=PaperMetadata(
+                title=f"Paper {i}", arxiv_id=f"2401.0000{i}", source="arxiv"
+            ),
+            raw_text="Body text. " * 20,
+        )
+        for i in range(3)
+    )
+    client = LLMBatchClient(LLMConfig(api_key="k", model="m", base_url=base_url))
+    runner = BatchExtractionRunner(
+        pipeline, client, state_path=tmp_path / "batches" / "state.json"
+    )
+    try:
+        assert runner.submit(store.fetch_unprocessed_papers(limit=10)) == 3
+        # Papers already in an open batch are not sent twice.
+        assert runner.submit(store.fetch_unprocessed_papers(limit=10)) == 0
+        assert runner.collect() == {"ingested": 0, "failed": 0, "open": 1}
+        assert runner.collect() == {"ingested": 2, "failed": 1, "open": 0}
+        assert store.count_unprocessed_papers() == 1
+
+        assert runner.submit(store.fetch_unprocessed_papers(limit=10)) == 1
+        assert runner.wait(poll_interval=0) == {"ingested": 1, "failed": 0, "open": 0}
+    finally:
+        client.close()
+        server.shutdown()
+    assert store.count_unprocessed_papers() == 0
+    names = {row["concept_name"] for row in store.iter_concepts()}
+    assert "Routing for arxiv:2401.00002" in names
+    assert summary_client.calls == []
+
+
+def test_sqlite_llm_cache_compresses_evicts_and_imports(tmp_path):
+    directory = LLMCache(tmp_path / "dir")
+    for index in range(5):
+        directory.set(f"p{index}_abc", {"paper_id": f"p{index}", "response_text": "x" * 2000})
+    assert directory.get("missing") is None
+
+    cache = create_llm_cache("sqlite", tmp_path / "cache.db", compression="zlib")
+    assert copy_cache(directory, cache) == 5
+    assert len(cache) == 5
+    assert cache.get("p3_abc")["response_text"] == "x" * 2000
+    assert cache.get("missing") is None
+    # Values are stored compressed, well under the raw JSON size.
+    assert cache.size_bytes() < 5 * 2000
+
+    stats = cache.stats.snapshot()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 5)
+
+    cache._conn().execute("UPDATE llm_cache SET accessed_at = 0 WHERE cache_key = 'p0_abc'")
+    assert cache.evict(max_entries=4) == 1
+    assert cache.get("p0_abc") is None
+    cache._conn().execute("UPDATE llm_cache SET created_at = 0 WHERE cache_key = 'p1_abc'")
+    assert cache.evict(max_age_seconds=3600) == 1
+
+    exported = LLMCache(tmp_path / "exported")
+    assert copy_cache(cache, exported) == 3
+    assert sorted(key for key, _ in exported.items()) == ["p2_abc", "p3_abc", "p4_abc"]
+    assert directory.evict(max_entries=2) == 3 and len(directory) == 2
+
+
+def test_sqlite_llm_cache_compresses_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("PAPERATLAS_TEXT_COMPRESSION", raising=False)
+    cache = create_llm_cache("sqlite", tmp_path / "cache.db")
+    cache.set("p1_abc", {"paper_id": "p1", "response_text": "x" * 2000})
+    value = cache._conn().execute("SELECT value FROM llm_cache").fetchone()[0]
+    assert is_compressed(value)
+    assert cache.get("p1_abc")["response_text"] == "x" * 2000
+
+
+class _CountingClient:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, system_prompt, user_prompt):
+        self.calls.append(user_prompt)
+        if user_prompt.startswith("Paper Text:"):
+            return "\n\n".join(
+                f"Concept {index}: Idea {index}\n"
+                f"What if idea {index} worked?\n\nIt does, in short.\n\n"
+                "Why it matters:\n- Faster training\n- Lower cost\n- Simpler code\n"
+                "Read the paper.\n\n---"
+                for index in range(1, 4)
+            )
+        return (
+            "Concept 1: Idea 1\nWhy one?\nBecause.\n- a one\n- b one\n- c one\n\n"
+            "Concept 3: Idea 3\nWhy three?\nBecause.\n- a three\n- b three\n- c three\n"
+        )
+
+
+@pytest.mark.parametrize("mode, calls", [("per-concept", 4), ("post", 1), ("batched", 2)])
+def test_summary_modes_cut_llm_calls_per_paper(tmp_path, mode, calls):
+    client = _CountingClient()
+    store = _ProcessingStore()
+    cache = LLMCache(tmp_path)
+    pipeline = ConceptExtractionPipeline(
+        mysql_store=store,
+        llm_extractor=LLMConceptExtractor(client=client, cache=cache),
+        summarizer=ConceptSummarizer(llm_client=client, cache=cache),
+        use_neo4j=False,
+        summary_mode=mode,
+    )
+    row = {"paper_id": "p1", "title": "Ideas", "raw_text": "Three ideas."}
+
+    records = pipeline.process_paper(row)
+
+    assert len(client.calls) == calls
+    assert [record.name for record in records] == ["Idea 1", "Idea 2", "Idea 3"]
+    if mode == "post":
+        assert records[0].bullets == ["Faster training", "Lower cost", "Simpler code"]
+    if mode == "batched":
+        assert records[2].bullets == ["a three", "b three", "c three"]
+        # Idea 2 was missing from the response and falls back to heuristics.
+        assert records[1].bullets
+        pipeline.process_paper(row)
+        assert len(client.calls) == calls
@@ -0,0 +1,670 @@
+import httpx
+import pytest
+
+from paperatlas.concepts.extraction.concurrent_ingest import ConcurrencyConfig
+from paperatlas.concepts.extraction.harvest import HarvestStateStore
+from paperatlas.concepts.extraction.models import PaperIdentifier, PaperMetadata
+from paperatlas.concepts.extraction.pdf_cache import PdfCache
+from paperatlas.concepts.extraction.pdf_parser import PdfParser
+from paperatlas.concepts.extraction.pipeline import IngestionPipeline
+from paperatlas.concepts.extraction.sources import ArxivClient, _build_search_query, parse_day
+from paperatlas.concepts.extraction.storage import JsonPaperStore, _chunk_rows
+
+ATOM_ENTRY = """
+  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}v2</id>
+    <published>2024-01-0{day}T00:00:00Z</published>
+    <title>Paper {arxiv_id}</title>
+    <summary>Abstract</summary>
+    <author><name>Ada Lovelace</name></author>
+    <category term="cs.LG"/>
+  </entry>
+"""
+
+
+def _atom_feed(arxiv_ids):
+    entries = "".join(
+        ATOM_ENTRY.format(arxiv_id=arxiv_id, day=index % 9 + 1)
+        for index, arxiv_id in enumerate(arxiv_ids)
+    )
+    return f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+
+
+class _FakeParser:
+    def parse_file(self, path):
+        return path.read_text(encoding="utf-8")
+
+
+class _FakeArxivClient:
+    def fetch_many(self, arxiv_ids):
+        return {
+            arxiv_id: PaperMetadata(
+                title=f"Paper {arxiv_id}",
+                arxiv_id=arxiv_id,
+                pdf_url=f"https://arxiv.org/pdf/{arxiv_id}.pdf",
+                source="arxiv",
+            )
+            for arxiv_id in arxiv_ids
+        }
+
+
+def _pdf_transport():
+    def handler(request):
+        return httpx.Response(200, content=f"text for {request.url.path}".encode())
+
+    return httpx.MockTransport(handler)
+
+
+def _build_pipeline(tmp_path, transport=None, pdf_cache=None):
+    return IngestionPipeline(
+        arxiv_client=_FakeArxivClient(),
+        parser=_FakeParser(),
+        json_store=JsonPaperStore(tmp_path / "papers"),
+        use_mysql=False,
+        use_neo4j=False,
+        http_client=httpx.Client(transport=transport or _pdf_transport()),
+        pdf_cache=pdf_cache,
+        use_pdf_cache=pdf_cache is not None,
+    )
+
+
+def test_concurrent_ingest_runs_all_stages(tmp_path):
+    pipeline = _build_pipeline(tmp_path)
+    identifiers = [
+        PaperIdentifier(arxiv_id=f"2401.0000{index}") for index in range(6)
+    ]
+    records = pipeline.ingest_identifiers_concurrent(
+        identifiers,
+        config=ConcurrencyConfig(
+            download_workers=3,
+            parse_workers=2,
+            queue_size=2,
+            per_host_limit=2,
+        ),
+    )
+    texts = sorted(record.raw_text for record in records)
+    assert texts == [f"text for /pdf/2401.0000{index}.pdf" for index in range(6)]
+    assert pipeline.json_store.load("arxiv:2401.00003") is not None
+
+
+def test_fetch_many_batches_ids_and_reports_missing():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        ids = request.url.params["id_list"].split(",")
+        return httpx.Response(200, text=_atom_feed(ids[:-1] if "9999.99999" in ids else ids))
+
+    client = ArxivClient(http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    results = client.fetch_many(
+        ["arXiv:2401.00001", "2401.00002v3", "2401.00003", "9999.99999"],
+        batch_size=2,
+    )
+    assert len(requests) == 2
+    assert results["arXiv:2401.00001"].arxiv_id == "2401.00001"
+    assert results["2401.00002v3"].title == "Paper 2401.00002"
+    assert results["9999.99999"] is None
+
+
+def test_fetch_many_backs_off_on_throttling_and_splits_only_on_bad_ids():
+    requests = []
+    throttled = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(503)]
+
+    def handler(request):
+        requests.append(request.url.params["id_list"])
+        if throttled:
+            return throttled.pop(0)
+        if request.url.params["id_list"] == "2401.00003,2401.00004":
+            return httpx.Response(400)
+        return httpx.Response(200, text=_atom_feed(request.url.params["id_list"].split(",")))
+
+    client = ArxivClient(
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        retry_seconds=0,
+    )
+    results = client.fetch_many(["2401.00001", "2401.00002"])
+    # Throttled batches are retried whole, never split into per-ID calls.
+    assert requests == ["2401.00001,2401.00002"] * 3
+    assert results["2401.00002"].arxiv_id == "2401.00002"
+
+    requests.clear()
+    results = client.fetch_many(["2401.00003", "2401.00004"])
+    assert requests == ["2401.00003,2401.00004", "2401.00003", "2401.00004"]
+    assert results["2401.00004"].arxiv_id == "2401.00004"
+
+
+def test_pdf_cache_skips_network_and_revalidates(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"pdf body", headers={"ETag": '"v1"'})
+
+    cache = PdfCache(tmp_path / "pdf_cache")
+    pipeline = _build_pipeline(
+        tmp_path,
+        transport=httpx.MockTransport(handler),
+        pdf_cache=cache,
+    )
+    url = "https://ARXIV.org/pdf/2401.00001.pdf#page=2"
+    first = pipeline._download_pdf(url)
+    assert first.path.read_bytes() == b"pdf body"
+    assert not first.temporary
+    second = pipeline._download_pdf("https://arxiv.org/pdf/2401.00001.pdf")
+    assert second.path == first.path
+    assert len(requests) == 1
+
+    cache.max_age_seconds = 0
+    assert pipeline._download_pdf(url).path == first.path
+    assert len(requests) == 2
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["revalidated"] == 1
+    assert stats["bytes_saved"] == 2 * len(b"pdf body")
+
+
+def test_pdf_cache_keeps_handed_out_blobs_until_released(tmp_path):
+    def handler(request):
+        return httpx.Response(200, content=request.url.path.encode() * 10)
+
+    cache = PdfCache(tmp_path / "pdf_cache", max_bytes=300)
+    pipeline = _build_pipeline(
+        tmp_path,
+        transport=httpx.MockTransport(handler),
+        pdf_cache=cache,
+    )
+    held = pipeline._download_pdf("https://arxiv.org/pdf/2401.00001.pdf")
+    for number in range(2, 5):
+        pipeline._download_pdf(f"https://arxiv.org/pdf/2401.0000{number}.pdf").cleanup()
+    assert held.path.exists()
+    assert cache.lookup("https://arxiv.org/pdf/2401.00001.pdf") is not None
+
+    held.cleanup()
+    pipeline._download_pdf("https://arxiv.org/pdf/2401.00005.pdf").cleanup()
+    assert not held.path.exists()
+
+
+def test_pdf_parser_process_pool_splits_pages_and_caps_length():
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for index in range(7):
+        doc.new_page().insert_text((72, 72), f"Page number {index}")
+    data = doc.tobytes()
+
+    with PdfParser(
+        strategy="pymupdf",
+        workers=2,
+        max_pages=5,
+        pages_per_task=2,
+        timeout_seconds=60,
+    ) as parser:
+        texts = parser.parse_many([data, b"not a pdf"])
+    assert texts[0].count("Page number") == 5
+    assert texts[0].index("Page number 1") < texts[0].index("Page number 4")
+    assert texts[1] is None
+
+
+def test_pdf_parser_times_out_the_same_in_thread_and_in_pool():
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for index in range(3):
+        doc.new_page().insert_text((72, 72), f"Page number {index}")
+    data = doc.tobytes()
+
+    for workers in (0, 1):
+        with PdfParser(strategy="pymupdf", workers=workers, timeout_seconds=1e-9) as parser:
+            with pytest.raises(RuntimeError, match="timed out"):
+                parser.parse_bytes(data)
+            assert parser.parse_many([data]) == [None]
+
+
+def test_streaming_download_enforces_size_cap(tmp_path):
+    def handler(request):
+        if request.url.path.endswith("big.pdf"):
+            return httpx.Response(200, content=b"x" * 2048)
+        return httpx.Response(200, content=b"small")
+
+    pipeline = IngestionPipeline(
+        parser=_FakeParser(),
+        json_store=JsonPaperStore(tmp_path / "papers"),
+        use_mysql=False,
+        use_neo4j=False,
+        use_pdf_cache=False,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        max_pdf_bytes=1024,
+    )
+    pipeline.downloader.chunk_size = 256
+    assert pipeline._download_pdf("https://example.org/big.pdf") is None
+    downloaded = pipeline._download_pdf("https://example.org/small.pdf")
+    assert downloaded.temporary
+    with downloaded:
+        assert downloaded.path.read_bytes() == b"small"
+    assert not downloaded.path.exists()
+
+
+def test_iter_search_pushes_date_window_and_stops_early():
+    requests = []
+    published = [f"2024-03-{day:02d}T12:00:00Z" for day in range(20, 0, -1)]
+
+    def handler(request):
+        requests.append(request.url.params)
+        start = int(request.url.params["start"])
+        size = int(request.url.params["max_results"])
+        entries = "".join(
+            ATOM_ENTRY.replace("2024-01-0{day}T00:00:00Z", stamp).format(
+                arxiv_id=f"2403.{index:05d}"
+            )
+            for index, stamp in enumerate(published[start : start + size], start)
+        )
+        return httpx.Response(
+            200,
+            text=f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>',
+        )
+
+    client = ArxivClient(http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    results = list(
+        client.iter_search(
+            "graphs",
+            max_results=50,
+            from_date="2024-03-15",
+            page_size=4,
+        )
+    )
+    assert [item.published_at.day for item in results] == list(range(20, 14, -1))
+    assert len(requests) == 2
+    assert "submittedDate:[202403150000 TO 999912312359]" in requests[0]["search_query"]
+    assert requests[0]["sortBy"] == "submittedDate"
+
+
+def test_search_query_keeps_or_clauses_inside_the_date_window():
+    from datetime import date
+
+    query = _build_search_query(
+        "cat:cs.LG OR cat:stat.ML",
+        date(2024, 3, 1),
+        date(2024, 3, 31),
+    )
+    assert query == (
+        "(all:cat:cs.LG OR cat:stat.ML) AND "
+        "submittedDate:[202403010000 TO 202403312359]"
+    )
+    assert _build_search_query("graphs", None, None) == "all:graphs"
+
+
+def test_partial_dates_cover_their_whole_period():
+    from datetime import date
+
+    assert parse_day("2023") == date(2023, 1, 1)
+    assert parse_day("2023", end=True) == date(2023, 12, 31)
+    assert parse_day("2024-02") == date(2024, 2, 1)
+    assert parse_day("2024-02", end=True) == date(2024, 2, 29)
+    assert parse_day("2024-12", end=True) == date(2024, 12, 31)
+    assert parse_day("2024-03-15T10:00:00Z") == date(2024, 3, 15)
+    for invalid in ("yesterday", "2024-13", "2024/03/01"):
+        with pytest.raises(ValueError):
+            parse_day(invalid)
+
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params["search_query"])
+        return httpx.Response(200, text=_atom_feed([]))
+
+    client = ArxivClient(http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    assert client.search("graphs", from_date="2023") == []
+    assert requests == ["(all:graphs) AND submittedDate:[202301010000 TO 999912312359]"]
+
+
+def test_incremental_harvest_only_ingests_new_papers(tmp_path):
+    from datetime import datetime, timezone
+
+    catalog = []
+
+    def publish(arxiv_id, day):
+        catalog.insert(
+            0,
+            PaperMetadata(
+                title=f"Paper {arxiv_id}",
+                arxiv_id=arxiv_id,
+                published_at=datetime(2024, 3, day, tzinfo=timezone.utc),
+                source="arxiv",
+            ),
+        )
+
+    class _SearchClient:
+        calls = []
+
+        def iter_search(self, query, max_results, from_date=None, to_date=None):
+            self.calls.append(from_date)
+            return iter(catalog[:max_results])
+
+    for index, day in enumerate([1, 2, 3]):
+        publish(f"2403.0000{index}", day)
+    pipeline = _build_pipeline(tmp_path)
+    pipeline.arxiv_client = _SearchClient()
+    state = HarvestStateStore(tmp_path / "watermarks.json")
+
+    first = pipeline.harvest_query("graphs", state, max_results=10)
+    assert len(first) == 3
+    assert state.get("Graphs").last_ids == ["arxiv:2403.00002"]
+
+    publish("2403.00003", 4)
+    second = pipeline.harvest_query("graphs", state, max_results=10)
+    assert [record.metadata.arxiv_id for record in second] == ["2403.00003"]
+    assert pipeline.arxiv_client.calls[-1] == "2024-03-03"
+    assert state.get("graphs").last_published.startswith("2024-03-04")
+
+
+def test_truncated_first_harvest_keeps_the_window_open(tmp_path):
+    from datetime import datetime, timezone
+
+    catalog = [
+        PaperMetadata(
+            title=f"Paper {day}",
+            arxiv_id=f"2403.0000{day}",
+            published_at=datetime(2024, 3, day, tzinfo=timezone.utc),
+            source="arxiv",
+        )
+        for day in (3, 2, 1)
+    ]
+
+    class _SearchClient:
+        def iter_search(self, query, max_results, from_date=None, to_date=None):
+            return iter(catalog[:max_results])
+
+    pipeline = _build_pipeline(tmp_path)
+    pipeline.arxiv_client = _SearchClient()
+    state = HarvestStateStore(tmp_path / "watermarks.json")
+
+    assert len(pipeline.harvest_query("graphs", state, max_results=2)) == 2
+    assert state.get("graphs") is None
+    rest = pipeline.harvest_query("graphs", state, max_results=10)
+    assert [record.metadata.arxiv_id for record in rest] == ["2403.00001"]
+    assert state.get("graphs").last_published.startswith("2024-03-03")
+
+
+def test_snapshot_ingest_filters_and_writes_in_batches(tmp_path):
+    import gzip
+    import json
+
+    rows = [
+        {
+            "id": "0704.0001",
+            "title": "Calculation of  prompt\n diphoton production",
+            "abstract": "  A fully differential calculation. ",
+            "categories": "hep-ph",
+            "doi": "10.1103/PhysRevD.76.013009",
+            "authors_parsed": [["Balazs", "C.", ""], ["Berger", "E. L.", ""]],
+            "versions": [{"version": "v1", "created": "Mon, 2 Apr 2007 19:18:42 GMT"}],
+        },
+        {
+            "id": "2401.00001",
+            "title": "Graph transformers",
+            "categories": "cs.LG stat.ML",
+            "authors": "Ada Lovelace and Alan Turing",
+            "versions": [{"version": "v1", "created": "Tue, 2 Jan 2024 10:00:00 GMT"}],
+        },
+        {
+            "id": "2401.00002",
+            "title": "Sparse attention",
+            "categories": "cs.CL",
+            "versions": [{"version": "v1", "created": "Wed, 3 Jan 2024 10:00:00 GMT"}],
+        },
+    ]
+    path = tmp_path / "snapshot.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        for row in rows:
+            handle.write(json.dumps(row) + "\n")
+        handle.write("not json\n")
+
+    pipeline = _build_pipeline(tmp_path)
+    total = pipeline.ingest_snapshot(
+        str(path),
+        categories=["cs", "hep-ph"],
+        from_date="2007-01-01",
+        to_date="2024-01-02",
+        batch_size=1,
+    )
+    assert total == 2
+    old = pipeline.json_store.load("arxiv:0704.0001")
+    assert old["metadata"]["title"] == "Calculation of prompt diphoton production"
+    assert [author["name"] for author in old["metadata"]["authors"]] == [
+        "C. Balazs",
+        "E. L. Berger",
+    ]
+    assert old["source_payload"]["snapshot"]["doi"] == "10.1103/PhysRevD.76.013009"
+    new = pipeline.json_store.load("arxiv:2401.00001")
+    assert new["metadata"]["venue"] == "cs.LG"
+    assert new["raw_text"] is None
+    assert pipeline.json_store.load("arxiv:2401.00002") is None
+
+
+@pytest.mark.parametrize("json_backend", ["json", "segments"])
+def test_snapshot_ingest_keeps_stored_text(tmp_path, json_backend):
+    import json
+
+    from paperatlas.concepts.extraction import storage
+    from paperatlas.concepts.extraction.models import PaperRecord
+    from paperatlas.concepts.extraction.segment_store import SegmentedPaperStore
+
+    if json_backend == "json":
+        json_store = JsonPaperStore(tmp_path / "papers")
+    else:
+        json_store = SegmentedPaperStore(tmp_path / "segments")
+    sqlite = storage.create_paper_store("sqlite", sqlite_path=tmp_path / "papers.db")
+    parsed = PaperRecord(
+        metadata=PaperMetadata(title="Draft title", arxiv_id="2401.00001", source="arxiv"),
+        raw_text="Parsed full text",
+    )
+    json_store.save(parsed)
+    sqlite.save(parsed)
+    pipeline = IngestionPipeline(
+        arxiv_client=_FakeArxivClient(),
+        parser=_FakeParser(),
+        json_store=json_store,
+        mysql_store=sqlite,
+        use_mysql=False,
+        use_neo4j=False,
+        http_client=httpx.Client(transport=_pdf_transport()),
+        use_pdf_cache=False,
+    )
+
+    path = tmp_path / "snapshot.json"
+    path.write_text(
+        json.dumps(
+            {
+                "id": "2401.00001",
+                "title": "Graph transformers",
+                "categories": "cs.LG",
+                "versions": [{"version": "v1", "created": "Tue, 2 Jan 2024 10:00:00 GMT"}],
+            }
+        )
+        + "\n"
+    )
+    assert pipeline.ingest_snapshot(str(path)) == 1
+    stored = json_store.load("arxiv:2401.00001")
+    assert stored["raw_text"] == "Parsed full text"
+    assert stored["metadata"]["title"] == "Graph transformers"
+    row = sqlite.fetch_paper_by_id("arxiv:2401.00001")
+    assert row["raw_text"] == "Parsed full text"
+    assert row["title"] == "Graph transformers"
+    assert "raw_text = COALESCE(VALUES(raw_text), raw_text)" in storage._PAPER_UPSERT_SQL
+
+
+def test_paper_node_upsert_survives_transaction_retry():
+    from paperatlas.concepts.extraction.models import PaperRecord
+    from paperatlas.graph.builders.paper_graph import upsert_paper_nodes
+    from paperatlas.graph.neo4j_client import Neo4jClient
+
+    sent = []
+
+    class _Tx:
+        def run(self, query, parameters):
+            sent.append([row["paper_id"] for row in parameters["rows"]])
+
+    class _Session:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute_write(self, work):
+            # The driver retries the transaction function on transient errors.
+            work(_Tx())
+            return work(_Tx())
+
+    class _Driver:
+        def session(self):
+            return _Session()
+
+    client = Neo4jClient.__new__(Neo4jClient)
+    client._driver = _Driver()
+    records = (
+        PaperRecord(
+            metadata=PaperMetadata(title="Paper", arxiv_id=f"2401.0000{index}", source="arxiv")
+        )
+        for index in range(2)
+    )
+    upsert_paper_nodes(client, records)
+    assert sent == [["arxiv:2401.00000", "arxiv:2401.00001"]] * 2
+
+
+class _RecordingMySQLStore:
+    def __init__(self):
+        self.batches = []
+
+    def save_many(self, records):
+        self.batches.append([record.metadata.arxiv_id for record in records])
+        return len(records)
+
+
+def test_persist_buffers_records_into_bulk_upserts(tmp_path):
+    store = _RecordingMySQLStore()
+    pipeline = IngestionPipeline(
+        arxiv_client=_FakeArxivClient(),
+        parser=_FakeParser(),
+        json_store=JsonPaperStore(tmp_path / "papers"),
+        mysql_store=store,
+        use_neo4j=False,
+        http_client=httpx.Client(transport=_pdf_transport()),
+        use_pdf_cache=False,
+        persist_batch_size=2,
+    )
+    identifiers = [PaperIdentifier(arxiv_id=f"2401.0000{index}") for index in range(5)]
+
+    records = pipeline.ingest_identifiers(identifiers)
+
+    assert len(records) == 5
+    assert [len(batch) for batch in store.batches] == [2, 2, 1]
+    assert pipeline._writer.pending() == {"json": 0, "mysql": 0}
+
+
+def test_upsert_chunks_respect_row_and_byte_limits():
+    rows = [("a", "x" * 10), ("b", "y" * 10), ("c", "z" * 10), ("d", None)]
+    assert [len(chunk) for chunk in _chunk_rows(rows, 3, 25)] == [2, 2]
+    assert [len(chunk) for chunk in _chunk_rows(rows, 3, 1000)] == [3, 1]
+
+
+def test_write_behind_isolates_slow_sinks_and_replays_spill(tmp_path):
+    import threading
+
+    from paperatlas.concepts.extraction.write_behind import WriteBehindBuffer
+
+    release = threading.Event()
+    fast, slow = [], []
+
+    def slow_sink(items):
+        release.wait(5)
+        slow.extend(items)
+
+    def failing_sink(items):
+        raise RuntimeError("graph down")
+
+    spill = tmp_path / "spill.jsonl"
+    buffer = WriteBehindBuffer(
+        {"fast": fast.extend, "slow": slow_sink, "flaky": failing_sink},
+        max_batch=2,
+        max_delay_seconds=0.05,
+        max_pending=4,
+        max_retries=0,
+        spill_path=spill,
+    )
+    buffer.submit_many(range(4))
+    producer = threading.Thread(target=buffer.submit, args=(4,))
+    producer.start()
+    producer.join(0.3)
+    # The slow sink holds a full queue, so the producer is held back.
+    assert producer.is_alive()
+    assert fast == [0, 1, 2, 3]
+    release.set()
+    producer.join(5)
+    with pytest.raises(RuntimeError):
+        buffer.close()
+    assert slow == [0, 1, 2, 3, 4] and fast == [0, 1, 2, 3, 4]
+
+    replayed = []
+    WriteBehindBuffer(
+        {"fast": fast.extend, "flaky": replayed.extend},
+        spill_path=spill,
+    ).close()
+    assert replayed == [0, 1, 2, 3, 4]
+    assert spill.read_text() == ""
+
+
+def test_write_behind_numbers_new_items_past_spilled_acks(tmp_path):
+    from paperatlas.concepts.extraction.write_behind import WriteBehindBuffer
+
+    def failing_sink(items):
+        raise RuntimeError("graph down")
+
+    # Everything from the last run was delivered, so only the acks remain.
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text('{"ack": "json", "seq": 5}\n{"ack": "graph", "seq": 3}\n')
+    stored = []
+    buffer = WriteBehindBuffer(
+        {"json": stored.extend, "graph": failing_sink},
+        max_retries=0,
+        spill_path=spill,
+    )
+    buffer.submit("paper")
+    with pytest.raises(RuntimeError):
+        buffer.close()
+    assert stored == ["paper"]
+
+    replayed = []
+    WriteBehindBuffer(
+        {"json": stored.extend, "graph": replayed.extend},
+        spill_path=spill,
+    ).close()
+    assert replayed == ["paper"]
+    assert stored == ["paper"]
+
+
+def test_write_behind_spill_file_has_one_owner(tmp_path):
+    import threading
+
+    from paperatlas.concepts.extraction.write_behind import WriteBehindBuffer
+
+    release = threading.Event()
+    stored = []
+
+    def slow_sink(items):
+        release.wait(5)
+        stored.extend(items)
+
+    spill = tmp_path / "spill.jsonl"
+    first = WriteBehindBuffer({"json": slow_sink}, max_delay_seconds=0, spill_path=spill)
+    first.submit("paper")
+    with pytest.raises(RuntimeError, match="in use"):
+        WriteBehindBuffer({"json": [].extend}, spill_path=spill)
+    # The failed open neither replayed nor truncated the first run's items.
+    assert '"item": "paper"' in spill.read_text()
+
+    release.set()
+    first.close()
+    assert stored == ["paper"]
+    WriteBehindBuffer({"json": [].extend}, spill_path=spill).close()
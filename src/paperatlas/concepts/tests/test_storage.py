@@ -0,0 +1,479 @@
+from contextlib import contextmanager
+
+import pytest
+
+from paperatlas.concepts.extraction import sqlite_store, storage
+from paperatlas.concepts.extraction.compression import (
+    compress_text,
+    decompress_text,
+    is_compressed,
+)
+from paperatlas.concepts.extraction.models import PaperMetadata, PaperRecord
+from paperatlas.concepts.extraction.storage import (
+    PAPER_METADATA_FIELDS,
+    JsonPaperStore,
+    MySQLPaperStore,
+    _paper_row,
+    _paper_scan_query,
+)
+
+
+class _StreamingCursor:
+    def __init__(self, rows, fail_after=None):
+        self.rows = rows
+        self.fail_after = fail_after
+        self.query = None
+        self.params = None
+        self.served = 0
+
+    def execute(self, query, params):
+        self.query = query
+        self.params = params
+
+    def fetchmany(self, size):
+        after = self.params[0] if self.params else ""
+        remaining = [row for row in self.rows if row["paper_id"] > after]
+        if self.fail_after is not None and self.served >= self.fail_after:
+            self.fail_after = None
+            raise storage._import_mysql_connector().errors.OperationalError("gone away")
+        batch = remaining[self.served : self.served + size]
+        self.served += len(batch)
+        return [dict(row) for row in batch]
+
+
+class _StreamingConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self, **kwargs):
+        assert kwargs == {"dictionary": True, "buffered": False}
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+
+def test_unprocessed_scan_uses_processing_state_and_keys():
+    query, params = _paper_scan_query(True, True, "arxiv:2401.00002", limit=50)
+
+    assert "pp.paper_id > %s" in query
+    assert "pp.status IN (%s)" in query
+    assert "LEFT JOIN" not in query and "raw_text !=" not in query
+    assert "OFFSET" not in query
+    assert params == ["pending", "arxiv:2401.00002", 50]
+
+
+def test_iter_papers_streams_and_resumes_after_disconnect(monkeypatch):
+    pytest.importorskip("mysql.connector")
+    rows = [
+        {"paper_id": f"arxiv:2401.0000{index}", "authors": '["Ada"]'}
+        for index in range(7)
+    ]
+    cursors = [_StreamingCursor(rows, fail_after=4), _StreamingCursor(rows)]
+    connections = []
+
+    def connect():
+        connections.append(_StreamingConnection(cursors[len(connections)]))
+        return connections[-1]
+
+    store = MySQLPaperStore.__new__(MySQLPaperStore)
+    monkeypatch.setattr(store, "_connect", connect)
+
+    streamed = list(store.iter_papers(batch_size=2))
+
+    assert [row["paper_id"] for row in streamed] == [row["paper_id"] for row in rows]
+    assert streamed[0]["authors"] == ["Ada"]
+    assert cursors[1].params == ["arxiv:2401.00003"]
+    assert all(connection.closed for connection in connections)
+
+
+class _RecordingCursor:
+    def __init__(self, texts):
+        self.texts = texts
+        self.queries = []
+        self._result = []
+
+    def execute(self, query, params):
+        self.queries.append(" ".join(query.split()))
+        if "raw_text FROM papers WHERE paper_id IN" in self.queries[-1]:
+            self._result = [(paper_id, self.texts[paper_id]) for paper_id in params]
+        else:
+            self._result = [
+                {"paper_id": paper_id, "title": f"T{paper_id}", "authors": None}
+                for paper_id in sorted(self.texts)
+            ]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+def test_projected_rows_load_raw_text_once_per_page(monkeypatch):
+    cursor = _RecordingCursor({"p1": "text one", "p2": "text two"})
+
+    class _Connection:
+        def cursor(self, **kwargs):
+            return cursor
+
+    @contextmanager
+    def connection():
+        yield _Connection()
+
+    store = MySQLPaperStore.__new__(MySQLPaperStore)
+    monkeypatch.setattr(store, "_connection", connection)
+
+    rows = store.fetch_papers(limit=10, fields=PAPER_METADATA_FIELDS)
+
+    assert "raw_text" not in cursor.queries[0].split("FROM")[0]
+    assert len(cursor.queries) == 1
+    assert rows[1].get("raw_text") == "text two"
+    assert rows[0]["raw_text"] == "text one"
+    assert len(cursor.queries) == 2
+    with pytest.raises(ValueError):
+        store.fetch_papers(fields=["title", "secret"])
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_raw_text_is_compressed_and_decoded_on_access(tmp_path, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    text = "Attention is all you need. " * 400
+    record = PaperRecord(
+        metadata=PaperMetadata(title="T", arxiv_id="2401.00001", source="arxiv"),
+        raw_text=text,
+    )
+    store = JsonPaperStore(tmp_path, compression=codec)
+    path = store.save(record)
+
+    assert path.stat().st_size < len(text) / 4
+    row = store.load("arxiv:2401.00001")
+    assert "raw_text" not in row
+    assert row["raw_text"] == text
+
+    packed = _paper_row(record, codec)[13]
+    assert is_compressed(packed)
+    assert decompress_text(packed) == text
+    assert decompress_text("plain legacy text") == "plain legacy text"
+    assert compress_text("short", codec) == "short"
+
+
+def test_compressed_rows_convert_to_plain_mappings(tmp_path, monkeypatch):
+    import json
+
+    monkeypatch.delenv("PAPERATLAS_TEXT_COMPRESSION", raising=False)
+    text = "Attention is all you need. " * 400
+    assert compress_text(text) == text
+
+    record = PaperRecord(
+        metadata=PaperMetadata(title="T", arxiv_id="2401.00001", source="arxiv"),
+        raw_text=text,
+    )
+    JsonPaperStore(tmp_path, compression="zlib").save(record)
+    store = JsonPaperStore(tmp_path)
+    assert dict(store.load("arxiv:2401.00001"))["raw_text"] == text
+    assert json.loads(json.dumps(store.load("arxiv:2401.00001")))["raw_text"] == text
+    store.save(PaperRecord(**dict(store.load("arxiv:2401.00001"))))
+    assert store.load("arxiv:2401.00001").text_loaded()
+    with (tmp_path / "arxiv_2401.00001.json").open() as handle:
+        assert json.load(handle)["raw_text"] == text
+
+
+def _sqlite_record(index, text="Some extracted paper text. " * 40):
+    return PaperRecord(
+        metadata=PaperMetadata(
+            title=f"Paper {index}",
+            arxiv_id=f"2401.0000{index}",
+            source="arxiv",
+            authors=[{"name": "Ada"}],
+        ),
+        raw_text=text,
+    )
+
+
+def test_sqlite_store_saves_and_scans_like_mysql(tmp_path):
+    store = storage.create_paper_store(
+        "sqlite",
+        sqlite_path=tmp_path / "papers.db",
+        compression="zlib",
+    )
+    records = [_sqlite_record(index) for index in range(4)]
+    records.append(_sqlite_record(4, text=None))
+
+    assert store.save_many(records, max_rows=2) == 5
+    store.save(records[0])
+    journal = store._conn().execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal == "wal"
+    version = store._conn().execute("PRAGMA user_version").fetchone()[0]
+    assert version == sqlite_store.SCHEMA_VERSION
+
+    assert store.count_unprocessed_papers() == 4
+    assert store.count_unprocessed_papers(require_raw_text=False) == 5
+    first = store.fetch_papers(limit=2)
+    assert [row["paper_id"] for row in first] == ["arxiv:2401.00000", "arxiv:2401.00001"]
+    assert first[0]["authors"][0]["name"] == "Ada"
+    assert first[0]["raw_text"] == records[0].raw_text
+    after = store.fetch_unprocessed_papers(limit=10, after_paper_id="arxiv:2401.00001")
+    assert [row["paper_id"] for row in after] == ["arxiv:2401.00002", "arxiv:2401.00003"]
+
+    projected = list(store.iter_papers(batch_size=2, fields=["title"]))
+    assert len(projected) == 4 and not projected[0].text_loaded()
+    assert projected[3]["raw_text"] == records[3].raw_text
+    assert store.fetch_papers_missing_text() == []
+    assert store.existing_ids(["arxiv:2401.00003", "missing"]) == {"arxiv:2401.00003"}
+    assert store.fetch_paper_by_id("missing") is None
+
+    concept = {
+        "paper_id": "arxiv:2401.00000",
+        "concept_id": "c1",
+        "name": "Attention",
+        "summary": "",
+        "source": "heuristic",
+    }
+    assert store.complete_paper("arxiv:2401.00000", [concept], prompt_version="v1")
+    store.complete_paper("arxiv:2401.00001", [], prompt_version="v0")
+    store.mark_failed("arxiv:2401.00002", "boom", max_attempts=1)
+    assert store.count_unprocessed_papers() == 1
+    assert store.requeue_stale("v1") == 1
+
+    claimed = store.claim_papers("w1", limit=1, fields=["title"])
+    assert [row["paper_id"] for row in claimed] == ["arxiv:2401.00001"]
+    assert store.claim_papers("w2", limit=5)[0]["paper_id"] == "arxiv:2401.00003"
+    assert not store.complete_paper("arxiv:2401.00001", [], worker_id="w2")
+    assert store.heartbeat("w1", ["arxiv:2401.00001", "arxiv:2401.00003"]) == 1
+    store.release_papers("w1", ["arxiv:2401.00001"])
+    assert store.count_unprocessed_papers() == 1
+
+
+def test_segmented_store_loads_scans_and_compacts(tmp_path):
+    from paperatlas.concepts.extraction.segment_store import SegmentedPaperStore
+
+    base = tmp_path / "segments"
+    store = SegmentedPaperStore(base, compression="zlib", segment_max_bytes=1024)
+    records = [_sqlite_record(index) for index in range(6)]
+    assert store.save_many(records) == 6
+    updated = _sqlite_record(2, text="Revised text. " * 100)
+    store.save(updated)
+
+    assert len(list(base.glob("segment-*.jsonl"))) > 1
+    assert store.load("arxiv:2401.00002")["raw_text"] == updated.raw_text
+    assert store.load("missing") is None
+    assert store.stale_bytes > 0
+    scanned = [row["paper_id"] for row in store.iter_papers()]
+    assert sorted(scanned) == [f"arxiv:2401.0000{index}" for index in range(6)]
+
+    # A line appended without its index entry and a torn tail are recovered.
+    extra = _sqlite_record(7)
+    store.save(extra)
+    store.close()
+    index = base / "index.jsonl"
+    entries = index.read_text().splitlines(keepends=True)
+    index.write_text("".join(entries[:-1]))
+    last_segment = sorted(base.glob("segment-*.jsonl"))[-1]
+    with last_segment.open("ab") as handle:
+        handle.write(b'{"paper_id":"torn"')
+    reopened = SegmentedPaperStore(base)
+    assert reopened.load("arxiv:2401.00007")["raw_text"] == extra.raw_text
+    assert "torn" not in reopened
+    assert reopened.load("arxiv:2401.00002")["raw_text"] == updated.raw_text
+
+    assert reopened.compact() > 0
+    assert reopened.stale_bytes == 0
+    assert len(reopened) == 7
+    assert reopened.load("arxiv:2401.00002")["raw_text"] == updated.raw_text
+    assert reopened.existing_ids(["arxiv:2401.00005", "x"]) == {"arxiv:2401.00005"}
+    with pytest.raises(RuntimeError, match="already open"):
+        SegmentedPaperStore(base)
+
+    # Papers left in a legacy JSON directory count as stored until imported.
+    reopened.close()
+    legacy = JsonPaperStore(tmp_path / "legacy")
+    legacy.save(_sqlite_record(8))
+    store = SegmentedPaperStore(base, legacy_dir=tmp_path / "legacy")
+    assert store.existing_ids(["arxiv:2401.00008", "x"]) == {"arxiv:2401.00008"}
+    assert store.load("arxiv:2401.00008")["metadata"]["title"] == "Paper 8"
+    assert store.import_json_dir(tmp_path / "legacy") == 1
+    assert "arxiv:2401.00008" in store
+    store.close()
+
+
+def test_parquet_export_partitions_papers_texts_and_concepts(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    from paperatlas.concepts.extraction.export import export_parquet
+
+    store = storage.create_paper_store("sqlite", sqlite_path=tmp_path / "papers.db")
+    records = [_sqlite_record(index) for index in range(3)]
+    records[2].metadata.publication_year = 2023
+    records.append(_sqlite_record(3, text=None))
+    store.save_many(records)
+    store.save_concepts(
+        [
+            {
+                "paper_id": f"arxiv:2401.0000{index}",
+                "concept_id": f"c{index}",
+                "name": "Attention",
+                "summary": "",
+                "source": "heuristic",
+            }
+            for index in range(3)
+        ]
+    )
+
+    counts = export_parquet(store, tmp_path / "out", batch_size=2)
+
+    assert counts == {"papers": 4, "paper_texts": 3, "paper_concepts": 3}
+    papers = ds.dataset(tmp_path / "out" / "papers", partitioning="hive")
+    assert "raw_text" not in papers.schema.names
+    assert (tmp_path / "out" / "papers" / "publication_year=2023" / "source=arxiv").is_dir()
+    table = papers.to_table(columns=["paper_id", "authors", "publication_year"])
+    assert table.num_rows == 4
+    assert table.column("authors").to_pylist()[0][0]["name"] == "Ada"
+    texts = ds.dataset(tmp_path / "out" / "paper_texts", partitioning="hive").to_table()
+    assert texts.column("raw_text").to_pylist()[0] == records[0].raw_text
+    concepts = ds.dataset(
+        tmp_path / "out" / "paper_concepts", partitioning="hive"
+    ).to_table(filter=ds.field("publication_year") == 2023)
+    assert concepts.column("paper_id").to_pylist() == ["arxiv:2401.00002"]
+    assert concepts.column("extraction_source").to_pylist() == ["heuristic"]
+
+
+class _SchemaCursor:
+    def __init__(self, version):
+        self.version = version
+        self.statements = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.statements.append(query)
+        if "TABLE_NAME = 'schema_migrations'" in query:
+            self._result = [(1 if self.version is not None else 0,)]
+        elif query.startswith("SELECT COALESCE(MAX(version)"):
+            self._result = [(self.version or 0,)]
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.version = params[0]
+        elif query.startswith("SELECT GET_LOCK") or query.startswith("SELECT RELEASE_LOCK"):
+            self._result = [(1,)]
+        elif query.startswith("SELECT COUNT(*)"):
+            self._result = [(0,)]
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+def test_schema_migrations_run_once_under_a_lock(monkeypatch):
+    def store_for(cursor, database):
+        class _Connection:
+            def cursor(self, **kwargs):
+                return cursor
+
+            def commit(self):
+                pass
+
+        @contextmanager
+        def connection():
+            yield _Connection()
+
+        store = MySQLPaperStore.__new__(MySQLPaperStore)
+        store._config = {"host": "db", "port": 3306, "database": database}
+        monkeypatch.setattr(store, "_connection", connection)
+        return store
+
+    fresh = _SchemaCursor(version=None)
+    store_for(fresh, "fresh")._ensure_schema()
+    assert fresh.version == storage.SCHEMA_VERSION
+    assert fresh.statements[1].startswith("SELECT GET_LOCK")
+    assert fresh.statements[-1].startswith("SELECT RELEASE_LOCK")
+    assert any("CREATE INDEX idx_processing_lease" in query for query in fresh.statements)
+
+    current = _SchemaCursor(version=storage.SCHEMA_VERSION)
+    store = store_for(current, "current")
+    store._ensure_schema()
+    assert len(current.statements) == 2
+    store._ensure_schema()
+    assert len(current.statements) == 2
+
+
+def test_pooled_checkouts_wait_for_a_slot_and_ping_connections(monkeypatch):
+    import threading
+    import time
+
+    class _PooledConnection:
+        def __init__(self, pool, healthy=True):
+            self.pool = pool
+            self.healthy = healthy
+            self.pings = []
+
+        def ping(self, reconnect, attempts, delay):
+            self.pings.append(reconnect)
+            if not self.healthy:
+                raise OSError("server gone")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            with self.pool.lock:
+                self.pool.out -= 1
+
+    class _FakePool:
+        # Raises like mysql.connector's pool when asked for one too many.
+        def __init__(self, size):
+            self.size = size
+            self.out = 0
+            self.peak = 0
+            self.lock = threading.Lock()
+            self.broken = 0
+            self.handed_out = []
+
+        def get_connection(self):
+            with self.lock:
+                if self.out >= self.size:
+                    raise RuntimeError("pool exhausted")
+                self.out += 1
+                self.peak = max(self.peak, self.out)
+                conn = _PooledConnection(self, healthy=self.broken == 0)
+                self.broken = max(self.broken - 1, 0)
+                self.handed_out.append(conn)
+                return conn
+
+    monkeypatch.setattr(MySQLPaperStore, "_ensure_schema", lambda self: None)
+    store = MySQLPaperStore({"host": "db"}, pool_size=2)
+    pool = _FakePool(2)
+    store._pool = pool
+
+    def work():
+        with store._connection():
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.peak == 2
+    assert pool.out == 0
+    assert all(conn.pings == [True] for conn in pool.handed_out)
+
+    # A connection that cannot be revived is handed back, not leaked, and
+    # its slot is free for the next checkout.
+    pool.broken = 1
+    with pytest.raises(OSError):
+        with store._connection():
+            pass
+    assert pool.out == 0
+    for _ in range(3):
+        work()
+    assert pool.out == 0
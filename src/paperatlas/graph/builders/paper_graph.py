@@ -1,13 +1,45 @@
 from __future__ import annotations
 
+from typing import Iterable
+
 from paperatlas.concepts.extraction.models import PaperRecord
 from paperatlas.graph.neo4j_client import Neo4jClient
 from paperatlas.graph.schema import PAPER_ID_FIELD, PAPER_LABEL
 
 
 def upsert_paper_node(client: Neo4jClient, record: PaperRecord) -> None:
+    query = f"""
+        MERGE (p:{PAPER_LABEL} {{{PAPER_ID_FIELD}: $paper_id}})
+        SET p += $properties
+    """
+    client.execute_write(
+        query,
+        {
+            "paper_id": record.metadata.canonical_id(),
+            "properties": _paper_properties(record),
+        },
+    )
+
+
+def upsert_paper_nodes(client: Neo4jClient, records: Iterable[PaperRecord]) -> None:
+    query = f"""
+        UNWIND $rows AS row
+        MERGE (p:{PAPER_LABEL} {{{PAPER_ID_FIELD}: row.paper_id}})
+        SET p += row.properties
+    """
+    rows = [
+        {
+            "paper_id": record.metadata.canonical_id(),
+            "properties": _paper_properties(record),
+        }
+        for record in records
+    ]
+    client.execute_many(query, rows)
+
+
+def _paper_properties(record: PaperRecord) -> dict:
     metadata = record.metadata
-    properties = {
+    return {
         "title": metadata.title,
         "abstract": metadata.abstract,
         "year": metadata.publication_year,
@@ -20,8 +52,3 @@ def upsert_paper_node(client: Neo4jClient, record: PaperRecord) -> None:
         "pdf_url": str(metadata.pdf_url) if metadata.pdf_url else None,
         "source": metadata.source,
     }
-    query = f"""
-        MERGE (p:{PAPER_LABEL} {{{PAPER_ID_FIELD}: $paper_id}})
-        SET p += $properties
-    """
-    client.execute_write(query, {"paper_id": metadata.canonical_id(), "properties": properties})
@@ -25,5 +25,10 @@ class Neo4jClient:
             return session.execute_read(lambda tx: tx.run(query, parameters or {}).data())
 
     def execute_many(self, query: str, rows: Iterable[dict]) -> None:
+        # Materialised up front: the driver may call the transaction function
+        # again on a transient error, and a generator would be empty by then.
+        parameters = {"rows": list(rows)}
+        if not parameters["rows"]:
+            return
         with self._driver.session() as session:
-            session.execute_write(lambda tx: tx.run(query, {"rows": list(rows)}))
+            session.execute_write(lambda tx: tx.run(query, parameters))